@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import EmailStr, SecretStr
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # Base de données
@@ -10,6 +10,35 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    TOKEN_REVOCATION_REDIS_ENABLED: bool = True  # révocations partagées via REDIS_URL
+    TOKEN_REVOCATION_REDIS_TIMEOUT: float = 0.2  # en secondes
+    TOKEN_REVOCATION_REDIS_RETRY_INTERVAL: int = 30
+    # Coût du hash : viser 100 à 250 ms par vérification (voir scripts/benchmark_password_hash.py)
+    PASSWORD_HASH_SCHEME: str = "bcrypt"  # bcrypt, ou argon2 (nécessite argon2-cffi)
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536  # en Kio
+    PASSWORD_ARGON2_PARALLELISM: int = 1  # le pool de calcul parallélise déjà les connexions
+    PASSWORD_HASH_WORKERS: Optional[int] = None  # threads de calcul bcrypt, un par cœur si vide
+    PASSWORD_HASH_MAX_PENDING: int = 64  # au-delà, les connexions sont refusées (503)
+    USER_CACHE_TTL: int = 30  # secondes de cache mémoire de l'utilisateur authentifié
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_REDIS_ENABLED: bool = False  # partage le cache entre les workers via REDIS_URL
+    USER_CACHE_REDIS_TTL: int = 300
+    
+    # Limitation de débit : "<route>:<clé>" -> "<requêtes>/<second|minute|hour|day>"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, str] = {
+        "login:ip": "20/minute",
+        "login:account": "5/minute",
+        "guest_chat:ip": "30/hour",
+        "guest_chat:session": "20/hour",
+    }
+    RATE_LIMIT_REDIS_ENABLED: bool = True  # seaux partagés via REDIS_URL, en mémoire sinon
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.2  # en secondes
+    RATE_LIMIT_REDIS_RETRY_INTERVAL: int = 30  # secondes en mémoire avant de réessayer Redis
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # à activer derrière un proxy de confiance
     
     # AWS
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -21,7 +50,52 @@ class Settings(BaseSettings):
     S3_VEHICLES_PREFIX: str = "vehicles/"
     S3_DOCUMENTS_PREFIX: str = "documents/"
     CLOUDFRONT_DOMAIN: Optional[str] = None
+    CLOUDFRONT_KEY_PAIR_ID: Optional[str] = None
+    CLOUDFRONT_PRIVATE_KEY: Optional[SecretStr] = None  # clé RSA au format PEM
+    SIGNED_URL_EXPIRATION: int = 900  # en secondes
+    SIGNED_URL_CACHE_TTL: int = 300  # en secondes, à garder bien inférieur à l'expiration
+    SIGNED_URL_CACHE_SIZE: int = 10000
+    S3_ENDPOINT_URL: Optional[str] = None  # Stockage compatible S3 local (MinIO, moto...)
+    S3_UPLOAD_WORKERS: int = 8
+    S3_MAX_POOL_CONNECTIONS: int = 16
+    S3_RETRY_MODE: str = "adaptive"  # legacy, standard ou adaptive
+    S3_MAX_ATTEMPTS: int = 5  # tentatives par appel, appel initial compris
+    S3_CONNECT_TIMEOUT: int = 5  # en secondes
+    S3_READ_TIMEOUT: int = 60  # en secondes
+    S3_PRESIGNED_EXPIRATION: int = 900  # en secondes
+    S3_MAX_UPLOAD_SIZE: int = 20 * 1024 * 1024
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # 5 Mo minimum imposé par S3
+    S3_MULTIPART_CONCURRENCY: int = 4
+    
+    # Déclinaisons des photos de véhicules
+    IMAGE_VARIANT_WIDTHS: List[int] = [320, 640, 1280]
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_PROCESS_WORKERS: int = 2
+    
+    # Véhicules
+    VEHICLE_LIST_FAST_SERIALIZATION: bool = True
+    AVAILABILITY_INDEX_TTL: int = 60  # secondes avant de recharger les calendriers de location
+    SIMILARITY_INDEX_TTL: int = 300  # secondes avant de recharger l'index de similarité
+    
+    # Dossiers
+    DOSSIER_CLAIM_TIMEOUT_MINUTES: int = 30  # au-delà, un dossier réservé peut être repris
+    DOSSIER_CLAIM_MAX_BATCH: int = 50
     
+    # Financement et solvabilité
+    FINANCING_ANNUAL_RATE: float = 0.059  # taux annuel des crédits proposés
+    FINANCING_DEFAULT_DURATION_MONTHS: int = 48
+    FINANCING_MAX_DEBT_TO_INCOME: float = 0.35
+    FINANCING_MIN_DISPOSABLE_INCOME: float = 800.0  # reste à vivre mensuel, en euros
+    FINANCING_SCORING_BATCH_SIZE: int = 10000
+
+    # Devis de location
+    QUOTE_CATALOG_TTL: int = 300  # secondes avant de recharger le catalogue de prix
+    QUOTE_DEFAULT_DURATION_MONTHS: int = 36
+
+    # Facturation mensuelle des locations
+    BILLING_BATCH_SIZE: int = 2000
+    BILLING_WORKERS: int = 4  # processus de calcul des lignes de facture
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
@@ -30,6 +104,24 @@ class Settings(BaseSettings):
     SMTP_PORT: int = 587
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[SecretStr] = None
+    SMTP_FROM: str = "M-Motors <no-reply@m-motors.fr>"
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT: int = 30
+    SMTP_POOL_SIZE: int = 2  # connexions SMTP gardées ouvertes entre deux envois
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_INTERVAL: int = 10  # secondes entre deux lectures de la file
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_RETRY_DELAY: int = 30  # premier délai avant nouvelle tentative, doublé à chaque échec
+    EMAIL_OUTBOX_MAX_RETRY_DELAY: int = 3600
+    
+    # Entretien des véhicules
+    MAINTENANCE_SCHEDULER_ENABLED: bool = True
+    MAINTENANCE_SCAN_INTERVAL: int = 300  # secondes entre deux passages
+    MAINTENANCE_FULL_SCAN_INTERVAL: int = 86400  # un passage complet par jour
+    MAINTENANCE_NOTICE_DAYS: int = 14  # entretiens signalés ce nombre de jours à l'avance
+    MAINTENANCE_DIGEST_SIZE: int = 100  # véhicules par email récapitulatif
+    MAINTENANCE_RECIPIENTS: List[str] = []  # administrateurs actifs si vide
     
     # OpenAI pour le RAG Chat
     OPENAI_API_KEY: Optional[SecretStr] = None
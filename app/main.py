@@ -2,9 +2,13 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import logging
-from .routers import auth_router, vehicles_router, dossiers_router, admin_router, rag_router
+from .routers import auth_router, vehicles_router, dossiers_router, admin_router, quotes_router, rag_router
 from .config import settings
 from .routes import rental_options_router
+from .services.maintenance import maintenance_scheduler
+from .services.mailer import mailer
+from .services.email_outbox import email_outbox
+from .services.password_hasher import password_hasher
 
 # Configuration des logs
 logging.basicConfig(
@@ -26,6 +30,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Middleware pour le logging des requêtes
@@ -48,6 +53,7 @@ app.include_router(auth_router)
 app.include_router(vehicles_router)
 app.include_router(dossiers_router)
 app.include_router(admin_router)
+app.include_router(quotes_router)
 app.include_router(rag_router)
 app.include_router(
     rental_options_router,
@@ -55,6 +61,21 @@ app.include_router(
     tags=["rental-options"]
 )
 
+@app.on_event("startup")
+async def start_background_tasks():
+    """Démarre les tâches planifiées"""
+    if settings.MAINTENANCE_SCHEDULER_ENABLED:
+        maintenance_scheduler.start()
+    if settings.EMAIL_OUTBOX_ENABLED:
+        email_outbox.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await maintenance_scheduler.stop()
+    await email_outbox.stop()
+    mailer.close()
+    password_hasher.close()
+
 @app.get("/")
 async def root():
     """Route racine de l'API"""
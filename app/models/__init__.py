@@ -6,8 +6,12 @@ from .rental_service import RentalService
 from .rental_option import RentalOption
 from .dossier_rental_option import dossier_rental_options
 from .dossier_rental_service import dossier_rental_services
+from .billing import BillingRun, InvoiceLine
+from .email_outbox import EmailOutbox
+from .refresh_token import RefreshToken
 
 __all__ = [
     "User", "Vehicle", "Rental", "Dossier", "RentalService", "RentalOption",
-    "dossier_rental_options", "dossier_rental_services"
+    "dossier_rental_options", "dossier_rental_services", "BillingRun", "InvoiceLine",
+    "EmailOutbox", "RefreshToken"
 ]
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum, UniqueConstraint
+from enum import Enum as PyEnum
+
+from ..database import Base
+from .dossier import utcnow
+
+class BillingRunStatus(str, PyEnum):
+    """Statut d'une facturation mensuelle"""
+    EN_COURS = "EN_COURS"
+    TERMINEE = "TERMINEE"
+    ECHOUEE = "ECHOUEE"
+
+class BillingRun(Base):
+    """Facturation d'un mois, avec le point de reprise en cas d'interruption"""
+    __tablename__ = "billing_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period_start = Column(Date, nullable=False, unique=True)
+    status = Column(Enum(BillingRunStatus), nullable=False, default=BillingRunStatus.EN_COURS)
+
+    # Dernière location facturée : les lots suivants reprennent après cet id
+    last_rental_id = Column(Integer, nullable=False, default=0)
+    rentals_processed = Column(Integer, nullable=False, default=0)
+    lines_created = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+
+    started_at = Column(DateTime(timezone=True), default=utcnow)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+class InvoiceLine(Base):
+    """Montant facturé pour une location, un élément et un mois"""
+    __tablename__ = "invoice_lines"
+    __table_args__ = (
+        # Une ligne n'est jamais facturée deux fois, même si un lot est rejoué
+        UniqueConstraint("rental_id", "period_start", "line_type", "item_id", name="uq_invoice_lines_item_period"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    billing_run_id = Column(Integer, ForeignKey("billing_runs.id"), nullable=False, index=True)
+    rental_id = Column(Integer, ForeignKey("rentals.id"), nullable=False)
+    period_start = Column(Date, nullable=False)
+    line_type = Column(String, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    label = Column(String, nullable=False)
+    monthly_price = Column(Float, nullable=False)
+    amount = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utcnow)
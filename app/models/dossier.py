@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, JSON, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, JSON, Enum, Index, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -28,6 +28,20 @@ def utcnow():
 
 class Dossier(Base):
     __tablename__ = "dossiers"
+    __table_args__ = (
+        # Filtres des files d'attente et listes, paginées par (created_at, id)
+        Index("ix_dossiers_status_created_at", "status", "created_at", "id"),
+        Index("ix_dossiers_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_dossiers_vehicle_id_created_at", "vehicle_id", "created_at", "id"),
+        Index("ix_dossiers_created_at", "created_at", "id"),
+        Index("ix_dossiers_status_risk_score", "status", "risk_score", "id"),
+        # Réservations expirées, reprises par les autres agents
+        Index(
+            "ix_dossiers_claim_expires_at",
+            "claim_expires_at",
+            postgresql_where=text("status = 'EN_COURS_DE_TRAITEMENT'")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -52,12 +66,24 @@ class Dossier(Base):
     # Pour les locations
     desired_loan_duration = Column(Integer, nullable=True)
     
+    # Solvabilité, recalculée lorsque les taux changent
+    monthly_payment = Column(Float, nullable=True)
+    debt_to_income = Column(Float, nullable=True)
+    # Dossiers non évalués : risque maximal jusqu'au prochain recalcul
+    risk_score = Column(Float, nullable=False, default=100.0, server_default='100')
+    scored_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Réservation par un agent du back-office
+    claimed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    claim_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), default=utcnow)
     updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
 
     # Relations
-    user = relationship("User", back_populates="dossiers")
+    user = relationship("User", back_populates="dossiers", foreign_keys=[user_id])
     vehicle = relationship("Vehicle", back_populates="dossiers")
     rental_options = relationship(
         "RentalOption",
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index, text
+from enum import Enum as PyEnum
+
+from ..database import Base
+from .dossier import utcnow
+
+class EmailStatus(str, PyEnum):
+    """Statut d'un email en attente d'envoi"""
+    EN_ATTENTE = "EN_ATTENTE"
+    ENVOYE = "ENVOYE"
+    ECHOUE = "ECHOUE"
+
+class EmailOutbox(Base):
+    """Email enregistré dans la transaction qui le déclenche, envoyé ensuite par le worker"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Emails à envoyer, par date de prochaine tentative
+        Index(
+            "ix_email_outbox_next_attempt_at",
+            "next_attempt_at",
+            postgresql_where=text("status = 'EN_ATTENTE'")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+
+    status = Column(Enum(EmailStatus), nullable=False, default=EmailStatus.EN_ATTENTE)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
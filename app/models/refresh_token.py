@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+
+from ..database import Base
+from .dossier import utcnow
+
+class RefreshToken(Base):
+    """Jeton de renouvellement, à usage unique
+
+    Chaque renouvellement révoque le jeton présenté et en émet un nouveau de la même
+    famille (une famille par connexion). Seul le hash du jeton est conservé.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Version des tokens de l'utilisateur à l'émission (voir User.token_version)
+    token_version = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Enum, Index, func, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
@@ -11,6 +12,9 @@ class RentalStatus(str, PyEnum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+# Locations qui immobilisent le véhicule
+BOOKED_STATUSES = (RentalStatus.PENDING, RentalStatus.ACTIVE)
+
 class Rental(Base):
     __tablename__ = "rentals"
 
@@ -28,6 +32,21 @@ class Rental(Base):
     user = relationship("User", back_populates="rentals")
     vehicle = relationship("Vehicle", back_populates="rentals")
 
+    __table_args__ = (
+        # Deux locations en cours d'un même véhicule ne peuvent pas se chevaucher.
+        # L'index GiST de la contrainte (btree_gist) sert aussi les recherches de disponibilité.
+        ExcludeConstraint(
+            (vehicle_id, "="),
+            (func.tsrange(start_date, end_date, "[)"), "&&"),
+            name="ex_rentals_vehicle_period",
+            using="gist",
+            where=text("status IN ('PENDING', 'ACTIVE')")
+        ),
+        Index("ix_rentals_end_date", end_date),
+        # Facturation des locations actives par lots d'id croissants
+        Index("ix_rentals_status_id", status, id),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -19,12 +19,14 @@ class User(Base):
     country = Column(String, default="France")
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
+    # Incrémentée à la désactivation ou au changement de rôle : invalide les tokens émis
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relations
     rentals = relationship("Rental", back_populates="user")
-    dossiers = relationship("Dossier", back_populates="user")
+    dossiers = relationship("Dossier", back_populates="user", foreign_keys="Dossier.user_id")
 
     def to_dict(self):
         return {
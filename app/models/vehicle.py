@@ -46,11 +46,14 @@ class Vehicle(Base):
     color = Column(String)
     features: Mapped[dict] = mapped_column(JSON)  # équipements
     images: Mapped[List[str]] = mapped_column(JSON)  # URLs des images
+    image_variants: Mapped[dict] = mapped_column(JSON, default=dict, server_default='{}')  # srcset par image et par format
     technical_details: Mapped[dict] = mapped_column(JSON)
     
     # Maintenance
     last_maintenance_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    next_maintenance_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    next_maintenance_date: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
+    # Échéance déjà signalée : un entretien n'est notifié qu'une fois par date
+    maintenance_notified_for: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
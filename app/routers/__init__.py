@@ -2,5 +2,6 @@ from .auth import router as auth_router
 from .vehicles import router as vehicles_router
 from .dossiers import router as dossiers_router
 from .admin import router as admin_router
+from .quotes import router as quotes_router
 
-__all__ = ["auth_router", "vehicles_router", "dossiers_router", "admin_router"] 
\ No newline at end of file
+__all__ = ["auth_router", "vehicles_router", "dossiers_router", "admin_router", "quotes_router"] 
\ No newline at end of file
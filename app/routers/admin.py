@@ -1,31 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func, cast, and_, false, Numeric
 from typing import List, Optional
 from datetime import datetime
 
+from ..config import settings
 from ..database import get_db
 from ..models import User, Dossier, Vehicle, RentalService
-from ..schemas.dossier import DossierStatus, DossierResponse, DossierFilter
+from ..schemas.user import UserAdminUpdate, UserResponse
+from ..schemas.dossier import DossierStatus, DossierResponse, DossierFilter, DossierPagination
+from ..schemas.vehicle import (
+    VehicleFileFormat, VehicleImportReport, VehicleBulkUpdate, VehicleBulkUpdateResult,
+    PriceAdjustmentMode
+)
 from ..schemas.rental_services import (
     ServiceCreate, ServiceUpdate, ServiceResponse,
     ServiceFilter, ServiceStatus
 )
 from ..security import get_current_admin_user
+from ..services.vehicle_import import VehicleImporter, iter_records
+from ..services.vehicle_events import vehicles_changed
+from ..services.vehicle_filters import vehicle_filter_conditions
+from ..services.dossier_access import dossier_query
+from ..services.dossier_queue import (
+    claim_dossiers, clear_claim, extend_claim, holds_claim, release_dossier
+)
+from ..services.solvency import rescore_open_dossiers
+from ..services.quotes import price_catalog
+from ..services.email_outbox import email_outbox, notify_dossier_status
+from ..services.password_hasher import password_hasher
+from ..services.user_cache import user_cache
+from .dossiers import (
+    reload_dossier, paginate_dossiers, dossier_response, dossier_responses
+)
 
 router = APIRouter(prefix="/admin", tags=["Administration"])
 
-@router.patch("/dossiers/{dossier_id}/status", response_model=DossierResponse)
-async def update_dossier_status(
-    dossier_id: int,
-    new_status: DossierStatus = Body(...),
-    admin_comments: Optional[str] = Body(None),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
-):
-    """Mise à jour du statut d'un dossier par un administrateur"""
+async def _get_claimed_dossier(db: AsyncSession, dossier_id: int, current_user: User) -> Dossier:
+    """Récupère et verrouille un dossier ouvert réservé par l'administrateur
+    
+    Le dossier doit être réservé par l'administrateur (POST /admin/dossiers/claim) et la
+    réservation encore valable : un autre agent ne peut pas l'avoir repris entre-temps.
+    """
+    # Verrou jusqu'au commit : la réservation ne peut pas expirer et être reprise entre
+    # la vérification et l'écriture. Les valeurs verrouillées remplacent celles en mémoire.
     result = await db.execute(
-        select(Dossier).where(Dossier.id == dossier_id)
+        dossier_query()
+        .where(Dossier.id == dossier_id)
+        .with_for_update(of=Dossier)
+        .execution_options(populate_existing=True)
     )
     dossier = result.scalar_one_or_none()
     
@@ -41,26 +64,115 @@ async def update_dossier_status(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Le dossier ne peut plus être modifié"
         )
+    if not holds_claim(dossier, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Le dossier n'est pas réservé par vous ou la réservation a expiré"
+        )
+    return dossier
+
+@router.patch("/dossiers/{dossier_id}/status", response_model=DossierResponse)
+async def update_dossier_status(
+    dossier_id: int,
+    new_status: DossierStatus = Body(...),
+    admin_comments: Optional[str] = Body(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Mise à jour du statut d'un dossier par un administrateur, qui doit l'avoir réservé"""
+    dossier = await _get_claimed_dossier(db, dossier_id, current_user)
     
     dossier.status = new_status
     if admin_comments:
         dossier.admin_comments = admin_comments
+    if new_status in (DossierStatus.EN_ATTENTE, DossierStatus.DOCUMENTS_MANQUANTS):
+        # Le dossier quitte le traitement : il reviendra dans la file d'attente
+        clear_claim(dossier)
+    elif new_status != DossierStatus.EN_COURS_DE_TRAITEMENT:
+        # Le traitement est terminé : la réservation ne doit plus être reprise
+        dossier.claim_expires_at = None
+    # Email enregistré dans la même transaction que le changement de statut
+    await notify_dossier_status(db, dossier, admin_comments)
     
     await db.commit()
-    await db.refresh(dossier)
-    return dossier
+    email_outbox.wake()
+    dossier = await reload_dossier(db, dossier.id)
+    return dossier_response(dossier, current_user)
 
 @router.get("/dossiers/pending", response_model=List[DossierResponse])
 async def list_pending_dossiers(
+    response: Response,
+    page: DossierPagination = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Liste les dossiers en attente de traitement, page par page"""
+    dossiers = await paginate_dossiers(
+        db,
+        dossier_query().where(Dossier.status == DossierStatus.EN_ATTENTE),
+        page,
+        response
+    )
+    return dossier_responses(dossiers, current_user)
+
+@router.post("/dossiers/claim", response_model=List[DossierResponse])
+async def claim_pending_dossiers(
+    limit: int = Query(10, ge=1, le=settings.DOSSIER_CLAIM_MAX_BATCH),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Liste tous les dossiers en attente de traitement"""
+    """Réserve les prochains dossiers à traiter pour l'agent connecté
+    
+    Les dossiers passent atomiquement en EN_COURS_DE_TRAITEMENT : deux agents ne
+    reçoivent jamais le même dossier et ne s'attendent pas l'un l'autre.
+    """
+    dossier_ids = await claim_dossiers(db, current_user.id, limit)
+    if not dossier_ids:
+        return []
+    
     result = await db.execute(
-        select(Dossier).where(Dossier.status == DossierStatus.EN_ATTENTE)
+        dossier_query()
+        .where(Dossier.id.in_(dossier_ids))
+        .order_by(Dossier.created_at, Dossier.id)
+        .execution_options(populate_existing=True)
     )
-    dossiers = result.scalars().all()
-    return list(dossiers)
+    return dossier_responses(result.scalars().all(), current_user)
+
+@router.post("/dossiers/rescore", response_model=dict)
+async def rescore_dossiers(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Recalcule la solvabilité de tous les dossiers ouverts, après un changement de taux"""
+    rescored = await rescore_open_dossiers()
+    return {"rescored": rescored}
+
+@router.post("/dossiers/{dossier_id}/claim/extend", response_model=DossierResponse)
+async def extend_dossier_claim(
+    dossier_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Prolonge la réservation d'un dossier en cours de traitement"""
+    if await extend_claim(db, dossier_id, current_user.id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ce dossier n'est pas réservé par vous"
+        )
+    return dossier_response(await reload_dossier(db, dossier_id), current_user)
+
+@router.post("/dossiers/{dossier_id}/release", status_code=status.HTTP_204_NO_CONTENT)
+async def release_dossier_claim(
+    dossier_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Remet un dossier réservé dans la file d'attente"""
+    if not await release_dossier(db, dossier_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ce dossier n'est pas réservé par vous"
+        )
+    return None
 
 @router.post("/dossiers/{dossier_id}/request-documents", response_model=DossierResponse)
 async def request_additional_documents(
@@ -70,42 +182,46 @@ async def request_additional_documents(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Demande de documents supplémentaires"""
-    result = await db.execute(
-        select(Dossier).where(Dossier.id == dossier_id)
-    )
-    dossier = result.scalar_one_or_none()
+    """Demande de documents supplémentaires
     
-    if not dossier:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dossier non trouvé"
-        )
+    Comme pour un changement de statut, le dossier doit être réservé par l'administrateur.
+    Il quitte ensuite la file et y revient quand le client envoie ses documents.
+    """
+    dossier = await _get_claimed_dossier(db, dossier_id, current_user)
     
     # Mettre à jour le statut et ajouter un commentaire
     dossier.status = DossierStatus.DOCUMENTS_MANQUANTS
+    clear_claim(dossier)
     dossier.admin_comments = f"{dossier.admin_comments or ''}\n[{datetime.utcnow()}] Documents requis : {', '.join(document_types)}\nMessage : {message}"
+    await notify_dossier_status(
+        db, dossier, f"Documents à fournir : {', '.join(document_types)}\n\n{message}"
+    )
     
     await db.commit()
-    await db.refresh(dossier)
-    return dossier
+    email_outbox.wake()
+    dossier = await reload_dossier(db, dossier.id)
+    return dossier_response(dossier, current_user)
 
 @router.get("/dossiers/in-progress", response_model=List[DossierResponse])
 async def list_in_progress_dossiers(
+    response: Response,
+    page: DossierPagination = Depends(),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Liste tous les dossiers en cours de traitement"""
-    result = await db.execute(
-        select(Dossier).where(
+    """Liste les dossiers en cours de traitement, page par page"""
+    dossiers = await paginate_dossiers(
+        db,
+        dossier_query().where(
             Dossier.status.in_([
                 DossierStatus.EN_COURS_DE_TRAITEMENT,
                 DossierStatus.DOCUMENTS_MANQUANTS
             ])
-        )
+        ),
+        page,
+        response
     )
-    dossiers = result.scalars().all()
-    return list(dossiers)
+    return dossier_responses(dossiers, current_user)
 
 @router.post("/services", response_model=ServiceResponse, status_code=status.HTTP_201_CREATED)
 async def create_service(
@@ -118,6 +234,7 @@ async def create_service(
     db.add(db_service)
     await db.commit()
     await db.refresh(db_service)
+    price_catalog.invalidate()
     return db_service
 
 @router.get("/services", response_model=List[ServiceResponse])
@@ -184,6 +301,7 @@ async def update_service(
     
     await db.commit()
     await db.refresh(service)
+    price_catalog.invalidate()
     return service
 
 @router.delete("/services/{service_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -206,4 +324,124 @@ async def delete_service(
     
     await db.delete(service)
     await db.commit()
-    return None 
\ No newline at end of file
+    price_catalog.invalidate()
+    return None
+
+@router.post("/vehicles/import", response_model=VehicleImportReport)
+async def import_vehicles(
+    request: Request,
+    format: VehicleFileFormat = VehicleFileFormat.CSV,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Import en masse de véhicules (CSV ou NDJSON) envoyé dans le corps de la requête"""
+    importer = VehicleImporter()
+    return await importer.run(db, iter_records(request.stream(), format))
+
+@router.patch("/vehicles/bulk", response_model=VehicleBulkUpdateResult)
+async def bulk_update_vehicles(
+    bulk_update: VehicleBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Modifie la disponibilité et/ou les prix d'un ensemble de véhicules en une seule requête UPDATE
+    
+    Les véhicules dont un prix ajusté ne serait plus strictement positif ne sont pas modifiés :
+    ils sont listés dans skipped_vehicle_ids.
+    """
+    conditions = []
+    if bulk_update.vehicle_ids is not None:
+        conditions.append(Vehicle.id.in_(bulk_update.vehicle_ids))
+    if bulk_update.filter is not None:
+        conditions.extend(vehicle_filter_conditions(bulk_update.filter))
+    if not conditions and not bulk_update.all:
+        # Filtre dont les critères ne restreignent rien : jamais d'UPDATE sans WHERE implicite
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucun critère de sélection : indiquer all à true pour modifier toute la flotte"
+        )
+    
+    values = {}
+    if bulk_update.is_available_for_sale is not None:
+        values["is_available_for_sale"] = bulk_update.is_available_for_sale
+    if bulk_update.is_available_for_rent is not None:
+        values["is_available_for_rent"] = bulk_update.is_available_for_rent
+    
+    price_conditions = []
+    for adjustment in bulk_update.price_adjustments:
+        column = getattr(Vehicle, adjustment.field.value)
+        if adjustment.mode == PriceAdjustmentMode.PERCENTAGE:
+            new_price = column * (1 + adjustment.value / 100)
+        else:
+            new_price = column + adjustment.value
+        new_price = func.round(cast(new_price, Numeric), 2)
+        values[adjustment.field.value] = new_price
+        price_conditions.append(new_price > 0)
+    
+    skipped_ids = []
+    if price_conditions:
+        # Évalué avant l'UPDATE, sur les prix actuels ; un prix absent n'est pas modifiable non plus
+        result = await db.execute(
+            select(Vehicle.id)
+            .where(*conditions, ~func.coalesce(and_(*price_conditions), false()))
+            .order_by(Vehicle.id)
+        )
+        skipped_ids = list(result.scalars().all())
+    
+    result = await db.execute(
+        update(Vehicle)
+        .where(*conditions, *price_conditions)
+        .values(**values)
+        .returning(Vehicle.id)
+        .execution_options(synchronize_session=False)
+    )
+    vehicle_ids = list(result.scalars().all())
+    await db.commit()
+    
+    vehicles_changed(vehicle_ids)
+    return {
+        "updated": len(vehicle_ids),
+        "vehicle_ids": vehicle_ids,
+        "skipped": len(skipped_ids),
+        "skipped_vehicle_ids": skipped_ids
+    }
+
+@router.patch("/users/{user_id}", response_model=UserResponse)
+async def update_user(
+    user_id: int,
+    user_update: UserAdminUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Active, désactive ou change le rôle d'un utilisateur
+    
+    Tout changement invalide les tokens déjà émis : l'utilisateur doit se reconnecter.
+    """
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Utilisateur non trouvé"
+        )
+    
+    changes = {
+        field: value for field, value in user_update.model_dump(exclude_none=True).items()
+        if getattr(user, field) != value
+    }
+    if not changes:
+        return user
+    
+    previous_version = user.token_version
+    for field, value in changes.items():
+        setattr(user, field, value)
+    user.token_version = previous_version + 1
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user.email, previous_version)
+    return user
+
+@router.get("/metrics/password-hashing", response_model=dict)
+async def password_hashing_metrics(current_user: User = Depends(get_current_admin_user)):
+    """File de calcul des mots de passe : calculs en cours, en attente, refusés et temps d'attente"""
+    return password_hasher.stats()
@@ -1,19 +1,41 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
-from ..schemas import UserCreate, UserResponse, Token
+from ..schemas import UserCreate, UserResponse, Token, RefreshRequest
 from ..models.user import User
 from ..security import (
-    authenticate_user, create_access_token, get_password_hash,
-    get_current_active_user, verify_password
+    authenticate_user, create_access_token, get_password_hash_async,
+    get_current_active_user, get_current_user, verify_password_async, enforce_rate_limit,
+    oauth2_scheme, schedule_password_rehash
 )
+from ..services.refresh_tokens import issue_refresh_token, revoke_family, rotate_refresh_token
+from ..services.token_revocation import token_revocations
+from ..services.rate_limiter import client_ip
+from ..services.password_hasher import PasswordHasherBusy
 from ..config import settings
 from sqlalchemy import select
+from jose import jwt
 
 router = APIRouter(prefix="/auth", tags=["Authentification"])
 
+def hasher_busy() -> HTTPException:
+    """Réponse quand la file de calcul des mots de passe est saturée"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Service momentanément surchargé, veuillez réessayer",
+        headers={"Retry-After": "1"},
+    )
+
+def token_response(user: User, refresh_token: str, family_id: str) -> dict:
+    """Token d'accès rattaché à la connexion (sid), avec son jeton de renouvellement"""
+    access_token = create_access_token(
+        data={"sub": user.email, "is_admin": user.is_admin, "ver": user.token_version, "sid": family_id},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
 @router.post("/register", response_model=UserResponse)
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Inscription d'un nouvel utilisateur"""
@@ -25,10 +47,15 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             detail="Cet email est déjà utilisé"
         )
     
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+
     # Créer le nouvel utilisateur
     db_user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         phone_number=user_data.phone_number,
@@ -44,7 +71,12 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     await db.refresh(db_user)
     return db_user
 
-@router.post("/login", response_model=Token)
+async def limit_login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()) -> None:
+    """Limite les tentatives de connexion par IP et par compte, avant toute requête en base"""
+    # L'IP d'abord : un client déjà limité ne consomme plus les essais du compte visé
+    await enforce_rate_limit("login", ip=client_ip(request), account=form_data.username.lower())
+
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_login)])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
@@ -65,22 +97,23 @@ async def login(
             )
             
         # Vérifier le mot de passe
-        if not verify_password(form_data.password, user.hashed_password):
+        if not await verify_password_async(form_data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email ou mot de passe incorrect",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        schedule_password_rehash(user, form_data.password)
         
-        # Créer le token
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.email, "is_admin": user.is_admin},
-            expires_delta=access_token_expires
-        )
-        
-        return {"access_token": access_token, "token_type": "bearer"}
+        # Créer les tokens : chaque connexion ouvre une famille de jetons de renouvellement
+        refresh_token, family_id = issue_refresh_token(db, user)
+        await db.commit()
+        return token_response(user, refresh_token, family_id)
         
+    except HTTPException:
+        raise
+    except PasswordHasherBusy:
+        raise hasher_busy()
     except Exception as e:
         print(f"Erreur lors de la connexion: {str(e)}")  # Log l'erreur
         raise HTTPException(
@@ -88,6 +121,34 @@ async def login(
             detail=f"Erreur lors de la connexion: {str(e)}"
         )
 
+@router.post("/refresh", response_model=Token)
+async def refresh(refresh_request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """Renouvelle le token d'accès sans mot de passe ; le jeton présenté est remplacé"""
+    result = await rotate_refresh_token(db, refresh_request.refresh_token)
+    await db.commit()
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Jeton de renouvellement invalide ou expiré",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_response(result.user, result.refresh_token, result.family_id)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Déconnexion : révoque immédiatement le token d'accès et les jetons de renouvellement"""
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if payload.get("sid"):
+        await revoke_family(db, payload["sid"])
+        await db.commit()
+    elif payload.get("jti"):
+        await token_revocations.revoke(payload["jti"], settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 @router.get("/me", response_model=UserResponse)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     """Récupère les informations de l'utilisateur connecté"""
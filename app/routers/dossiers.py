@@ -1,20 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Path, Request, Response
+from botocore.exceptions import ClientError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from typing import List, Optional
+from sqlalchemy import select, update, and_, cast, func, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Any, AsyncIterator, Iterable, List, Optional, Tuple
 from datetime import datetime
+from urllib.parse import quote, unquote
+import asyncio
+import base64
+import binascii
 import json
+import orjson
 
+from ..config import settings
 from ..database import get_db
 from ..models import User, Dossier, Vehicle, RentalService, dossier_rental_services
+from ..models.dossier import utcnow
 from ..schemas import (
     DossierCreate, DossierResponse, DossierUpdate, 
-    DossierFilter, Document, DossierStatus, DossierType, ServiceStatus
+    DossierFilter, Document, DossierStatus, DossierType, ServiceStatus,
+    DocumentUploadInit, UploadedPart, DocumentUpload,
+    DossierPagination, DossierSort
 )
 from ..security import get_current_active_user, get_current_admin_user
+from ..services.dossier_access import dossier_query, get_user_dossier
+from ..services.dossier_queue import requeue_dossier
+from ..services.s3 import s3_service
+from ..services.signed_urls import signed_urls
+from ..services.solvency import score_dossier
 
 router = APIRouter(prefix="/dossiers", tags=["Dossiers"])
 
+# Taille des blocs lus depuis le fichier reçu
+DOCUMENT_READ_CHUNK_SIZE = 1024 * 1024
+# Identifiant d'un document : uuid suivi de l'extension d'origine
+DOCUMENT_ID_PATTERN = r"^[0-9a-f-]{36}(\.[A-Za-z0-9]{1,10})?$"
+# Nombre de fichiers acceptés par un envoi groupé
+MAX_DOCUMENTS_PER_REQUEST = 10
+# Champs dont la modification impose de recalculer la solvabilité
+SCORED_FIELDS = {
+    "monthly_income", "current_loans_monthly_payments", "employment_contract_type",
+    "employment_start_date", "desired_loan_duration"
+}
+# En-tête portant le curseur de la page suivante
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+async def reload_dossier(db: AsyncSession, dossier_id: int) -> Dossier:
+    """Relit un dossier après écriture, relations comprises"""
+    result = await db.execute(
+        dossier_query()
+        .where(Dossier.id == dossier_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+# Colonne de tri et sens croissant pour chaque option, départagées par l'id
+_SORTS = {
+    DossierSort.OLDEST: (Dossier.created_at, True),
+    DossierSort.NEWEST: (Dossier.created_at, False),
+    DossierSort.LOWEST_RISK: (Dossier.risk_score, True),
+    DossierSort.HIGHEST_RISK: (Dossier.risk_score, False),
+}
+
+def _encode_cursor(value: Any, dossier_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(orjson.dumps([value, dossier_id])).decode()
+
+def _decode_cursor(cursor: str, column) -> Tuple[Any, int]:
+    try:
+        value, dossier_id = orjson.loads(base64.urlsafe_b64decode(cursor))
+        value = datetime.fromisoformat(value) if column is Dossier.created_at else float(value)
+        return value, int(dossier_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide"
+        )
+
+async def paginate_dossiers(
+    db: AsyncSession,
+    query,
+    page: DossierPagination,
+    response: Response
+) -> List[Dossier]:
+    """Exécute une requête de dossiers page par page
+    
+    La pagination par clé (colonne de tri, id) s'appuie sur les index composites : le coût
+    d'une page ne dépend pas de sa position, contrairement à un OFFSET. Le curseur de
+    la page suivante est renvoyé dans l'en-tête X-Next-Cursor. Sans cursor ni limit,
+    tous les dossiers sont renvoyés, triés de la même façon.
+    """
+    column, ascending = _SORTS[page.sort]
+    sort_key = tuple_(column, Dossier.id)
+    if page.cursor:
+        position = tuple_(*_decode_cursor(page.cursor, column))
+        query = query.where(sort_key > position if ascending else sort_key < position)
+    
+    if ascending:
+        query = query.order_by(column.asc(), Dossier.id.asc())
+    else:
+        query = query.order_by(column.desc(), Dossier.id.desc())
+    
+    page_size = page.page_size
+    if page_size is None:
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    result = await db.execute(query.limit(page_size + 1))
+    dossiers = result.scalars().all()
+    if len(dossiers) > page_size:
+        dossiers = dossiers[:page_size]
+        last = dossiers[-1]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(getattr(last, column.key), last.id)
+    return dossiers
+
+def dossier_response(dossier: Dossier, current_user: User) -> DossierResponse:
+    """Réponse d'un dossier, avec des URLs signées et temporaires pour ses documents"""
+    # Le dossier ORM n'est pas modifié : seules les URLs de la réponse sont remplacées
+    response = DossierResponse.model_validate(dossier)
+    response.documents = signed_urls.sign_documents(response.documents, current_user.id)
+    return response
+
+def dossier_responses(dossiers: Iterable[Dossier], current_user: User) -> List[DossierResponse]:
+    return [dossier_response(dossier, current_user) for dossier in dossiers]
+
 @router.post("/", response_model=DossierResponse, status_code=status.HTTP_201_CREATED)
 async def create_dossier(
     dossier: DossierCreate,
@@ -31,7 +141,8 @@ async def create_dossier(
             )
         )
     )
-    if not vehicle.scalar_one_or_none():
+    vehicle = vehicle.scalar_one_or_none()
+    if not vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Véhicule non trouvé ou non disponible pour ce type de transaction"
@@ -61,20 +172,23 @@ async def create_dossier(
         user_id=current_user.id,
         **dossier.model_dump()
     )
+    score_dossier(db_dossier, vehicle)
     
     db.add(db_dossier)
     await db.commit()
-    await db.refresh(db_dossier)
-    return db_dossier
+    db_dossier = await reload_dossier(db, db_dossier.id)
+    return dossier_response(db_dossier, current_user)
 
 @router.get("/", response_model=List[DossierResponse])
 async def list_dossiers(
+    response: Response,
     filter: DossierFilter = Depends(),
+    page: DossierPagination = Depends(),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Liste tous les dossiers (admin uniquement)"""
-    query = select(Dossier)
+    """Liste les dossiers, page par page (admin uniquement)"""
+    query = dossier_query()
     
     if filter.type:
         query = query.where(Dossier.type == filter.type)
@@ -89,23 +203,25 @@ async def list_dossiers(
     if filter.created_before:
         query = query.where(Dossier.created_at <= filter.created_before)
     
-    result = await db.execute(query)
-    return result.scalars().all()
+    dossiers = await paginate_dossiers(db, query, page, response)
+    return dossier_responses(dossiers, current_user)
 
 @router.get("/me", response_model=List[DossierResponse])
 async def list_my_dossiers(
+    response: Response,
     status: Optional[DossierStatus] = None,
+    page: DossierPagination = Depends(),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Liste les dossiers de l'utilisateur connecté"""
-    query = select(Dossier).where(Dossier.user_id == current_user.id)
+    """Liste les dossiers de l'utilisateur connecté, page par page"""
+    query = dossier_query().where(Dossier.user_id == current_user.id)
     
     if status:
         query = query.where(Dossier.status == status.value)
     
-    result = await db.execute(query)
-    return result.scalars().all()
+    dossiers = await paginate_dossiers(db, query, page, response)
+    return dossier_responses(dossiers, current_user)
 
 @router.get("/{dossier_id}", response_model=DossierResponse)
 async def get_dossier(
@@ -114,7 +230,7 @@ async def get_dossier(
     current_user: User = Depends(get_current_active_user)
 ):
     """Récupère les détails d'un dossier"""
-    query = select(Dossier).where(Dossier.id == dossier_id)
+    query = dossier_query().where(Dossier.id == dossier_id)
     
     if not current_user.is_admin:
         query = query.where(Dossier.user_id == current_user.id)
@@ -127,7 +243,7 @@ async def get_dossier(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dossier non trouvé"
         )
-    return dossier
+    return dossier_response(dossier, current_user)
 
 @router.patch("/{dossier_id}", response_model=DossierResponse)
 async def update_dossier(
@@ -137,7 +253,7 @@ async def update_dossier(
     current_user: User = Depends(get_current_active_user)
 ):
     """Met à jour un dossier"""
-    query = select(Dossier).where(Dossier.id == dossier_id)
+    query = dossier_query().where(Dossier.id == dossier_id)
     
     if not current_user.is_admin:
         query = query.where(Dossier.user_id == current_user.id)
@@ -166,18 +282,101 @@ async def update_dossier(
     
     # Mise à jour des champs autorisés
     update_data = dossier_update.model_dump(exclude_unset=True)
+    # Le statut ne change que par /admin/dossiers/{id}/status : réservation vérifiée,
+    # verrou et email au client
+    update_data.pop('status', None)
     if not current_user.is_admin:
         # Supprimer les champs réservés aux admins
-        update_data.pop('status', None)
         update_data.pop('admin_comments', None)
     
     for field, value in update_data.items():
         setattr(dossier, field, value)
     
+    # Les données financières ont changé : le score est recalculé
+    if update_data.keys() & SCORED_FIELDS:
+        vehicle = await db.get(Vehicle, dossier.vehicle_id)
+        if vehicle:
+            score_dossier(dossier, vehicle)
+    
     await db.commit()
-    await db.refresh(dossier)
+    dossier = await reload_dossier(db, dossier.id)
+    return dossier_response(dossier, current_user)
+
+async def _get_dossier_or_404(dossier_id: int, db: AsyncSession, current_user: User) -> Dossier:
+    """Récupère un dossier accessible à l'utilisateur"""
+    dossier = await get_user_dossier(db, dossier_id, current_user)
+    if not dossier:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dossier non trouvé"
+        )
     return dossier
 
+def _document_prefix(dossier_id: int) -> str:
+    return f"{settings.S3_DOCUMENTS_PREFIX}dossiers/{dossier_id}/"
+
+async def _iter_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    """Lit le fichier reçu bloc par bloc"""
+    while chunk := await file.read(DOCUMENT_READ_CHUNK_SIZE):
+        yield chunk
+
+async def _upload_document(
+    dossier_id: int,
+    file: UploadFile,
+    document_type: str,
+    semaphore: Optional[asyncio.Semaphore] = None
+) -> Document:
+    """Transmet un fichier reçu à S3 par parties, au fil de la lecture"""
+    key = s3_service.build_key(_document_prefix(dossier_id), file.filename)
+    content_type = file.content_type or "application/octet-stream"
+    size = await s3_service.upload_stream(_iter_upload(file), key, content_type, semaphore=semaphore)
+    return _new_document(key, file.filename, document_type, content_type, size)
+
+async def append_documents(db: AsyncSession, dossier_id: int, documents: List[Document]) -> Dossier:
+    """Ajoute des documents à la liste du dossier
+    
+    La concaténation JSONB est faite par PostgreSQL dans un seul UPDATE : la liste
+    existante n'est ni relue ni réécrite, et deux uploads simultanés ne s'écrasent pas.
+    Un dossier en attente de documents revient dans la file des agents.
+    """
+    payload = cast([document.model_dump(mode="json") for document in documents], JSONB)
+    await db.execute(
+        update(Dossier)
+        .where(Dossier.id == dossier_id)
+        .values(
+            documents=func.coalesce(Dossier.documents, cast([], JSONB)).op("||")(payload),
+            updated_at=utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await requeue_dossier(db, dossier_id)
+    await db.commit()
+    return await reload_dossier(db, dossier_id)
+
+def _new_document(key: str, name: str, document_type: str, content_type: Optional[str], size: Optional[int]) -> Document:
+    return Document(
+        id=key.rsplit("/", 1)[-1],
+        name=name,
+        type=document_type,
+        url=s3_service.get_url(key),
+        uploaded_at=datetime.utcnow(),
+        status="en_attente",
+        key=key,
+        content_type=content_type,
+        size=size
+    )
+
+def _upload_error(e: ClientError) -> HTTPException:
+    if e.response.get("Error", {}).get("Code") == "NoSuchUpload":
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload non trouvé ou expiré"
+        )
+    return HTTPException(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        detail="Erreur du stockage de documents"
+    )
+
 @router.post("/{dossier_id}/documents", response_model=DossierResponse)
 async def add_document(
     dossier_id: int,
@@ -186,39 +385,202 @@ async def add_document(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Ajoute un document à un dossier"""
-    # Vérifier l'accès au dossier
-    query = select(Dossier).where(Dossier.id == dossier_id)
-    if not current_user.is_admin:
-        query = query.where(Dossier.user_id == current_user.id)
+    """Ajoute un document à un dossier
     
-    result = await db.execute(query)
-    dossier = result.scalar_one_or_none()
+    Le fichier est transmis à S3 par parties au fil de la lecture : les gros scans PDF
+    ne sont jamais chargés entièrement en mémoire.
+    """
+    await _get_dossier_or_404(dossier_id, db, current_user)
     
-    if not dossier:
+    try:
+        new_document = await _upload_document(dossier_id, file, document_type)
+    except ClientError as e:
+        raise _upload_error(e)
+    
+    return dossier_response(await append_documents(db, dossier_id, [new_document]), current_user)
+
+@router.post("/{dossier_id}/documents/batch", response_model=DossierResponse)
+async def add_documents(
+    dossier_id: int,
+    files: List[UploadFile] = File(...),
+    document_types: List[str] = Form(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Ajoute plusieurs documents à un dossier en une seule requête
+    
+    Chaque fichier a son type, dans le même ordre. Les fichiers sont envoyés à S3 en
+    parallèle puis ajoutés ensemble au dossier ; si l'un échoue, aucun n'est ajouté.
+    Les parties de tous les fichiers partagent S3_MULTIPART_CONCURRENCY places : la
+    mémoire tampon d'une requête ne dépend pas du nombre de fichiers.
+    """
+    if len(document_types) != len(files):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dossier non trouvé"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Un type de document est attendu pour chaque fichier"
+        )
+    if len(files) > MAX_DOCUMENTS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{MAX_DOCUMENTS_PER_REQUEST} documents au plus par requête"
         )
+    await _get_dossier_or_404(dossier_id, db, current_user)
     
-    # TODO: Implémenter le stockage du fichier sur S3
-    # Pour l'instant, on simule l'ajout du document
-    new_document = Document(
-        name=file.filename,
-        type=document_type,
-        url=f"https://example.com/{file.filename}",
-        uploaded_at=datetime.utcnow(),
-        status="en_attente"
+    semaphore = asyncio.Semaphore(settings.S3_MULTIPART_CONCURRENCY)
+    results = await asyncio.gather(
+        *(
+            _upload_document(dossier_id, file, document_type, semaphore)
+            for file, document_type in zip(files, document_types)
+        ),
+        return_exceptions=True
     )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        uploaded = [r.url for r in results if isinstance(r, Document)]
+        if uploaded:
+            await s3_service.delete_files(uploaded)
+        if isinstance(errors[0], ClientError):
+            raise _upload_error(errors[0])
+        raise errors[0]
+    
+    return dossier_response(await append_documents(db, dossier_id, results), current_user)
+
+@router.post("/{dossier_id}/documents/uploads", response_model=DocumentUpload, status_code=status.HTTP_201_CREATED)
+async def start_document_upload(
+    dossier_id: int,
+    upload: DocumentUploadInit,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Démarre un upload multipart : le client envoie ensuite les parties, en parallèle s'il le souhaite"""
+    await _get_dossier_or_404(dossier_id, db, current_user)
     
-    # Mettre à jour la liste des documents
-    documents = dossier.documents or []
-    documents.append(new_document.model_dump())
-    dossier.documents = documents
+    key = s3_service.build_key(_document_prefix(dossier_id), upload.filename)
+    try:
+        upload_id = await s3_service.create_multipart_upload(
+            key,
+            upload.content_type,
+            metadata={
+                "filename": quote(upload.filename),
+                "document-type": quote(upload.document_type)
+            }
+        )
+    except ClientError as e:
+        raise _upload_error(e)
     
-    await db.commit()
-    await db.refresh(dossier)
-    return dossier
+    return DocumentUpload(
+        document_id=key.rsplit("/", 1)[-1],
+        upload_id=upload_id,
+        part_size=settings.S3_MULTIPART_PART_SIZE
+    )
+
+@router.put("/{dossier_id}/documents/uploads/{document_id}/parts/{part_number}", response_model=UploadedPart)
+async def upload_document_part(
+    dossier_id: int,
+    request: Request,
+    upload_id: str,
+    document_id: str = Path(..., pattern=DOCUMENT_ID_PATTERN),
+    part_number: int = Path(..., ge=1, le=10000),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Envoie une partie d'un document ; une partie en échec peut être renvoyée seule"""
+    await _get_dossier_or_404(dossier_id, db, current_user)
+    
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.S3_MULTIPART_PART_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Une partie ne peut dépasser {settings.S3_MULTIPART_PART_SIZE} octets"
+            )
+    if not body:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Partie vide"
+        )
+    
+    try:
+        part = await s3_service.upload_part(
+            _document_prefix(dossier_id) + document_id, upload_id, part_number, bytes(body)
+        )
+    except ClientError as e:
+        raise _upload_error(e)
+    
+    return UploadedPart(part_number=part_number, etag=part["ETag"], size=len(body))
+
+@router.get("/{dossier_id}/documents/uploads/{document_id}", response_model=DocumentUpload)
+async def get_document_upload(
+    dossier_id: int,
+    upload_id: str,
+    document_id: str = Path(..., pattern=DOCUMENT_ID_PATTERN),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Liste les parties déjà reçues, pour reprendre un upload interrompu"""
+    await _get_dossier_or_404(dossier_id, db, current_user)
+    
+    try:
+        parts = await s3_service.list_parts(_document_prefix(dossier_id) + document_id, upload_id)
+    except ClientError as e:
+        raise _upload_error(e)
+    
+    return DocumentUpload(
+        document_id=document_id,
+        upload_id=upload_id,
+        part_size=settings.S3_MULTIPART_PART_SIZE,
+        parts=[
+            UploadedPart(part_number=p["PartNumber"], etag=p["ETag"], size=p["Size"])
+            for p in parts
+        ]
+    )
+
+@router.post("/{dossier_id}/documents/uploads/{document_id}/complete", response_model=DossierResponse)
+async def complete_document_upload(
+    dossier_id: int,
+    upload_id: str,
+    document_id: str = Path(..., pattern=DOCUMENT_ID_PATTERN),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Assemble les parties reçues et ajoute le document au dossier"""
+    await _get_dossier_or_404(dossier_id, db, current_user)
+    
+    key = _document_prefix(dossier_id) + document_id
+    try:
+        parts = await s3_service.list_parts(key, upload_id)
+        if not parts:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Aucune partie reçue pour cet upload"
+            )
+        await s3_service.complete_multipart_upload(key, upload_id, parts)
+        metadata = await s3_service.get_object_metadata(key)
+    except ClientError as e:
+        raise _upload_error(e)
+    
+    new_document = _new_document(
+        key,
+        unquote(metadata["Metadata"].get("filename", document_id)),
+        unquote(metadata["Metadata"].get("document-type", "autre")),
+        metadata.get("ContentType"),
+        metadata.get("ContentLength")
+    )
+    return dossier_response(await append_documents(db, dossier_id, [new_document]), current_user)
+
+@router.delete("/{dossier_id}/documents/uploads/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_document_upload(
+    dossier_id: int,
+    upload_id: str,
+    document_id: str = Path(..., pattern=DOCUMENT_ID_PATTERN),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Abandonne un upload multipart et supprime les parties déjà reçues"""
+    await _get_dossier_or_404(dossier_id, db, current_user)
+    await s3_service.abort_multipart_upload(_document_prefix(dossier_id) + document_id, upload_id)
+    return None
 
 @router.delete("/{dossier_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def cancel_dossier(
@@ -284,4 +646,5 @@ async def add_service_to_dossier(
     await db.execute(stmt)
     await db.commit()
     
-    return dossier 
\ No newline at end of file
+    dossier = await reload_dossier(db, dossier_id)
+    return dossier_response(dossier, current_user) 
\ No newline at end of file
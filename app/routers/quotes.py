@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+
+from ..config import settings
+from ..database import get_db
+from ..models import User
+from ..schemas import DossierType, Quote, QuoteBasket
+from ..security import get_current_active_user
+from ..services.dossier_access import get_user_dossier
+from ..services.quotes import VehicleNotInCatalog, price_catalog
+
+router = APIRouter(prefix="/quotes", tags=["Devis"])
+
+@router.post("/", response_model=Quote)
+async def quote_basket(
+    basket: QuoteBasket,
+    db: AsyncSession = Depends(get_db)
+):
+    """Calcule le coût mensuel d'une configuration du véhicule, depuis le catalogue en mémoire"""
+    await price_catalog.refresh(db)
+
+    vehicle = price_catalog.vehicles.get(basket.vehicle_id)
+    if not vehicle or not vehicle.is_available_for_rent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Véhicule non trouvé ou non disponible à la location"
+        )
+
+    unknown_options = set(basket.option_ids) - price_catalog.options.keys()
+    if unknown_options:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Options inconnues : {sorted(unknown_options)}"
+        )
+    unknown_services = set(basket.service_ids) - price_catalog.services.keys()
+    if unknown_services:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Services inconnus ou inactifs : {sorted(unknown_services)}"
+        )
+
+    return price_catalog.quote_basket(
+        vehicle,
+        basket.option_ids,
+        basket.service_ids,
+        basket.start_date or date.today(),
+        basket.duration_months or settings.QUOTE_DEFAULT_DURATION_MONTHS
+    )
+
+@router.get("/dossiers/{dossier_id}", response_model=Quote)
+async def quote_dossier(
+    dossier_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Calcule le coût mensuel d'un dossier de location"""
+    dossier = await get_user_dossier(db, dossier_id, current_user)
+    if not dossier:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dossier non trouvé"
+        )
+    if dossier.type != DossierType.LOCATION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Le devis n'est disponible que pour les dossiers de location"
+        )
+    try:
+        return await price_catalog.quote_dossier(db, dossier)
+    except VehicleNotInCatalog:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Le véhicule du dossier n'existe plus"
+        )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any, Optional
@@ -14,7 +14,8 @@ from ..schemas.chat import (
 )
 from ..models.chat import Document, ChatSession
 from ..services.rag_service import RAGService
-from ..security import get_current_user
+from ..security import get_current_user, enforce_rate_limit
+from ..services.rate_limiter import client_ip
 from sqlalchemy import select
 
 logger = logging.getLogger(__name__)
@@ -172,9 +173,12 @@ async def get_chat_session(
 @rag_router.post("/guest/chat", response_model=ChatResponse)
 async def guest_chat(
     chat_request: ChatRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """Endpoint pour les utilisateurs non authentifiés (invités)"""
+    # Chaque message coûte un appel au modèle : limite vérifiée avant tout traitement
+    await enforce_rate_limit("guest_chat", ip=client_ip(request), session=chat_request.session_id)
     try:
         response = await rag_service.generate_response(db, chat_request)
         return response
@@ -1,20 +1,33 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from typing import AsyncIterator, List
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..database import get_db
+from ..database import get_db, async_session_maker
 from ..models.vehicle import Vehicle
 from ..schemas.vehicle import (
     VehicleCreate, VehicleResponse, VehicleUpdate,
-    VehicleFilter
+    VehicleFilter, VehicleFileFormat, RentalPeriod, VehicleAvailability,
+    ImageUploadRequest, PresignedUpload, ImageUploadComplete
 )
 from ..security import get_current_active_user, get_current_admin_user
 from ..models.user import User
 from ..services.s3 import s3_service
+from ..services.image_pipeline import image_pipeline, variant_urls
+from ..services.vehicle_serializer import (
+    select_vehicle_rows, vehicle_rows_response,
+    encode_ndjson_rows, encode_csv_header, encode_csv_rows
+)
+from ..services.vehicle_events import vehicles_changed
+from ..services.vehicle_similarity import similarity_index
+from ..services.availability import naive_utc, select_free_vehicles, is_vehicle_free
+from ..services.vehicle_filters import vehicle_filter_conditions
 from ..config import settings
 
 router = APIRouter(prefix="/vehicles", tags=["Véhicules"])
 
+EXPORT_BATCH_SIZE = 1000
+
 @router.post("/", response_model=VehicleResponse, status_code=status.HTTP_201_CREATED)
 async def create_vehicle(
     vehicle: VehicleCreate,
@@ -26,6 +39,7 @@ async def create_vehicle(
     db.add(db_vehicle)
     await db.commit()
     await db.refresh(db_vehicle)
+    vehicles_changed([db_vehicle.id])
     return db_vehicle
 
 @router.get("/", response_model=List[VehicleResponse])
@@ -34,30 +48,63 @@ async def list_vehicles(
     db: AsyncSession = Depends(get_db)
 ):
     """Liste tous les véhicules avec filtres optionnels"""
-    query = select(Vehicle)
-    
-    if filter.brand:
-        query = query.where(Vehicle.brand.ilike(f"%{filter.brand}%"))
-    if filter.model:
-        query = query.where(Vehicle.model.ilike(f"%{filter.model}%"))
-    if filter.min_year:
-        query = query.where(Vehicle.year >= filter.min_year)
-    if filter.max_year:
-        query = query.where(Vehicle.year <= filter.max_year)
-    if filter.min_price:
-        query = query.where(Vehicle.price >= filter.min_price)
-    if filter.max_price:
-        query = query.where(Vehicle.price <= filter.max_price)
-    if filter.fuel_type:
-        query = query.where(Vehicle.fuel_type == filter.fuel_type)
-    if filter.transmission:
-        query = query.where(Vehicle.transmission == filter.transmission)
-    if filter.available_for_sale is not None:
-        query = query.where(Vehicle.is_available_for_sale == filter.available_for_sale)
-    if filter.available_for_rent is not None:
-        query = query.where(Vehicle.is_available_for_rent == filter.available_for_rent)
-    
-    result = await db.execute(query)
+    conditions = vehicle_filter_conditions(filter)
+    
+    # Chemin rapide : tuples de colonnes encodés directement avec orjson,
+    # sans validation Pydantic ligne par ligne
+    if settings.VEHICLE_LIST_FAST_SERIALIZATION:
+        result = await db.execute(select_vehicle_rows().where(*conditions))
+        return vehicle_rows_response(result.all())
+    
+    result = await db.execute(select(Vehicle).where(*conditions))
+    return result.scalars().all()
+
+async def _export_vehicles(format: VehicleFileFormat) -> AsyncIterator[bytes]:
+    """Produit l'export par lots à partir d'un curseur côté serveur"""
+    if format == VehicleFileFormat.CSV:
+        yield encode_csv_header()
+    encode = encode_csv_rows if format == VehicleFileFormat.CSV else encode_ndjson_rows
+    
+    # Session dédiée : celle de get_db est fermée avant la fin du streaming
+    async with async_session_maker() as session:
+        result = await session.stream(
+            select_vehicle_rows()
+            .order_by(Vehicle.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield encode(rows)
+
+@router.get("/export")
+async def export_vehicles(
+    format: VehicleFileFormat = VehicleFileFormat.NDJSON,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exporte tout le catalogue en NDJSON ou CSV, en streaming"""
+    media_type = "text/csv" if format == VehicleFileFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        _export_vehicles(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="vehicles.{format.value}"'}
+    )
+
+def _check_period(period: RentalPeriod) -> None:
+    if period.end <= period.start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La date de fin doit être postérieure à la date de début"
+        )
+
+@router.get("/available", response_model=List[VehicleResponse])
+async def list_available_vehicles(
+    period: RentalPeriod = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    """Liste les véhicules à louer libres sur toute la période demandée"""
+    _check_period(period)
+    result = await db.execute(
+        select_free_vehicles(naive_utc(period.start), naive_utc(period.end)).order_by(Vehicle.id)
+    )
     return result.scalars().all()
 
 @router.get("/{vehicle_id}", response_model=VehicleResponse)
@@ -73,6 +120,42 @@ async def get_vehicle(vehicle_id: int, db: AsyncSession = Depends(get_db)):
         )
     return vehicle
 
+@router.get("/{vehicle_id}/similar", response_model=List[VehicleResponse])
+async def list_similar_vehicles(
+    vehicle_id: int,
+    k: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Liste les k véhicules disponibles les plus similaires à un véhicule"""
+    if not await similarity_index.ensure(db, vehicle_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Véhicule non trouvé"
+        )
+    
+    similar_ids = similarity_index.most_similar(vehicle_id, k)
+    if not similar_ids:
+        return vehicle_rows_response([])
+    
+    result = await db.execute(select_vehicle_rows().where(Vehicle.id.in_(similar_ids)))
+    rows = {row.id: row for row in result.all()}
+    return vehicle_rows_response(rows[i] for i in similar_ids if i in rows)
+
+@router.get("/{vehicle_id}/availability", response_model=VehicleAvailability)
+async def get_vehicle_availability(
+    vehicle_id: int,
+    period: RentalPeriod = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    """Indique si un véhicule est libre sur une période, sans requête pour les périodes à venir"""
+    _check_period(period)
+    return VehicleAvailability(
+        vehicle_id=vehicle_id,
+        start=period.start,
+        end=period.end,
+        available=await is_vehicle_free(db, vehicle_id, period.start, period.end)
+    )
+
 @router.patch("/{vehicle_id}", response_model=VehicleResponse)
 async def update_vehicle(
     vehicle_id: int,
@@ -95,15 +178,17 @@ async def update_vehicle(
     
     await db.commit()
     await db.refresh(vehicle)
+    vehicles_changed([vehicle.id])
     return vehicle
 
 @router.delete("/{vehicle_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_vehicle(
     vehicle_id: int,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Supprime un véhicule (admin uniquement)"""
+    """Supprime un véhicule et ses images (admin uniquement)"""
     result = await db.execute(select(Vehicle).where(Vehicle.id == vehicle_id))
     vehicle = result.scalar_one_or_none()
     
@@ -113,13 +198,21 @@ async def delete_vehicle(
             detail="Véhicule non trouvé"
         )
     
+    image_urls = [*(vehicle.images or []), *variant_urls(vehicle.image_variants)]
+    
     await db.delete(vehicle)
     await db.commit()
+    vehicles_changed([vehicle_id])
+    
+    # Originaux et déclinaisons supprimés en un seul appel DeleteObjects, après la réponse
+    if image_urls:
+        background_tasks.add_task(s3_service.delete_files, image_urls)
     return None
 
 @router.post("/{vehicle_id}/images", response_model=dict)
 async def upload_vehicle_image(
     vehicle_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
@@ -150,15 +243,90 @@ async def upload_vehicle_image(
         )
         
         # Mettre à jour le véhicule avec l'URL de l'image
-        if not vehicle.images:
-            vehicle.images = []
-        vehicle.images.append(image_url)
+        # (nouvelle liste : une mutation en place de la colonne JSON n'est pas détectée)
+        vehicle.images = [*(vehicle.images or []), image_url]
         await db.commit()
         
+        # Déclinaisons (tailles, WebP/AVIF) générées après l'envoi de la réponse
+        await file.seek(0)
+        background_tasks.add_task(
+            image_pipeline.process,
+            vehicle_id,
+            s3_service.key_from_url(image_url),
+            await file.read()
+        )
+        
         return {"url": image_url}
         
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de l'upload de l'image: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+async def _get_vehicle_or_404(vehicle_id: int, db: AsyncSession) -> Vehicle:
+    result = await db.execute(select(Vehicle).where(Vehicle.id == vehicle_id))
+    vehicle = result.scalar_one_or_none()
+    if not vehicle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Véhicule non trouvé"
+        )
+    return vehicle
+
+def _vehicle_image_prefix(vehicle_id: int) -> str:
+    return f"{settings.S3_VEHICLES_PREFIX}{vehicle_id}/"
+
+@router.post("/{vehicle_id}/images/presign", response_model=PresignedUpload)
+async def presign_vehicle_image_upload(
+    vehicle_id: int,
+    upload: ImageUploadRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Génère une URL présignée pour uploader une image directement vers S3 (admin uniquement)"""
+    await _get_vehicle_or_404(vehicle_id, db)
+    
+    key = s3_service.build_key(_vehicle_image_prefix(vehicle_id), upload.filename)
+    return s3_service.create_presigned_upload(
+        key=key,
+        content_type=upload.content_type,
+        method=upload.method.value
+    )
+
+@router.post("/{vehicle_id}/images/complete", response_model=dict)
+async def complete_vehicle_image_upload(
+    vehicle_id: int,
+    upload: ImageUploadComplete,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Enregistre une image uploadée directement vers S3 (admin uniquement)"""
+    vehicle = await _get_vehicle_or_404(vehicle_id, db)
+    
+    if not upload.key.startswith(_vehicle_image_prefix(vehicle_id)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Clé d'image invalide pour ce véhicule"
+        )
+    
+    metadata = await s3_service.get_object_metadata(upload.key)
+    if metadata is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image non trouvée sur le stockage"
+        )
+    if not metadata.get("ContentType", "").startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Le fichier doit être une image"
+        )
+    
+    image_url = s3_service.get_url(upload.key)
+    if image_url not in (vehicle.images or []):
+        vehicle.images = [*(vehicle.images or []), image_url]
+        await db.commit()
+        background_tasks.add_task(image_pipeline.process, vehicle_id, upload.key)
+    
+    return {"url": image_url}
@@ -4,6 +4,7 @@ from typing import List
 from ..models.rental_option import RentalOption
 from ..schemas.rental_option import RentalOptionCreate, RentalOptionResponse
 from ..database import get_db
+from ..services.quotes import price_catalog
 
 router = APIRouter()
 
@@ -16,6 +17,7 @@ def create_rental_option(
     db.add(db_option)
     db.commit()
     db.refresh(db_option)
+    price_catalog.invalidate()
     return db_option
 
 @router.get("/rental-options/", response_model=List[RentalOptionResponse])
@@ -1,15 +1,23 @@
 from .user import (
-    UserBase, UserCreate, UserUpdate, UserInDB, UserResponse,
-    UserLogin, Token, TokenData
+    UserBase, UserCreate, UserUpdate, UserAdminUpdate, UserInDB, UserResponse,
+    UserLogin, Token, RefreshRequest, TokenData
 )
 from .vehicle import (
     VehicleBase, VehicleCreate, VehicleUpdate, VehicleInDB,
-    VehicleResponse, VehicleFilter, FuelType, TransmissionType
+    VehicleResponse, VehicleFilter, FuelType, TransmissionType,
+    RentalPeriod, VehicleAvailability, VehicleFileFormat, VehicleImportError, VehicleImportReport,
+    PriceField, PriceAdjustmentMode, PriceAdjustment,
+    VehicleBulkUpdate, VehicleBulkUpdateResult,
+    ImageUploadMethod, ImageUploadRequest, PresignedUpload, ImageUploadComplete
 )
 from .dossier import (
     DossierBase, DossierCreate, DossierUpdate, DossierInDB,
     DossierResponse, DossierFilter, DossierType, DossierStatus,
-    Document
+    Document, DocumentUploadInit, UploadedPart, DocumentUpload,
+    DossierSort, DossierPagination
+)
+from .quote import (
+    QuoteLineType, QuoteBasket, QuoteLine, QuoteMonth, Quote
 )
 from .rental_services import (
     ServiceBase, ServiceCreate, ServiceUpdate, ServiceInDB,
@@ -18,17 +26,25 @@ from .rental_services import (
 
 __all__ = [
     # User schemas
-    "UserBase", "UserCreate", "UserUpdate", "UserInDB", "UserResponse",
-    "UserLogin", "Token", "TokenData",
+    "UserBase", "UserCreate", "UserUpdate", "UserAdminUpdate", "UserInDB", "UserResponse",
+    "UserLogin", "Token", "RefreshRequest", "TokenData",
     
     # Vehicle schemas
     "VehicleBase", "VehicleCreate", "VehicleUpdate", "VehicleInDB",
     "VehicleResponse", "VehicleFilter", "FuelType", "TransmissionType",
+    "RentalPeriod", "VehicleAvailability", "VehicleFileFormat", "VehicleImportError", "VehicleImportReport",
+    "PriceField", "PriceAdjustmentMode", "PriceAdjustment",
+    "VehicleBulkUpdate", "VehicleBulkUpdateResult",
+    "ImageUploadMethod", "ImageUploadRequest", "PresignedUpload", "ImageUploadComplete",
     
     # Dossier schemas
     "DossierBase", "DossierCreate", "DossierUpdate", "DossierInDB",
     "DossierResponse", "DossierFilter", "DossierType", "DossierStatus",
-    "Document",
+    "Document", "DocumentUploadInit", "UploadedPart", "DocumentUpload",
+    "DossierSort", "DossierPagination",
+    
+    # Quote schemas
+    "QuoteLineType", "QuoteBasket", "QuoteLine", "QuoteMonth", "Quote",
     
     # Service schemas
     "ServiceBase", "ServiceCreate", "ServiceUpdate", "ServiceInDB",
@@ -3,6 +3,9 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from enum import Enum
 
+from .rental_option import RentalOptionResponse
+from .rental_services import ServiceResponse
+
 class DossierType(str, Enum):
     """Type de dossier"""
     ACHAT = "ACHAT"
@@ -19,15 +22,38 @@ class DossierStatus(str, Enum):
 
 class Document(BaseModel):
     """Schéma pour un document"""
+    id: Optional[str] = None  # Nom de l'objet S3, unique dans le dossier
     name: str
     type: str
     url: str
     uploaded_at: datetime
     status: str = "en_attente"
     comments: Optional[str] = None
+    key: Optional[str] = None  # Clé de l'objet S3 (stockage privé)
+    content_type: Optional[str] = None
+    size: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+class DocumentUploadInit(BaseModel):
+    """Schéma pour démarrer l'upload multipart d'un document"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(default="application/pdf", max_length=100)
+    document_type: str = Field(..., min_length=1, max_length=50)
+
+class UploadedPart(BaseModel):
+    """Partie reçue par le stockage"""
+    part_number: int
+    etag: str
+    size: int
+
+class DocumentUpload(BaseModel):
+    """État d'un upload multipart en cours, permettant sa reprise"""
+    document_id: str
+    upload_id: str
+    part_size: int
+    parts: List[UploadedPart] = Field(default_factory=list)
+
 class DossierBase(BaseModel):
     """Schéma de base pour les dossiers"""
     type: DossierType
@@ -66,6 +92,13 @@ class DossierInDB(DossierBase):
     status: DossierStatus = DossierStatus.EN_ATTENTE
     documents: List[Dict[str, Any]] = Field(default_factory=list)
     admin_comments: Optional[str] = None
+    monthly_payment: Optional[float] = None
+    debt_to_income: Optional[float] = None
+    risk_score: Optional[float] = None
+    scored_at: Optional[datetime] = None
+    claimed_by: Optional[int] = None
+    claimed_at: Optional[datetime] = None
+    claim_expires_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
     
@@ -85,7 +118,34 @@ class DossierInDB(DossierBase):
 
 class DossierResponse(DossierInDB):
     """Schéma pour la réponse API"""
-    pass
+    rental_options: List[RentalOptionResponse] = Field(default_factory=list)
+    rental_services: List[ServiceResponse] = Field(default_factory=list)
+
+class DossierSort(str, Enum):
+    """Ordre de tri des listes de dossiers"""
+    OLDEST = "created_at"
+    NEWEST = "-created_at"
+    LOWEST_RISK = "risk_score"
+    HIGHEST_RISK = "-risk_score"
+
+DEFAULT_PAGE_SIZE = 50
+
+class DossierPagination(BaseModel):
+    """Pagination par curseur des listes de dossiers
+    
+    Sans cursor ni limit, la liste est renvoyée en entier comme avant la pagination,
+    pour ne pas tronquer les clients qui ne suivent pas X-Next-Cursor.
+    """
+    cursor: Optional[str] = None
+    limit: Optional[int] = Field(default=None, ge=1, le=500)
+    sort: DossierSort = DossierSort.OLDEST
+
+    @property
+    def page_size(self) -> Optional[int]:
+        """Nombre de dossiers par page, None pour la liste complète"""
+        if self.cursor is None and self.limit is None:
+            return None
+        return self.limit or DEFAULT_PAGE_SIZE
 
 class DossierFilter(BaseModel):
     """Schéma pour le filtrage des dossiers"""
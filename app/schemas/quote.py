@@ -0,0 +1,42 @@
+from datetime import date
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from enum import Enum
+
+class QuoteLineType(str, Enum):
+    """Nature d'une ligne de devis"""
+    VEHICULE = "VEHICULE"
+    OPTION = "OPTION"
+    SERVICE = "SERVICE"
+
+class QuoteBasket(BaseModel):
+    """Panier du configurateur : véhicule, options et services choisis"""
+    vehicle_id: int
+    option_ids: List[int] = Field(default_factory=list)
+    service_ids: List[int] = Field(default_factory=list)
+    duration_months: Optional[int] = Field(None, ge=1, le=84)
+    start_date: Optional[date] = None
+
+class QuoteLine(BaseModel):
+    """Élément facturé chaque mois"""
+    type: QuoteLineType
+    item_id: int
+    label: str
+    monthly_price: float
+    start_date: date
+    end_date: date
+
+class QuoteMonth(BaseModel):
+    """Montant dû pour une échéance mensuelle"""
+    start_date: date
+    amount: float
+
+class Quote(BaseModel):
+    """Coût mensuel d'une location"""
+    vehicle_id: int
+    start_date: date
+    duration_months: int
+    lines: List[QuoteLine]
+    monthly_total: float
+    schedule: List[QuoteMonth]
+    total: float
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -48,6 +48,8 @@ class ServiceInDB(ServiceBase):
     created_at: datetime
     updated_at: datetime
 
+    model_config = ConfigDict(from_attributes=True)
+
 class ServiceResponse(ServiceInDB):
     """Schéma pour la réponse API"""
     pass
@@ -26,6 +26,11 @@ class UserUpdate(UserBase):
     last_name: Optional[str] = Field(None, min_length=2, max_length=100)
     password: Optional[str] = Field(None, min_length=8, pattern=r'[A-Za-z0-9]{8,}')
 
+class UserAdminUpdate(BaseModel):
+    """Schéma pour la modification d'un compte par un administrateur"""
+    is_active: Optional[bool] = None
+    is_admin: Optional[bool] = None
+
 class UserInDB(UserBase):
     """Schéma pour un utilisateur en base de données"""
     id: int
@@ -49,8 +54,14 @@ class Token(BaseModel):
     """Schéma pour le token JWT"""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    """Schéma pour le renouvellement du token"""
+    refresh_token: str
 
 class TokenData(BaseModel):
     """Schéma pour les données du token"""
     email: str
     is_admin: bool
+    token_version: int = 0
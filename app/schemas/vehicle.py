@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, Dict
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from enum import Enum
 
 class FuelType(str, Enum):
@@ -67,6 +67,8 @@ class VehicleUpdate(BaseModel):
 class VehicleInDB(VehicleBase):
     """Schéma pour un véhicule en base de données"""
     id: int
+    # URL de l'image originale -> {format: srcset}, ex: {"webp": "https://.../a_320w.webp 320w, ..."}
+    image_variants: Dict[str, Dict[str, str]] = Field(default_factory=dict)
     last_maintenance_date: Optional[datetime] = None
     next_maintenance_date: Optional[datetime] = None
     created_at: datetime
@@ -90,3 +92,114 @@ class VehicleFilter(BaseModel):
     available_for_rent: Optional[bool] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+class RentalPeriod(BaseModel):
+    """Période de location recherchée, fin exclue"""
+    start: datetime
+    end: datetime
+
+class VehicleAvailability(BaseModel):
+    """Disponibilité d'un véhicule sur une période"""
+    vehicle_id: int
+    start: datetime
+    end: datetime
+    available: bool
+
+class VehicleFileFormat(str, Enum):
+    """Format des fichiers d'import et d'export de véhicules"""
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class VehicleImportError(BaseModel):
+    """Erreur de validation ou d'insertion d'une ligne importée"""
+    line: int
+    registration_number: Optional[str] = None
+    errors: List[str]
+
+class VehicleImportReport(BaseModel):
+    """Rapport d'import en masse de véhicules"""
+    total_rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[VehicleImportError] = Field(default_factory=list)
+
+class PriceField(str, Enum):
+    """Prix pouvant être ajusté en masse"""
+    PRICE = "price"
+    MONTHLY_RENTAL_PRICE = "monthly_rental_price"
+
+class PriceAdjustmentMode(str, Enum):
+    """Mode d'ajustement : montant ajouté ou pourcentage appliqué"""
+    ABSOLUTE = "absolute"
+    PERCENTAGE = "percentage"
+
+class PriceAdjustment(BaseModel):
+    """Ajustement d'un prix (ex: +500, -10 %)"""
+    field: PriceField = PriceField.PRICE
+    mode: PriceAdjustmentMode
+    value: float
+
+    @model_validator(mode="after")
+    def check_percentage(self) -> "PriceAdjustment":
+        if self.mode == PriceAdjustmentMode.PERCENTAGE and self.value <= -100:
+            raise ValueError("Une baisse de 100 % ou plus n'est pas autorisée")
+        return self
+
+class VehicleBulkUpdate(BaseModel):
+    """Mise à jour en masse de la disponibilité et des prix"""
+    vehicle_ids: Optional[List[int]] = None
+    filter: Optional[VehicleFilter] = None
+    all: bool = False  # à indiquer explicitement pour modifier toute la flotte
+    is_available_for_sale: Optional[bool] = None
+    is_available_for_rent: Optional[bool] = None
+    price_adjustments: List[PriceAdjustment] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def check_update(self) -> "VehicleBulkUpdate":
+        if self.vehicle_ids is not None and not self.vehicle_ids:
+            raise ValueError("vehicle_ids ne peut pas être vide")
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise ValueError("filter doit contenir au moins un critère")
+        if self.all == (self.vehicle_ids is not None or self.filter is not None):
+            raise ValueError("Renseigner vehicle_ids et/ou filter, ou all à true pour toute la flotte")
+        if (
+            self.is_available_for_sale is None
+            and self.is_available_for_rent is None
+            and not self.price_adjustments
+        ):
+            raise ValueError("Aucune modification demandée")
+        fields = [adjustment.field for adjustment in self.price_adjustments]
+        if len(fields) != len(set(fields)):
+            raise ValueError("Un seul ajustement par prix est autorisé")
+        return self
+
+class VehicleBulkUpdateResult(BaseModel):
+    """Résultat d'une mise à jour en masse"""
+    updated: int
+    vehicle_ids: List[int]
+    skipped: int = 0
+    skipped_vehicle_ids: List[int] = Field(default_factory=list)  # prix ajusté non strictement positif
+
+class ImageUploadMethod(str, Enum):
+    """Méthode HTTP utilisée par le navigateur pour l'upload direct"""
+    POST = "post"
+    PUT = "put"
+
+class ImageUploadRequest(BaseModel):
+    """Demande d'URL présignée pour l'upload d'une image"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(..., pattern=r'^image/[a-z0-9.+-]+$')
+    method: ImageUploadMethod = ImageUploadMethod.POST
+
+class PresignedUpload(BaseModel):
+    """URL présignée permettant d'uploader directement vers S3"""
+    key: str
+    url: str
+    method: ImageUploadMethod
+    fields: Dict[str, str] = Field(default_factory=dict)
+    expires_in: int
+
+class ImageUploadComplete(BaseModel):
+    """Confirmation d'un upload direct terminé"""
+    key: str
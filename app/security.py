@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import math
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,13 +9,38 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from .database import get_db
+from sqlalchemy import select, update
+from .database import get_db, async_session_maker
 from .schemas import TokenData
 from .models.user import User
 from .config import settings
+from .services.password_hasher import password_hasher
+from .services.user_cache import user_cache
+from .services.rate_limiter import rate_limiter
+from .services.token_revocation import token_revocations
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+def build_password_context(scheme: Optional[str] = None) -> CryptContext:
+    """Contexte de hash selon la configuration
+    
+    Le premier schéma sert aux nouveaux hash ; bcrypt reste accepté pour les comptes
+    existants. Un hash d'un autre schéma, ou bcrypt d'un coût inférieur à
+    PASSWORD_BCRYPT_ROUNDS, est signalé par needs_update et refait à la connexion suivante.
+    """
+    scheme = scheme or settings.PASSWORD_HASH_SCHEME
+    schemes = ["argon2", "bcrypt"] if scheme == "argon2" else ["bcrypt"]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+        argon2__time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        argon2__memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+
+pwd_context = build_password_context()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -22,6 +51,39 @@ def get_password_hash(password: str) -> str:
     """Génère un hash du mot de passe"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Vérifie le mot de passe dans le pool de calcul, sans bloquer la boucle"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Génère le hash du mot de passe dans le pool de calcul, sans bloquer la boucle"""
+    return await password_hasher.run(get_password_hash, password)
+
+async def rehash_password(user_id: int, password: str, old_hash: str) -> None:
+    """Remplace un hash obsolète, sauf si le mot de passe a changé entre-temps"""
+    try:
+        new_hash = await get_password_hash_async(password)
+        async with async_session_maker() as db:
+            await db.execute(
+                update(User)
+                .where(User.id == user_id, User.hashed_password == old_hash)
+                .values(hashed_password=new_hash)
+            )
+            await db.commit()
+    except Exception as e:
+        # Pool saturé ou base indisponible : réessayé à la prochaine connexion
+        logger.warning(f"Mise à jour du hash de l'utilisateur {user_id} reportée: {str(e)}")
+
+_rehash_tasks: set = set()
+
+def schedule_password_rehash(user: User, password: str) -> None:
+    """Après une connexion réussie, refait en tâche de fond un hash d'un coût ou schéma dépassé"""
+    if not pwd_context.needs_update(user.hashed_password):
+        return
+    task = asyncio.create_task(rehash_password(user.id, password, user.hashed_password))
+    _rehash_tasks.add(task)
+    task.add_done_callback(_rehash_tasks.discard)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Crée un token JWT"""
     to_encode = data.copy()
@@ -30,7 +92,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti : identifiant du token, pour pouvoir le révoquer
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -48,10 +111,21 @@ async def get_user_by_email(email: str, db: AsyncSession) -> Optional[User]:
 async def authenticate_user(email: str, password: str, db: AsyncSession) -> Optional[User]:
     """Authentifie un utilisateur"""
     user = await get_user_by_email(email, db)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password_async(password, user.hashed_password):
         return None
+    schedule_password_rehash(user, password)
     return user
 
+async def enforce_rate_limit(route: str, **keys: Optional[str]) -> None:
+    """Refuse la requête (429) si l'une des clés a épuisé sa limite pour cette route"""
+    retry_after = await rate_limiter.hit(route, **keys)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Trop de requêtes, veuillez réessayer plus tard",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -68,11 +142,19 @@ async def get_current_user(
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email, is_admin=payload.get("is_admin", False))
+        token_data = TokenData(
+            email=email,
+            is_admin=payload.get("is_admin", False),
+            token_version=payload.get("ver", 0)
+        )
     except JWTError:
         raise credentials_exception
+    
+    # Token lui-même ou connexion dont il est issu (sid) révoqués
+    if await token_revocations.is_revoked(payload.get("jti"), payload.get("sid")):
+        raise credentials_exception
         
-    user = await get_user_by_email(email=token_data.email, db=db)
+    user = await user_cache.get_user(db, token_data.email, token_data.token_version)
     if user is None:
         raise credentials_exception
         
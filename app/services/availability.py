@@ -0,0 +1,187 @@
+import asyncio
+import bisect
+import logging
+import time
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import and_, event, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Rental, Vehicle
+from ..models.rental import BOOKED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Les dates de location sont stockées sans fuseau, en UTC"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def booking_period(start, end):
+    """Période [start, end) au format tsrange, celle de la contrainte d'exclusion"""
+    return func.tsrange(start, end, "[)")
+
+
+def overlapping_rentals(start: datetime, end: datetime):
+    """Condition des locations en cours qui chevauchent [start, end)
+
+    L'opérateur && sur tsrange est celui de la contrainte d'exclusion : PostgreSQL
+    utilise son index GiST au lieu de parcourir l'historique des locations.
+    """
+    return and_(
+        Rental.status.in_(BOOKED_STATUSES),
+        booking_period(Rental.start_date, Rental.end_date).op("&&")(booking_period(start, end))
+    )
+
+
+def select_free_vehicles(start: datetime, end: datetime):
+    """Véhicules proposés à la location et libres sur toute la période"""
+    return select(Vehicle).where(
+        Vehicle.is_available_for_rent.is_(True),
+        ~exists().where(Rental.vehicle_id == Vehicle.id, overlapping_rentals(start, end))
+    )
+
+
+class VehicleCalendar:
+    """Locations d'un véhicule, triées par date de début
+
+    La contrainte d'exclusion garantit que les périodes ne se chevauchent pas : les fins
+    sont donc triées comme les débuts, et une recherche dichotomique suffit.
+    """
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, start: datetime, end: datetime) -> None:
+        position = bisect.bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        # Seule la dernière location commençant avant la fin demandée peut chevaucher
+        position = bisect.bisect_left(self.starts, end)
+        return position == 0 or self.ends[position - 1] <= start
+
+
+class AvailabilityIndex:
+    """Calendriers des véhicules gardés en mémoire pour les vérifications de disponibilité
+
+    Seules les locations qui n'étaient pas terminées au chargement sont conservées : les
+    périodes commençant avant sont vérifiées en base. Les véhicules dont une location est
+    écrite par l'ORM dans ce worker sont rechargés après le commit ; l'index entier l'est au
+    plus tard après AVAILABILITY_INDEX_TTL secondes pour suivre les réservations des autres
+    workers et les UPDATE en masse.
+    """
+
+    def __init__(self):
+        self._calendars: Dict[int, VehicleCalendar] = {}
+        self._horizon: Optional[datetime] = None
+        self._loaded_at: Optional[float] = None
+        self._dirty: Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, vehicle_ids: Optional[List[int]] = None) -> None:
+        """Marque des véhicules à recharger après une réservation (tout l'index si None)"""
+        if vehicle_ids is None:
+            self._loaded_at = None
+        else:
+            self._dirty.update(vehicle_ids)
+
+    def covers(self, start: datetime) -> bool:
+        """Indique si l'index connaît toutes les locations pouvant chevaucher une période"""
+        return self._horizon is not None and start >= self._horizon
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < settings.AVAILABILITY_INDEX_TTL
+        )
+
+    async def _load(self, db: AsyncSession, horizon: datetime, vehicle_ids: Optional[List[int]] = None) -> int:
+        query = select(Rental.vehicle_id, Rental.start_date, Rental.end_date).where(
+            Rental.status.in_(BOOKED_STATUSES),
+            or_(Rental.end_date.is_(None), Rental.end_date > horizon)
+        )
+        if vehicle_ids is not None:
+            query = query.where(Rental.vehicle_id.in_(vehicle_ids))
+            for vehicle_id in vehicle_ids:
+                self._calendars.pop(vehicle_id, None)
+        rows = (await db.execute(query)).all()
+        for vehicle_id, start, end in rows:
+            # Une location sans date de fin immobilise le véhicule indéfiniment, comme tsrange
+            self._calendars.setdefault(vehicle_id, VehicleCalendar()).add(start, end or datetime.max)
+        return len(rows)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Recharge l'index s'il est périmé, ou seulement les véhicules modifiés"""
+        if self._is_fresh() and not self._dirty:
+            return
+        async with self._lock:
+            if not self._is_fresh():
+                self._dirty.clear()
+                loaded_at = time.monotonic()
+                horizon = naive_utc(datetime.now(timezone.utc))
+                self._calendars = {}
+                count = await self._load(db, horizon)
+                self._horizon, self._loaded_at = horizon, loaded_at
+                logger.info(f"Index de disponibilité chargé : {count} locations")
+            elif self._dirty:
+                vehicle_ids = list(self._dirty)
+                self._dirty.difference_update(vehicle_ids)
+                await self._load(db, self._horizon, vehicle_ids)
+
+    def is_free(self, vehicle_id: int, start: datetime, end: datetime) -> bool:
+        calendar = self._calendars.get(vehicle_id)
+        return calendar is None or calendar.is_free(start, end)
+
+
+async def is_vehicle_free(db: AsyncSession, vehicle_id: int, start: datetime, end: datetime) -> bool:
+    """Vérifie qu'aucune location en cours ne chevauche la période, en mémoire si possible"""
+    start, end = naive_utc(start), naive_utc(end)
+    await availability_index.refresh(db)
+    if availability_index.covers(start):
+        return availability_index.is_free(vehicle_id, start, end)
+
+    result = await db.execute(
+        select(exists().where(Rental.vehicle_id == vehicle_id, overlapping_rentals(start, end)))
+    )
+    return not result.scalar()
+
+
+availability_index = AvailabilityIndex()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_rental_changes(session: Session, flush_context) -> None:
+    """Note les véhicules dont une location est créée, modifiée ou supprimée par l'ORM"""
+    vehicle_ids = {
+        instance.vehicle_id
+        for instance in chain(session.new, session.dirty, session.deleted)
+        if isinstance(instance, Rental) and instance.vehicle_id is not None
+    }
+    if vehicle_ids:
+        session.info.setdefault("rental_vehicle_ids", set()).update(vehicle_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_rental_changes(session: Session) -> None:
+    """Recharge ces véhicules une fois la transaction visible par les autres sessions"""
+    vehicle_ids = session.info.pop("rental_vehicle_ids", None)
+    if vehicle_ids:
+        availability_index.invalidate(list(vehicle_ids))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rental_changes(session: Session) -> None:
+    session.info.pop("rental_vehicle_ids", None)
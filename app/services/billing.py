@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models import (
+    BillingRun, Dossier, InvoiceLine, Rental, RentalService, Vehicle, dossier_rental_services
+)
+from ..models.billing import BillingRunStatus
+from ..models.dossier import DossierStatus, DossierType, utcnow
+from ..models.rental import RentalStatus
+from ..schemas.quote import QuoteLineType
+from .quotes import add_months, prorate
+
+logger = logging.getLogger(__name__)
+
+# (id, label, prix mensuel, début, fin) d'un service souscrit
+ServiceRow = Tuple[int, str, float, date, date]
+# (id, début, fin, id véhicule, libellé, loyer mensuel, services) d'une location à facturer
+RentalRow = Tuple[int, date, Optional[date], int, str, Optional[float], List[ServiceRow]]
+
+
+def compute_invoice_lines(rentals: List[RentalRow], period_start: date, period_end: date) -> List[Dict[str, Any]]:
+    """Calcule les lignes de facture d'un lot de locations pour un mois
+
+    Fonction pure exécutée dans les processus de calcul : les lots et les lignes
+    sont de simples tuples et dictionnaires.
+    """
+    lines = []
+    for rental_id, start, end, vehicle_id, label, monthly_rent, services in rentals:
+        end = end or period_end
+        items = [(QuoteLineType.VEHICULE.value, vehicle_id, label, monthly_rent or 0.0, start, end)]
+        items += [
+            # Un service n'est facturé que pendant la location
+            (QuoteLineType.SERVICE.value, service_id, name, price, max(start, s_start), min(end, s_end))
+            for service_id, name, price, s_start, s_end in services
+        ]
+        for line_type, item_id, item_label, price, item_start, item_end in items:
+            amount = round(prorate(price, item_start, item_end, period_start, period_end), 2)
+            if amount > 0:
+                lines.append({
+                    "rental_id": rental_id,
+                    "period_start": period_start,
+                    "line_type": line_type,
+                    "item_id": item_id,
+                    "label": item_label,
+                    "monthly_price": price,
+                    "amount": amount,
+                })
+    return lines
+
+
+async def _fetch_batch(db: AsyncSession, after_id: int, period_start: date, period_end: date) -> List[RentalRow]:
+    """Lot suivant de locations actives sur le mois, par id croissant"""
+    starts_at, ends_at = datetime.combine(period_start, time()), datetime.combine(period_end, time())
+    rentals = (await db.execute(
+        select(
+            Rental.id, Rental.start_date, Rental.end_date, Rental.user_id, Rental.vehicle_id,
+            Vehicle.brand, Vehicle.model, Vehicle.monthly_rental_price
+        )
+        .join(Vehicle, Vehicle.id == Rental.vehicle_id)
+        .where(
+            Rental.status == RentalStatus.ACTIVE,
+            Rental.id > after_id,
+            Rental.start_date < ends_at,
+            or_(Rental.end_date.is_(None), Rental.end_date > starts_at)
+        )
+        .order_by(Rental.id)
+        .limit(settings.BILLING_BATCH_SIZE)
+    )).all()
+    if not rentals:
+        return []
+
+    # Les services sont souscrits dans le dossier de location accepté du client pour ce véhicule
+    services: Dict[Tuple[int, int], List[ServiceRow]] = defaultdict(list)
+    rows = await db.execute(
+        select(
+            Dossier.user_id, Dossier.vehicle_id, dossier_rental_services.c.service_id, RentalService.name,
+            dossier_rental_services.c.monthly_price,
+            dossier_rental_services.c.start_date, dossier_rental_services.c.end_date
+        )
+        .join(dossier_rental_services, dossier_rental_services.c.dossier_id == Dossier.id)
+        .join(RentalService, RentalService.id == dossier_rental_services.c.service_id)
+        .where(
+            tuple_(Dossier.user_id, Dossier.vehicle_id).in_({(r.user_id, r.vehicle_id) for r in rentals}),
+            Dossier.type == DossierType.LOCATION,
+            Dossier.status == DossierStatus.ACCEPTE
+        )
+    )
+    for user_id, vehicle_id, service_id, name, price, start, end in rows:
+        services[(user_id, vehicle_id)].append((service_id, name, price, start.date(), end.date()))
+
+    return [
+        (
+            r.id, r.start_date.date(), r.end_date.date() if r.end_date else None,
+            r.vehicle_id, f"{r.brand} {r.model}", r.monthly_rental_price,
+            services.get((r.user_id, r.vehicle_id), [])
+        )
+        for r in rentals
+    ]
+
+
+async def _insert_lines(db: AsyncSession, run_id: int, lines: List[Dict[str, Any]]) -> int:
+    """Insère les lignes en masse ; celles déjà facturées sont ignorées"""
+    if not lines:
+        return 0
+    result = await db.execute(
+        pg_insert(InvoiceLine)
+        .on_conflict_do_nothing(index_elements=["rental_id", "period_start", "line_type", "item_id"])
+        .returning(InvoiceLine.id),
+        [{**line, "billing_run_id": run_id} for line in lines]
+    )
+    return len(result.all())
+
+
+async def _start_run(db: AsyncSession, period_start: date) -> BillingRun:
+    """Crée la facturation du mois, ou reprend celle qui a été interrompue"""
+    run = (await db.execute(
+        select(BillingRun).where(BillingRun.period_start == period_start)
+    )).scalar_one_or_none()
+    if run is None:
+        run = BillingRun(period_start=period_start, last_rental_id=0, rentals_processed=0, lines_created=0)
+        db.add(run)
+    if run.status != BillingRunStatus.TERMINEE:
+        run.status = BillingRunStatus.EN_COURS
+        run.error = None
+        await db.commit()
+    return run
+
+
+async def run_billing(
+    period: date,
+    session_maker: Callable[[], AsyncSession] = async_session_maker
+) -> BillingRun:
+    """Facture un mois de locations actives
+
+    Les locations sont lues par lots successifs (pagination par id) et leurs lignes
+    calculées dans un pool de processus, plusieurs lots à la fois. Chaque lot est
+    enregistré avec le point de reprise dans la même transaction : une facturation
+    interrompue reprend après le dernier lot enregistré, sans doublon.
+    """
+    period_start = period.replace(day=1)
+    period_end = add_months(period_start, 1)
+    loop = asyncio.get_running_loop()
+
+    async with session_maker() as db:
+        run = await _start_run(db, period_start)
+        if run.status == BillingRunStatus.TERMINEE:
+            logger.info(f"Facturation de {period_start:%m/%Y} déjà terminée")
+            return run
+        logger.info(f"Facturation de {period_start:%m/%Y} à partir de la location {run.last_rental_id}")
+
+        pending: Deque[Tuple[int, int, asyncio.Future]] = deque()
+        last_id = run.last_rental_id
+        try:
+            with ProcessPoolExecutor(max_workers=settings.BILLING_WORKERS) as pool:
+                while True:
+                    batch = await _fetch_batch(db, last_id, period_start, period_end)
+                    if batch:
+                        last_id = batch[-1][0]
+                        pending.append((last_id, len(batch), loop.run_in_executor(
+                            pool, compute_invoice_lines, batch, period_start, period_end
+                        )))
+                    # Les lots sont enregistrés dans l'ordre pour que le point de reprise progresse
+                    while pending and (not batch or len(pending) > settings.BILLING_WORKERS):
+                        batch_last_id, count, future = pending.popleft()
+                        run.lines_created += await _insert_lines(db, run.id, await future)
+                        run.last_rental_id = batch_last_id
+                        run.rentals_processed += count
+                        await db.commit()
+                    if not batch:
+                        break
+        except Exception as e:
+            await db.rollback()
+            await db.refresh(run)
+            run.status = BillingRunStatus.ECHOUEE
+            run.error = str(e)
+            await db.commit()
+            logger.error(f"Facturation de {period_start:%m/%Y} interrompue après la location {run.last_rental_id}: {str(e)}")
+            raise
+
+        run.status = BillingRunStatus.TERMINEE
+        run.completed_at = utcnow()
+        await db.commit()
+        logger.info(
+            f"Facturation de {period_start:%m/%Y} terminée : "
+            f"{run.rentals_processed} locations, {run.lines_created} lignes"
+        )
+        return run
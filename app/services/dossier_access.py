@@ -0,0 +1,29 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..models import Dossier, User
+
+
+def dossier_query():
+    """Requête des dossiers avec options et services chargés d'avance
+    
+    selectinload ajoute une requête par relation, quel que soit le nombre de dossiers,
+    au lieu d'un chargement paresseux par dossier (interdit en asynchrone).
+    """
+    return select(Dossier).options(
+        selectinload(Dossier.rental_options),
+        selectinload(Dossier.rental_services)
+    )
+
+
+async def get_user_dossier(db: AsyncSession, dossier_id: int, user: User) -> Optional[Dossier]:
+    """Récupère un dossier accessible à l'utilisateur (tous pour un administrateur), ou None"""
+    query = dossier_query().where(Dossier.id == dossier_id)
+    if not user.is_admin:
+        query = query.where(Dossier.user_id == user.id)
+    
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
@@ -0,0 +1,164 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import Dossier
+from ..models.dossier import DossierStatus, utcnow
+
+logger = logging.getLogger(__name__)
+
+
+async def _claim(
+    db: AsyncSession,
+    condition,
+    order_by,
+    limit: int,
+    agent_id: int,
+    now: datetime
+) -> List[int]:
+    """Réserve au plus limit dossiers répondant à la condition
+
+    SKIP LOCKED fait passer chaque agent sur les lignes déjà verrouillées par un autre :
+    les réservations concurrentes ne s'attendent pas et ne se chevauchent jamais.
+    """
+    candidates = (
+        select(Dossier.id)
+        .where(condition)
+        .order_by(*order_by)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Dossier)
+        .where(Dossier.id.in_(candidates))
+        .values(
+            status=DossierStatus.EN_COURS_DE_TRAITEMENT,
+            claimed_by=agent_id,
+            claimed_at=now,
+            claim_expires_at=now + timedelta(minutes=settings.DOSSIER_CLAIM_TIMEOUT_MINUTES)
+        )
+        .returning(Dossier.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars())
+
+
+async def claim_dossiers(db: AsyncSession, agent_id: int, limit: int) -> List[int]:
+    """Réserve les prochains dossiers de la file pour un agent et retourne leurs ids
+
+    Les réservations expirées (agent absent, onglet fermé...) sont reprises en priorité,
+    puis les dossiers en attente, du plus ancien au plus récent.
+    """
+    now = utcnow()
+    claimed = await _claim(
+        db,
+        and_(
+            Dossier.status == DossierStatus.EN_COURS_DE_TRAITEMENT,
+            Dossier.claim_expires_at < now
+        ),
+        (Dossier.claim_expires_at,),
+        limit,
+        agent_id,
+        now
+    )
+    if len(claimed) < limit:
+        claimed += await _claim(
+            db,
+            Dossier.status == DossierStatus.EN_ATTENTE,
+            (Dossier.created_at, Dossier.id),
+            limit - len(claimed),
+            agent_id,
+            now
+        )
+    await db.commit()
+    if claimed:
+        logger.info(f"{len(claimed)} dossiers réservés par l'agent {agent_id}")
+    return claimed
+
+
+def holds_claim(dossier: Dossier, agent_id: int) -> bool:
+    """Indique si l'agent détient une réservation encore valable sur le dossier"""
+    expires_at = dossier.claim_expires_at
+    if dossier.claimed_by != agent_id or expires_at is None:
+        return False
+    if expires_at.tzinfo is None:
+        # Date relue sans fuseau : elle est enregistrée en UTC
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at > utcnow()
+
+
+def clear_claim(dossier: Dossier) -> None:
+    """Retire la réservation d'un dossier qui quitte la file de traitement"""
+    dossier.claimed_by = None
+    dossier.claimed_at = None
+    dossier.claim_expires_at = None
+
+
+async def extend_claim(db: AsyncSession, dossier_id: int, agent_id: int) -> Optional[datetime]:
+    """Prolonge la réservation d'un agent ; None si elle ne lui appartient plus"""
+    expires_at = utcnow() + timedelta(minutes=settings.DOSSIER_CLAIM_TIMEOUT_MINUTES)
+    result = await db.execute(
+        update(Dossier)
+        .where(
+            Dossier.id == dossier_id,
+            Dossier.status == DossierStatus.EN_COURS_DE_TRAITEMENT,
+            Dossier.claimed_by == agent_id
+        )
+        .values(claim_expires_at=expires_at)
+        .returning(Dossier.id)
+        .execution_options(synchronize_session=False)
+    )
+    extended = result.scalar_one_or_none() is not None
+    await db.commit()
+    return expires_at if extended else None
+
+
+async def release_dossier(db: AsyncSession, dossier_id: int, agent_id: int) -> bool:
+    """Remet un dossier réservé par l'agent dans la file d'attente"""
+    result = await db.execute(
+        update(Dossier)
+        .where(
+            Dossier.id == dossier_id,
+            Dossier.status == DossierStatus.EN_COURS_DE_TRAITEMENT,
+            Dossier.claimed_by == agent_id
+        )
+        .values(
+            status=DossierStatus.EN_ATTENTE,
+            claimed_by=None,
+            claimed_at=None,
+            claim_expires_at=None
+        )
+        .returning(Dossier.id)
+        .execution_options(synchronize_session=False)
+    )
+    released = result.scalar_one_or_none() is not None
+    await db.commit()
+    return released
+
+
+async def requeue_dossier(db: AsyncSession, dossier_id: int) -> bool:
+    """Remet dans la file un dossier en attente de documents, quand le client en envoie
+
+    Sans commit : l'appelant valide avec l'ajout des documents.
+    """
+    result = await db.execute(
+        update(Dossier)
+        .where(
+            Dossier.id == dossier_id,
+            Dossier.status == DossierStatus.DOCUMENTS_MANQUANTS
+        )
+        .values(
+            status=DossierStatus.EN_ATTENTE,
+            claimed_by=None,
+            claimed_at=None,
+            claim_expires_at=None
+        )
+        .returning(Dossier.id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none() is not None
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models import Dossier, EmailOutbox, User
+from ..models.dossier import DossierStatus, utcnow
+from ..models.email_outbox import EmailStatus
+from .mailer import build_message, mailer
+
+logger = logging.getLogger(__name__)
+
+STATUS_LABELS = {
+    DossierStatus.EN_ATTENTE: "en attente",
+    DossierStatus.EN_COURS_DE_TRAITEMENT: "en cours de traitement",
+    DossierStatus.DOCUMENTS_MANQUANTS: "en attente de documents complémentaires",
+    DossierStatus.ACCEPTE: "accepté",
+    DossierStatus.REFUSE: "refusé",
+    DossierStatus.ANNULE: "annulé",
+}
+
+
+def enqueue_email(db: AsyncSession, recipient: str, subject: str, body: str) -> EmailOutbox:
+    """Ajoute un email à la transaction en cours : il n'est envoyé que si elle est validée"""
+    email = EmailOutbox(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        status=EmailStatus.EN_ATTENTE,
+        attempts=0,
+        next_attempt_at=utcnow()
+    )
+    db.add(email)
+    return email
+
+
+async def notify_dossier_status(db: AsyncSession, dossier: Dossier, message: Optional[str] = None) -> None:
+    """Prévient le client du nouveau statut de son dossier"""
+    recipient = (await db.execute(select(User.email).where(User.id == dossier.user_id))).scalar_one_or_none()
+    if not recipient:
+        return
+    body = f"Bonjour,\n\nVotre dossier n°{dossier.id} est désormais {STATUS_LABELS[dossier.status]}."
+    if message:
+        body += f"\n\n{message}"
+    body += "\n\nL'équipe M-Motors"
+    enqueue_email(db, recipient, f"[M-Motors] Votre dossier n°{dossier.id}", body)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Délai exponentiel avant la tentative suivante"""
+    seconds = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+class EmailOutboxWorker:
+    """Envoie les emails de la file par lots, en tâche de fond
+
+    Les lignes d'un lot restent verrouillées (FOR UPDATE SKIP LOCKED) pendant l'envoi :
+    plusieurs workers peuvent vider la file sans envoyer deux fois le même email. Un email
+    n'est marqué envoyé qu'après acceptation par le serveur SMTP ; en cas d'arrêt brutal,
+    il est renvoyé au redémarrage plutôt que perdu.
+    """
+
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self) -> None:
+        """Signale de nouveaux emails, pour ne pas attendre la prochaine lecture de la file"""
+        self._wakeup.set()
+
+    async def drain_batch(self, db: AsyncSession) -> int:
+        """Envoie un lot d'emails dus et retourne le nombre d'emails traités"""
+        now = utcnow()
+        result = await db.execute(
+            select(EmailOutbox)
+            .where(
+                EmailOutbox.status == EmailStatus.EN_ATTENTE,
+                EmailOutbox.next_attempt_at <= now
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        emails: List[EmailOutbox] = list(result.scalars())
+        if not emails:
+            await db.commit()
+            return 0
+
+        sent = await mailer.send_many([
+            build_message([email.recipient], email.subject, email.body) for email in emails
+        ])
+        now = utcnow()
+        for email, ok in zip(emails, sent):
+            email.attempts += 1
+            if ok:
+                email.status = EmailStatus.ENVOYE
+                email.sent_at = now
+                email.last_error = None
+            elif email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                email.status = EmailStatus.ECHOUE
+                email.last_error = "Envoi SMTP refusé ou impossible"
+                logger.error(f"Email {email.id} abandonné après {email.attempts} tentatives")
+            else:
+                email.next_attempt_at = now + retry_delay(email.attempts)
+                email.last_error = "Envoi SMTP refusé ou impossible"
+        await db.commit()
+        return len(emails)
+
+    async def run(self) -> None:
+        """Vide la file en continu, jusqu'à l'arrêt de l'application"""
+        while True:
+            self._wakeup.clear()
+            try:
+                async with async_session_maker() as db:
+                    processed = await self.drain_batch(db)
+                if processed == settings.EMAIL_OUTBOX_BATCH_SIZE:
+                    # Lot complet : la file n'est sans doute pas vide
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur lors de l'envoi des emails en attente: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.EMAIL_OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+email_outbox = EmailOutboxWorker()
@@ -0,0 +1,136 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+from sqlalchemy import update, func, cast, literal, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models.vehicle import Vehicle
+from .s3 import s3_service
+
+try:
+    import pillow_avif  # noqa: F401  (enregistre l'encodeur AVIF si installé)
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+
+# (largeur, format, contenu encodé)
+Derivative = Tuple[int, str, bytes]
+
+
+def supported_formats() -> List[str]:
+    """Formats de sortie disponibles dans l'installation de Pillow"""
+    Image.init()
+    return [fmt for fmt in CONTENT_TYPES if fmt.upper() in Image.SAVE]
+
+
+def render_derivatives(data: bytes, widths: List[int], formats: List[str], quality: int) -> List[Derivative]:
+    """Redimensionne et encode une image (exécuté dans un processus séparé)"""
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    derivatives = []
+    # Pas d'agrandissement : seules les largeurs inférieures à l'original sont produites
+    target_widths = sorted({min(width, image.width) for width in widths})
+    for width in target_widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=quality)
+            derivatives.append((width, fmt, buffer.getvalue()))
+    return derivatives
+
+
+def derivative_key(original_key: str, width: int, fmt: str) -> str:
+    """Clé d'une déclinaison, à côté de l'original : vehicles/abc.jpg -> vehicles/abc_640w.webp"""
+    base = original_key.rsplit(".", 1)[0]
+    return f"{base}_{width}w.{fmt}"
+
+
+def variant_urls(image_variants: Optional[Dict[str, Dict[str, str]]]) -> List[str]:
+    """URLs de toutes les déclinaisons enregistrées, extraites des srcset"""
+    return [
+        entry.strip().split(" ", 1)[0]
+        for variants in (image_variants or {}).values()
+        for srcset in variants.values()
+        for entry in srcset.split(",")
+        if entry.strip()
+    ]
+
+
+class ImagePipeline:
+    """Génère les déclinaisons (tailles, WebP/AVIF) des photos de véhicules hors du chemin de la requête"""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+        return self._pool
+
+    async def process(self, vehicle_id: int, original_key: str, data: Optional[bytes] = None) -> Dict[str, str]:
+        """Produit, uploade et enregistre les déclinaisons d'une image ; retourne les srcset par format"""
+        try:
+            if data is None:
+                data = await s3_service.download_bytes(original_key)
+
+            loop = asyncio.get_running_loop()
+            derivatives = await loop.run_in_executor(
+                self.pool,
+                render_derivatives,
+                data,
+                settings.IMAGE_VARIANT_WIDTHS,
+                supported_formats(),
+                settings.IMAGE_VARIANT_QUALITY
+            )
+
+            srcsets: Dict[str, List[str]] = {}
+            uploads = []
+            for width, fmt, content in derivatives:
+                key = derivative_key(original_key, width, fmt)
+                uploads.append(s3_service.upload_bytes(content, key, CONTENT_TYPES[fmt]))
+                srcsets.setdefault(fmt, []).append(f"{s3_service.get_url(key)} {width}w")
+            await asyncio.gather(*uploads)
+
+            variants = {fmt: ", ".join(entries) for fmt, entries in srcsets.items()}
+            await self._save_variants(vehicle_id, s3_service.get_url(original_key), variants)
+            logger.info(f"{len(derivatives)} déclinaisons générées pour {original_key}")
+            return variants
+        except Exception as e:
+            logger.error(f"Erreur lors de la génération des déclinaisons de {original_key}: {str(e)}")
+            return {}
+
+    @staticmethod
+    async def _save_variants(vehicle_id: int, original_url: str, variants: Dict[str, str]) -> None:
+        """Fusionne les déclinaisons côté base, sans écraser celles des autres images"""
+        merged = cast(
+            func.coalesce(cast(Vehicle.image_variants, JSONB), literal({}, JSONB))
+            .op("||")(literal({original_url: variants}, JSONB)),
+            JSON
+        )
+        async with async_session_maker() as session:
+            await session.execute(
+                update(Vehicle)
+                .where(Vehicle.id == vehicle_id)
+                .values(image_variants=merged)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+
+image_pipeline = ImagePipeline()
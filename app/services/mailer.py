@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import List, Optional, Sequence
+
+from pydantic import SecretStr
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(recipients: Sequence[str], subject: str, body: str) -> EmailMessage:
+    """Construit un email texte"""
+    message = EmailMessage()
+    message["From"] = settings.SMTP_FROM
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+class SMTPMailer:
+    """Envoi d'emails par lots sur des connexions SMTP réutilisées
+
+    smtplib est bloquant : les envois passent par un pool de threads, un par connexion.
+    Chaque connexion envoie tout un lot après une seule négociation TLS et authentification,
+    puis reste ouverte pour le lot suivant.
+    """
+
+    def __init__(self):
+        self._idle: List[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.SMTP_POOL_SIZE,
+                thread_name_prefix="smtp"
+            )
+        return self._executor
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+        if settings.SMTP_STARTTLS:
+            connection.starttls()
+        if settings.SMTP_USER:
+            password = settings.SMTP_PASSWORD
+            connection.login(
+                settings.SMTP_USER,
+                password.get_secret_value() if isinstance(password, SecretStr) else password or ""
+            )
+        return connection
+
+    def _checkout(self) -> smtplib.SMTP:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _checkin(self, connection: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < settings.SMTP_POOL_SIZE:
+                self._idle.append(connection)
+                return
+        self._quit(connection)
+
+    @staticmethod
+    def _quit(connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except smtplib.SMTPException:
+            connection.close()
+
+    def _send_batch(self, messages: Sequence[EmailMessage]) -> List[bool]:
+        """Envoie un lot sur une même connexion ; une connexion coupée est rouverte une fois"""
+        results = []
+        connection = None
+        for message in messages:
+            for attempt in range(2):
+                try:
+                    if connection is None:
+                        connection = self._checkout()
+                    connection.send_message(message)
+                    results.append(True)
+                    break
+                except smtplib.SMTPServerDisconnected:
+                    # Connexion inactive fermée par le serveur
+                    connection = None
+                    if attempt == 1:
+                        results.append(False)
+                except (smtplib.SMTPException, OSError) as e:
+                    logger.error(f"Erreur lors de l'envoi de l'email à {message['To']}: {str(e)}")
+                    results.append(False)
+                    break
+        if connection is not None:
+            self._checkin(connection)
+        return results
+
+    async def send_many(self, messages: Sequence[EmailMessage]) -> List[bool]:
+        """Envoie des emails répartis sur les connexions du pool ; retourne le succès de chacun"""
+        if not messages:
+            return []
+        workers = min(settings.SMTP_POOL_SIZE, len(messages))
+        batches = [list(messages[i::workers]) for i in range(workers)]
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, self._send_batch, batch) for batch in batches
+        ))
+        # Remet les résultats dans l'ordre des messages
+        sent = [False] * len(messages)
+        for i, batch_results in enumerate(results):
+            sent[i::workers] = batch_results
+        return sent
+
+    async def send(self, message: EmailMessage) -> bool:
+        return (await self.send_many([message]))[0]
+
+    def close(self) -> None:
+        """Ferme les connexions ouvertes"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._quit(connection)
+
+
+mailer = SMTPMailer()
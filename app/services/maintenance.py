@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models import User, Vehicle
+from .mailer import build_message, mailer
+from .vehicle_events import on_vehicles_changed
+
+logger = logging.getLogger(__name__)
+
+# Clé du verrou consultatif PostgreSQL : un seul worker planifie les entretiens
+MAINTENANCE_LOCK_KEY = 0x4D4D5401
+
+
+async def _try_lock(db: AsyncSession) -> bool:
+    """Verrou consultatif libéré à la fin de la transaction"""
+    result = await db.execute(select(func.pg_try_advisory_xact_lock(MAINTENANCE_LOCK_KEY)))
+    return bool(result.scalar())
+
+
+async def _recipients(db: AsyncSession) -> List[str]:
+    if settings.MAINTENANCE_RECIPIENTS:
+        return settings.MAINTENANCE_RECIPIENTS
+    result = await db.execute(
+        select(User.email).where(User.is_admin.is_(True), User.is_active.is_(True))
+    )
+    return list(result.scalars())
+
+
+def _digest(vehicles: List, recipients: List[str]):
+    lines = [
+        f"- {v.next_maintenance_date:%d/%m/%Y} : {v.brand} {v.model} ({v.registration_number})"
+        for v in vehicles
+    ]
+    return build_message(
+        recipients,
+        f"[M-Motors] {len(vehicles)} véhicule(s) à entretenir",
+        "Entretiens à prévoir dans les "
+        f"{settings.MAINTENANCE_NOTICE_DAYS} prochains jours ou en retard :\n\n" + "\n".join(lines)
+    )
+
+
+class MaintenanceScheduler:
+    """Signale par email les véhicules dont l'entretien approche
+
+    Chaque passage ne lit que la tranche de dates entrée dans la fenêtre depuis le
+    passage précédent (index sur next_maintenance_date), ainsi que les véhicules
+    modifiés entre-temps. Un passage complet a lieu au démarrage puis une fois par
+    MAINTENANCE_FULL_SCAN_INTERVAL, pour les modifications faites par d'autres workers.
+    """
+
+    def __init__(self, clock: Callable[[], datetime] = datetime.utcnow):
+        self._clock = clock
+        self._watermark: Optional[datetime] = None
+        self._full_scan_at: Optional[float] = None
+        self._changed: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def vehicles_changed(self, vehicle_ids: Optional[List[int]] = None) -> None:
+        """Les dates d'entretien modifiées sont revérifiées au prochain passage"""
+        if vehicle_ids is None:
+            self._watermark = None
+        else:
+            self._changed.update(vehicle_ids)
+
+    def _needs_full_scan(self) -> bool:
+        return (
+            self._watermark is None
+            or self._full_scan_at is None
+            or time.monotonic() - self._full_scan_at >= settings.MAINTENANCE_FULL_SCAN_INTERVAL
+        )
+
+    async def tick(self, db: AsyncSession) -> int:
+        """Un passage : notifie les nouveaux entretiens à venir et retourne leur nombre"""
+        if not await _try_lock(db):
+            return 0
+
+        horizon = self._clock() + timedelta(days=settings.MAINTENANCE_NOTICE_DAYS)
+        full_scan = self._needs_full_scan()
+        changed = list(self._changed)
+        if full_scan:
+            window = Vehicle.next_maintenance_date <= horizon
+        else:
+            window = and_(
+                Vehicle.next_maintenance_date <= horizon,
+                or_(Vehicle.next_maintenance_date > self._watermark, Vehicle.id.in_(changed))
+            )
+
+        result = await db.execute(
+            select(
+                Vehicle.id, Vehicle.brand, Vehicle.model,
+                Vehicle.registration_number, Vehicle.next_maintenance_date
+            )
+            .where(
+                window,
+                or_(
+                    Vehicle.maintenance_notified_for.is_(None),
+                    Vehicle.maintenance_notified_for != Vehicle.next_maintenance_date
+                )
+            )
+            .order_by(Vehicle.next_maintenance_date, Vehicle.id)
+        )
+        due = result.all()
+
+        notified = 0
+        sent: List[bool] = []
+        if due:
+            recipients = await _recipients(db)
+            if not recipients:
+                logger.warning(f"{len(due)} entretiens à signaler mais aucun destinataire configuré")
+                await db.rollback()
+                return 0
+            size = settings.MAINTENANCE_DIGEST_SIZE
+            groups = [due[i:i + size] for i in range(0, len(due), size)]
+            sent = await mailer.send_many([_digest(group, recipients) for group in groups])
+            for group, ok in zip(groups, sent):
+                if ok:
+                    await db.execute(
+                        update(Vehicle)
+                        .where(Vehicle.id.in_([v.id for v in group]))
+                        .values(maintenance_notified_for=Vehicle.next_maintenance_date)
+                        .execution_options(synchronize_session=False)
+                    )
+                    notified += len(group)
+        await db.commit()
+
+        self._watermark = horizon
+        self._changed.difference_update(changed)
+        if not all(sent):
+            # Les véhicules non signalés sont repris par un passage complet
+            self._full_scan_at = None
+        elif full_scan:
+            self._full_scan_at = time.monotonic()
+        if notified:
+            logger.info(f"{notified} entretiens de véhicules signalés")
+        return notified
+
+    async def run(self) -> None:
+        """Boucle de planification, jusqu'à l'arrêt de l'application"""
+        while True:
+            try:
+                async with async_session_maker() as db:
+                    await self.tick(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur lors de la planification des entretiens: {str(e)}")
+            await asyncio.sleep(settings.MAINTENANCE_SCAN_INTERVAL)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+maintenance_scheduler = MaintenanceScheduler()
+on_vehicles_changed(maintenance_scheduler.vehicles_changed)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Trop de calculs de hash en attente : la demande est refusée plutôt que mise en file"""
+
+
+def _timed(func: Callable[..., T], submitted_at: float, *args) -> Tuple[float, T]:
+    """Exécute le calcul dans le pool et retourne aussi le temps passé en file"""
+    waited = time.monotonic() - submitted_at
+    return waited, func(*args)
+
+
+class PasswordHasher:
+    """Calcule les hash bcrypt dans un pool de threads borné, hors de la boucle asyncio
+
+    bcrypt relâche le GIL pendant le calcul : les threads s'exécutent en parallèle sur
+    tous les cœurs et la boucle continue de servir les autres requêtes. Au-delà de
+    PASSWORD_HASH_MAX_PENDING demandes en cours, les nouvelles sont refusées pour ne pas
+    laisser la file (et le temps de réponse de la connexion) grandir sans limite.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def workers(self) -> int:
+        return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Exécute un calcul de hash dans le pool, en respectant la limite d'attente"""
+        if self._pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            self._rejected += 1
+            logger.warning(f"Calcul de hash refusé : {self._pending} demandes déjà en cours")
+            raise PasswordHasherBusy()
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            waited, result = await loop.run_in_executor(
+                self.executor, _timed, func, time.monotonic(), *args
+            )
+        finally:
+            self._pending -= 1
+        self._completed += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Métriques de la file de calcul, temps d'attente en millisecondes"""
+        workers = self.workers
+        return {
+            "workers": workers,
+            "in_flight": min(self._pending, workers),
+            "queued": max(0, self._pending - workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_queue_wait_ms": round(1000 * self._total_wait / self._completed, 2) if self._completed else 0.0,
+            "max_queue_wait_ms": round(1000 * self._max_wait, 2),
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,250 @@
+import asyncio
+import calendar
+import logging
+import time
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import Dossier, RentalOption, RentalService, Vehicle, dossier_rental_services
+from ..schemas.quote import Quote, QuoteLine, QuoteLineType, QuoteMonth
+from ..schemas.rental_services import ServiceStatus
+from .vehicle_events import on_vehicles_changed
+
+logger = logging.getLogger(__name__)
+
+
+class VehicleNotInCatalog(LookupError):
+    """Le véhicule d'un dossier n'existe plus"""
+
+
+class CatalogVehicle(NamedTuple):
+    id: int
+    label: str
+    monthly_rental_price: Optional[float]
+    is_available_for_rent: bool
+
+
+class CatalogItem(NamedTuple):
+    id: int
+    label: str
+    monthly_price: float
+    is_mandatory: bool
+    duration_months: Optional[int] = None
+
+
+def add_months(day: date, months: int) -> date:
+    """Ajoute des mois à une date, en restant sur le dernier jour du mois si besoin"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def prorate(monthly_price: float, start: date, end: date, period_start: date, period_end: date) -> float:
+    """Part d'un prix mensuel due sur une période, au prorata des jours couverts par [start, end)"""
+    covered = (min(end, period_end) - max(start, period_start)).days
+    if covered <= 0:
+        return 0.0
+    return monthly_price * min(covered / (period_end - period_start).days, 1.0)
+
+
+def build_quote(vehicle_id: int, start: date, months: int, lines: List[QuoteLine]) -> Quote:
+    """Calcule l'échéancier d'un ensemble de lignes sur la durée du contrat"""
+    schedule = []
+    for index in range(months):
+        period_start, period_end = add_months(start, index), add_months(start, index + 1)
+        amount = sum(
+            prorate(line.monthly_price, line.start_date, line.end_date, period_start, period_end)
+            for line in lines
+        )
+        schedule.append(QuoteMonth(start_date=period_start, amount=round(amount, 2)))
+
+    return Quote(
+        vehicle_id=vehicle_id,
+        start_date=start,
+        duration_months=months,
+        lines=lines,
+        monthly_total=round(sum(line.monthly_price for line in lines), 2),
+        schedule=schedule,
+        total=round(sum(month.amount for month in schedule), 2)
+    )
+
+
+class PriceCatalog:
+    """Prix des véhicules, options et services gardés en mémoire pour les devis
+
+    Le catalogue est rechargé après une modification faite par ce processus, et au plus
+    tard après QUOTE_CATALOG_TTL secondes pour suivre celles des autres workers.
+    """
+
+    def __init__(self):
+        self.vehicles: Dict[int, CatalogVehicle] = {}
+        self.options: Dict[int, CatalogItem] = {}
+        self.services: Dict[int, CatalogItem] = {}
+        self._loaded_at: Optional[float] = None
+        self._dirty_vehicles: Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Force le rechargement complet au prochain devis"""
+        self._loaded_at = None
+
+    def invalidate_vehicles(self, vehicle_ids: Optional[List[int]] = None) -> None:
+        """Marque des véhicules à recharger (tout le catalogue si vehicle_ids est None)"""
+        if vehicle_ids is None:
+            self.invalidate()
+        else:
+            self._dirty_vehicles.update(vehicle_ids)
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < settings.QUOTE_CATALOG_TTL
+        )
+
+    @staticmethod
+    def _vehicle_query():
+        return select(
+            Vehicle.id, Vehicle.brand, Vehicle.model,
+            Vehicle.monthly_rental_price, Vehicle.is_available_for_rent
+        )
+
+    def _set_vehicle(self, row) -> None:
+        self.vehicles[row.id] = CatalogVehicle(
+            row.id, f"{row.brand} {row.model}", row.monthly_rental_price, bool(row.is_available_for_rent)
+        )
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Recharge le catalogue s'il est périmé, ou seulement les véhicules modifiés"""
+        if self._is_fresh() and not self._dirty_vehicles:
+            return
+        async with self._lock:
+            if not self._is_fresh():
+                self._dirty_vehicles.clear()
+                loaded_at = time.monotonic()
+                vehicles = (await db.execute(self._vehicle_query())).all()
+                options = (await db.execute(select(RentalOption))).scalars().all()
+                services = (await db.execute(
+                    select(RentalService).where(RentalService.status == ServiceStatus.ACTIF)
+                )).scalars().all()
+
+                self.vehicles = {}
+                for row in vehicles:
+                    self._set_vehicle(row)
+                self.options = {
+                    o.id: CatalogItem(o.id, o.name, o.monthly_price, bool(o.is_mandatory))
+                    for o in options
+                }
+                self.services = {
+                    s.id: CatalogItem(s.id, s.name, s.price_per_month, bool(s.is_mandatory), s.duration_months)
+                    for s in services
+                }
+                self._loaded_at = loaded_at
+                logger.info(
+                    f"Catalogue de prix chargé : {len(self.vehicles)} véhicules, "
+                    f"{len(self.options)} options, {len(self.services)} services"
+                )
+            elif self._dirty_vehicles:
+                vehicle_ids = list(self._dirty_vehicles)
+                self._dirty_vehicles.difference_update(vehicle_ids)
+                rows = (await db.execute(
+                    self._vehicle_query().where(Vehicle.id.in_(vehicle_ids))
+                )).all()
+                for vehicle_id in vehicle_ids:
+                    self.vehicles.pop(vehicle_id, None)
+                for row in rows:
+                    self._set_vehicle(row)
+
+    def quote_basket(
+        self,
+        vehicle: CatalogVehicle,
+        option_ids: Iterable[int],
+        service_ids: Iterable[int],
+        start: date,
+        months: int
+    ) -> Quote:
+        """Devis d'un panier hypothétique, sans accès à la base
+
+        Les options et services obligatoires sont toujours inclus ; un service court sur
+        sa durée d'engagement, dans la limite de celle du contrat.
+        """
+        end = add_months(start, months)
+        lines = [QuoteLine(
+            type=QuoteLineType.VEHICULE, item_id=vehicle.id, label=vehicle.label,
+            monthly_price=vehicle.monthly_rental_price or 0.0, start_date=start, end_date=end
+        )]
+
+        selected_options = set(option_ids) | {o.id for o in self.options.values() if o.is_mandatory}
+        for option_id in sorted(selected_options):
+            option = self.options[option_id]
+            lines.append(QuoteLine(
+                type=QuoteLineType.OPTION, item_id=option.id, label=option.label,
+                monthly_price=option.monthly_price, start_date=start, end_date=end
+            ))
+
+        selected_services = set(service_ids) | {s.id for s in self.services.values() if s.is_mandatory}
+        for service_id in sorted(selected_services):
+            service = self.services[service_id]
+            lines.append(QuoteLine(
+                type=QuoteLineType.SERVICE, item_id=service.id, label=service.label,
+                monthly_price=service.monthly_price, start_date=start,
+                end_date=min(end, add_months(start, service.duration_months or months))
+            ))
+
+        return build_quote(vehicle.id, start, months, lines)
+
+    async def quote_dossier(self, db: AsyncSession, dossier: Dossier) -> Quote:
+        """Devis d'un dossier de location
+
+        Les options sont valorisées au prix du catalogue ; les services gardent le prix et
+        les dates figés lors de leur souscription. Lève VehicleNotInCatalog si le véhicule
+        du dossier a été supprimé.
+        """
+        await self.refresh(db)
+        vehicle = self.vehicles.get(dossier.vehicle_id)
+        if vehicle is None:
+            raise VehicleNotInCatalog(dossier.vehicle_id)
+        services = (await db.execute(
+            select(
+                dossier_rental_services.c.service_id,
+                dossier_rental_services.c.monthly_price,
+                dossier_rental_services.c.start_date,
+                dossier_rental_services.c.end_date,
+                RentalService.name
+            )
+            .join(RentalService, RentalService.id == dossier_rental_services.c.service_id)
+            .where(dossier_rental_services.c.dossier_id == dossier.id)
+        )).all()
+
+        start = min((row.start_date.date() for row in services), default=date.today())
+        months = dossier.desired_loan_duration or settings.QUOTE_DEFAULT_DURATION_MONTHS
+        end = add_months(start, months)
+
+        lines = [QuoteLine(
+            type=QuoteLineType.VEHICULE, item_id=dossier.vehicle_id,
+            label=vehicle.label,
+            monthly_price=vehicle.monthly_rental_price or 0.0,
+            start_date=start, end_date=end
+        )]
+        for option in sorted(dossier.rental_options, key=lambda o: o.id):
+            cached = self.options.get(option.id)
+            lines.append(QuoteLine(
+                type=QuoteLineType.OPTION, item_id=option.id, label=option.name,
+                monthly_price=cached.monthly_price if cached else option.monthly_price,
+                start_date=start, end_date=end
+            ))
+        for row in services:
+            lines.append(QuoteLine(
+                type=QuoteLineType.SERVICE, item_id=row.service_id, label=row.name,
+                monthly_price=row.monthly_price,
+                start_date=row.start_date.date(), end_date=row.end_date.date()
+            ))
+
+        return build_quote(dossier.vehicle_id, start, months, lines)
+
+
+price_catalog = PriceCatalog()
+on_vehicles_changed(price_catalog.invalidate_vehicles)
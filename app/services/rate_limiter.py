@@ -0,0 +1,146 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from fastapi import Request
+
+from ..config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Seau à jetons atomique : recharge depuis le dernier passage, puis consomme un jeton.
+# L'heure est celle du serveur Redis, commune à tous les workers quelle que soit leur horloge.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RateLimit(NamedTuple):
+    capacity: int
+    rate: float  # jetons rechargés par seconde
+
+
+def parse_limit(value: str) -> RateLimit:
+    """Lit une limite de la forme "10/minute" : 10 requêtes en rafale, rechargées en une minute"""
+    count, period = value.split("/")
+    capacity = int(count)
+    return RateLimit(capacity, capacity / PERIODS[period.strip()])
+
+
+def take_token(tokens: float, ts: float, limit: RateLimit, now: float) -> Tuple[float, float]:
+    """Même calcul que le script Lua ; retourne (jetons restants, délai avant nouvel essai)"""
+    tokens = min(limit.capacity, tokens + max(0.0, now - ts) * limit.rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.rate
+
+
+def client_ip(request: Request) -> str:
+    """Adresse du client, celle transmise par le proxy si on lui fait confiance"""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "inconnu"
+
+
+class RateLimiter:
+    """Limitation de débit par seaux à jetons (par IP, par compte, par session...)
+
+    Les seaux sont dans Redis et mis à jour par un script Lua atomique : la limite est
+    commune à tous les workers. Si Redis est injoignable, chaque worker applique la limite
+    avec ses propres seaux en mémoire, et Redis n'est réessayé qu'après
+    RATE_LIMIT_REDIS_RETRY_INTERVAL secondes pour ne pas ralentir chaque requête.
+    """
+
+    def __init__(self, redis_client=None, max_local_buckets: int = 100000):
+        self._redis = redis_client
+        self._script = None
+        self._redis_down_until = 0.0
+        self.max_local_buckets = max_local_buckets
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    @property
+    def redis(self):
+        if self._redis is None and settings.RATE_LIMIT_REDIS_ENABLED and aioredis is not None:
+            self._redis = aioredis.from_url(
+                settings.REDIS_URL,
+                socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+                socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT
+            )
+        return self._redis
+
+    def _take_local(self, key: str, limit: RateLimit, now: float) -> float:
+        tokens, ts = self._buckets.get(key, (limit.capacity, now))
+        tokens, retry_after = take_token(tokens, ts, limit, now)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_local_buckets:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def _take_redis(self, key: str, limit: RateLimit) -> Optional[float]:
+        if self.redis is None or time.monotonic() < self._redis_down_until:
+            return None
+        try:
+            if self._script is None:
+                self._script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, retry_after = await self._script(keys=[key], args=[limit.capacity, limit.rate])
+        except Exception as e:
+            logger.warning(f"Redis indisponible pour la limitation de débit, repli en mémoire: {str(e)}")
+            self._redis_down_until = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY_INTERVAL
+            return None
+        return 0.0 if int(allowed) else float(retry_after)
+
+    async def hit(self, route: str, **keys: Optional[str]) -> float:
+        """Consomme un jeton par clé renseignée ; retourne le délai à attendre si l'une est épuisée
+
+        Les limites viennent de RATE_LIMITS["<route>:<type de clé>"] ; une clé sans limite
+        configurée ou sans valeur n'est pas limitée. Les clés sont prises dans l'ordre et la
+        première épuisée arrête le décompte : passée en premier, l'IP d'un client déjà limité
+        ne vide plus le seau du compte qu'il vise.
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return 0.0
+        now = time.time()
+        for key_type, value in keys.items():
+            limit_value = settings.RATE_LIMITS.get(f"{route}:{key_type}")
+            if not value or not limit_value:
+                continue
+            limit = parse_limit(limit_value)
+            key = f"ratelimit:{route}:{key_type}:{value}"
+            wait = await self._take_redis(key, limit)
+            if wait is None:
+                wait = self._take_local(key, limit, now)
+            if wait > 0:
+                return wait
+        return 0.0
+
+
+rate_limiter = RateLimiter()
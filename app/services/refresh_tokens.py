@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import RefreshToken, User
+from ..models.dossier import utcnow
+from .token_revocation import token_revocations
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshResult(NamedTuple):
+    user: User
+    refresh_token: str
+    family_id: str
+
+
+def hash_token(token: str) -> str:
+    """Empreinte stockée en base à la place du jeton"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def as_utc(value: datetime) -> datetime:
+    """SQLite relit les dates sans fuseau : elles sont en UTC"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def issue_refresh_token(db: AsyncSession, user: User, family_id: Optional[str] = None) -> Tuple[str, str]:
+    """Ajoute un jeton de renouvellement à la transaction ; retourne (jeton, famille)
+
+    Sans famille, le jeton ouvre une nouvelle connexion.
+    """
+    token = secrets.token_urlsafe(32)
+    family_id = family_id or uuid.uuid4().hex
+    db.add(RefreshToken(
+        token_hash=hash_token(token),
+        family_id=family_id,
+        user_id=user.id,
+        token_version=user.token_version,
+        expires_at=utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token, family_id
+
+
+async def revoke_family(db: AsyncSession, family_id: str) -> None:
+    """Révoque une connexion : ses jetons de renouvellement et ses tokens d'accès en cours"""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=utcnow())
+    )
+    await token_revocations.revoke(family_id, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Optional[RefreshResult]:
+    """Échange un jeton de renouvellement contre un nouveau, de la même famille
+
+    Retourne None si le jeton est inconnu, expiré ou révoqué. Un jeton déjà utilisé qui
+    revient signale un vol : toute la connexion est révoquée. Le résultat est à valider
+    par db.commit().
+    """
+    result = await db.execute(
+        select(RefreshToken)
+        .where(RefreshToken.token_hash == hash_token(token))
+        .with_for_update()
+    )
+    stored = result.scalar_one_or_none()
+    if stored is None:
+        return None
+
+    if stored.revoked_at is not None:
+        logger.warning(f"Jeton de renouvellement réutilisé, connexion {stored.family_id} révoquée")
+        await revoke_family(db, stored.family_id)
+        return None
+
+    now = utcnow()
+    stored.revoked_at = now
+    if as_utc(stored.expires_at) <= now:
+        return None
+
+    user = await db.get(User, stored.user_id)
+    if user is None or not user.is_active or user.token_version != stored.token_version:
+        await revoke_family(db, stored.family_id)
+        return None
+
+    new_token, family_id = issue_refresh_token(db, user, stored.family_id)
+    return RefreshResult(user, new_token, family_id)
@@ -1,33 +1,140 @@
+import asyncio
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from botocore.signers import CloudFrontSigner
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import logging
+import threading
 from ..config import settings
 from fastapi import UploadFile
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
 from pydantic import SecretStr
 
 logger = logging.getLogger(__name__)
 
+# Nombre maximal de clés par appel DeleteObjects
+DELETE_BATCH_SIZE = 1000
+
 class S3Service:
     def __init__(self):
-        self.s3_client = boto3.client(
+        self.bucket_name = settings.S3_BUCKET_NAME
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._cloudfront_signer: Optional[CloudFrontSigner] = None
+        # boto3 est bloquant : les appels réseau sont exécutés dans un pool de threads borné
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.S3_UPLOAD_WORKERS,
+            thread_name_prefix="s3"
+        )
+
+    @property
+    def s3_client(self):
+        """Client partagé, créé au premier usage
+        
+        Un client boto3 est thread-safe : une seule instance (et son pool de connexions
+        HTTP) est réutilisée par tous les threads du pool.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    @staticmethod
+    def _create_client():
+        config = Config(
+            # Au moins une connexion par thread pour ne pas sérialiser les appels
+            max_pool_connections=max(settings.S3_MAX_POOL_CONNECTIONS, settings.S3_UPLOAD_WORKERS),
+            connect_timeout=settings.S3_CONNECT_TIMEOUT,
+            read_timeout=settings.S3_READ_TIMEOUT,
+            # Le mode adaptive limite le débit côté client lors des throttlings et applique
+            # le quota de retries de botocore : les nouvelles tentatives s'arrêtent quand trop
+            # d'appels échouent, au lieu d'amplifier une panne
+            retries={
+                'mode': settings.S3_RETRY_MODE,
+                'total_max_attempts': settings.S3_MAX_ATTEMPTS
+            }
+        )
+        return boto3.client(
             's3',
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY.get_secret_value() if isinstance(settings.AWS_SECRET_ACCESS_KEY, SecretStr) else settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
+            region_name=settings.AWS_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            config=config
+        )
+
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        """Exécute un appel boto3 hors de la boucle d'événements"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    @staticmethod
+    def build_key(prefix: str, filename: str) -> str:
+        """Génère une clé unique en conservant l'extension du fichier"""
+        file_extension = filename.split('.')[-1]
+        return f"{prefix}{uuid.uuid4()}.{file_extension}"
+
+    def key_from_url(self, file_url: str) -> str:
+        """Extrait la clé S3 d'une URL construite par get_url"""
+        return file_url.split(self.get_url(""), 1)[-1]
+
+    def get_url(self, key: str) -> str:
+        """Construit l'URL publique d'un objet"""
+        if settings.CLOUDFRONT_DOMAIN:
+            return f"https://{settings.CLOUDFRONT_DOMAIN}/{key}"
+        if settings.S3_ENDPOINT_URL:
+            return f"{settings.S3_ENDPOINT_URL.rstrip('/')}/{self.bucket_name}/{key}"
+        return f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
+
+    @property
+    def cloudfront_signer(self) -> Optional[CloudFrontSigner]:
+        """Signataire CloudFront, si une paire de clés est configurée"""
+        if not (settings.CLOUDFRONT_DOMAIN and settings.CLOUDFRONT_KEY_PAIR_ID and settings.CLOUDFRONT_PRIVATE_KEY):
+            return None
+        if self._cloudfront_signer is None:
+            # Les variables d'environnement transportent souvent la clé avec des "\n" échappés
+            pem = settings.CLOUDFRONT_PRIVATE_KEY.get_secret_value().replace('\\n', '\n')
+            private_key = serialization.load_pem_private_key(pem.encode(), password=None)
+            self._cloudfront_signer = CloudFrontSigner(
+                settings.CLOUDFRONT_KEY_PAIR_ID,
+                lambda message: private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+            )
+        return self._cloudfront_signer
+
+    def generate_signed_url(self, key: str, expires_in: Optional[int] = None) -> str:
+        """Génère une URL de lecture temporaire pour un objet privé
+        
+        Signée pour CloudFront si une paire de clés est configurée, présignée S3 sinon.
+        """
+        expires_in = expires_in or settings.SIGNED_URL_EXPIRATION
+        signer = self.cloudfront_signer
+        if signer is not None:
+            return signer.generate_presigned_url(
+                self.get_url(key),
+                date_less_than=datetime.utcnow() + timedelta(seconds=expires_in)
+            )
+        return self.s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket_name, 'Key': key},
+            ExpiresIn=expires_in
         )
-        self.bucket_name = settings.S3_BUCKET_NAME
 
     async def upload_file(self, file: UploadFile, prefix: str) -> str:
         """Upload un fichier vers S3 et retourne son URL"""
         try:
             # Générer un nom de fichier unique
-            file_extension = file.filename.split('.')[-1]
-            unique_filename = f"{prefix}{uuid.uuid4()}.{file_extension}"
-            
+            unique_filename = self.build_key(prefix, file.filename)
+
             # Upload vers S3
-            self.s3_client.upload_fileobj(
+            await self._run(
+                self.s3_client.upload_fileobj,
                 file.file,
                 self.bucket_name,
                 unique_filename,
@@ -35,37 +142,273 @@ class S3Service:
                     'ContentType': file.content_type
                 }
             )
-            
-            # Construire l'URL
-            if settings.CLOUDFRONT_DOMAIN:
-                url = f"https://{settings.CLOUDFRONT_DOMAIN}/{unique_filename}"
-            else:
-                url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{unique_filename}"
-            
-            return url
-            
+
+            return self.get_url(unique_filename)
+
         except ClientError as e:
             logger.error(f"Erreur lors de l'upload vers S3: {str(e)}")
             raise
 
+    async def upload_bytes(self, content: bytes, key: str, content_type: str) -> str:
+        """Upload un contenu en mémoire sous une clé donnée et retourne son URL"""
+        await self._run(
+            self.s3_client.put_object,
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=content,
+            ContentType=content_type
+        )
+        return self.get_url(key)
+
+    async def download_bytes(self, key: str) -> bytes:
+        """Télécharge le contenu d'un objet"""
+        response = await self._run(
+            self.s3_client.get_object,
+            Bucket=self.bucket_name,
+            Key=key
+        )
+        return await self._run(response['Body'].read)
+
+    def create_presigned_upload(
+        self,
+        key: str,
+        content_type: str,
+        method: str = "post",
+        expires_in: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Génère une URL présignée pour un upload direct depuis le navigateur"""
+        expires_in = expires_in or settings.S3_PRESIGNED_EXPIRATION
+        if method == "put":
+            url = self.s3_client.generate_presigned_url(
+                'put_object',
+                Params={
+                    'Bucket': self.bucket_name,
+                    'Key': key,
+                    'ContentType': content_type
+                },
+                ExpiresIn=expires_in
+            )
+            fields = {}
+        else:
+            presigned = self.s3_client.generate_presigned_post(
+                self.bucket_name,
+                key,
+                Fields={'Content-Type': content_type},
+                Conditions=[
+                    {'Content-Type': content_type},
+                    ['content-length-range', 1, settings.S3_MAX_UPLOAD_SIZE]
+                ],
+                ExpiresIn=expires_in
+            )
+            url, fields = presigned['url'], presigned['fields']
+
+        return {
+            "key": key,
+            "url": url,
+            "method": method,
+            "fields": fields,
+            "expires_in": expires_in
+        }
+
+    async def create_multipart_upload(
+        self,
+        key: str,
+        content_type: str,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Démarre un upload multipart et retourne son identifiant"""
+        response = await self._run(
+            self.s3_client.create_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=key,
+            ContentType=content_type,
+            Metadata=metadata or {}
+        )
+        return response['UploadId']
+
+    async def upload_part(self, key: str, upload_id: str, part_number: int, body: bytes) -> Dict[str, Any]:
+        """Envoie une partie
+        
+        Les nouvelles tentatives sont celles du client (S3_MAX_ATTEMPTS, quota de retries) :
+        seules les erreurs transitoires sont réessayées, sans boucle supplémentaire ici.
+        """
+        try:
+            response = await self._run(
+                self.s3_client.upload_part,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+        except ClientError as e:
+            logger.error(f"Échec de la partie {part_number} de {key}: {str(e)}")
+            raise
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    async def list_parts(self, key: str, upload_id: str) -> List[Dict[str, Any]]:
+        """Liste les parties déjà reçues par S3, pour reprendre un upload interrompu"""
+        parts = []
+        kwargs = {'Bucket': self.bucket_name, 'Key': key, 'UploadId': upload_id}
+        while True:
+            response = await self._run(self.s3_client.list_parts, **kwargs)
+            parts.extend(response.get('Parts', []))
+            if not response.get('IsTruncated'):
+                return parts
+            kwargs['PartNumberMarker'] = response['NextPartNumberMarker']
+
+    async def complete_multipart_upload(
+        self,
+        key: str,
+        upload_id: str,
+        parts: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Assemble les parties ; sans liste fournie, utilise celles reçues par S3"""
+        if parts is None:
+            parts = await self.list_parts(key, upload_id)
+        await self._run(
+            self.s3_client.complete_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                'Parts': sorted(
+                    ({'PartNumber': p['PartNumber'], 'ETag': p['ETag']} for p in parts),
+                    key=lambda p: p['PartNumber']
+                )
+            }
+        )
+
+    async def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        """Abandonne un upload multipart et libère les parties stockées"""
+        try:
+            await self._run(
+                self.s3_client.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id
+            )
+        except ClientError as e:
+            logger.error(f"Erreur lors de l'abandon de l'upload {upload_id}: {str(e)}")
+
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        key: str,
+        content_type: str,
+        metadata: Optional[Dict[str, str]] = None,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> int:
+        """Upload un flux au fil de l'eau et retourne sa taille
+        
+        Les fichiers plus petits qu'une partie sont envoyés en une fois. Au-delà, les parties
+        sont envoyées en parallèle (S3_MULTIPART_CONCURRENCY au plus), ce qui borne la mémoire
+        utilisée à quelques parties quelle que soit la taille du fichier. Plusieurs uploads
+        simultanés partagent le même semaphore pour que la borne vaille pour l'ensemble.
+        """
+        part_size = settings.S3_MULTIPART_PART_SIZE
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.S3_MULTIPART_CONCURRENCY)
+        buffer = bytearray()
+        tasks: List[asyncio.Task] = []
+        upload_id = None
+        size = 0
+
+        async def send_part(part_number: int, body: bytes) -> Dict[str, Any]:
+            try:
+                return await self.upload_part(key, upload_id, part_number, body)
+            finally:
+                semaphore.release()
+
+        async def schedule_part(body: bytes) -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                upload_id = await self.create_multipart_upload(key, content_type, metadata)
+            # Attend qu'une place se libère avant de lire la suite du flux
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(send_part(len(tasks) + 1, body)))
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                while len(buffer) >= part_size:
+                    await schedule_part(bytes(buffer[:part_size]))
+                    del buffer[:part_size]
+
+            if upload_id is None:
+                await self._run(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=bytes(buffer),
+                    ContentType=content_type,
+                    Metadata=metadata or {}
+                )
+                return size
+
+            if buffer:
+                await schedule_part(bytes(buffer))
+            parts = await asyncio.gather(*tasks)
+            await self.complete_multipart_upload(key, upload_id, parts)
+            return size
+
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            if upload_id is not None:
+                await self.abort_multipart_upload(key, upload_id)
+            raise
+
+    async def get_object_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retourne les métadonnées d'un objet, ou None s'il n'existe pas"""
+        try:
+            return await self._run(
+                self.s3_client.head_object,
+                Bucket=self.bucket_name,
+                Key=key
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            logger.error(f"Erreur lors de la lecture des métadonnées S3: {str(e)}")
+            raise
+
     async def delete_file(self, file_url: str) -> bool:
         """Supprime un fichier de S3"""
         try:
-            # Extraire le nom du fichier de l'URL
-            if settings.CLOUDFRONT_DOMAIN:
-                key = file_url.split(settings.CLOUDFRONT_DOMAIN + '/')[-1]
-            else:
-                key = file_url.split(f"{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/")[-1]
-            
-            # Supprimer de S3
-            await self.s3_client.delete_object(
+            await self._run(
+                self.s3_client.delete_object,
                 Bucket=self.bucket_name,
-                Key=key
+                Key=self.key_from_url(file_url)
             )
             return True
-            
+
         except ClientError as e:
             logger.error(f"Erreur lors de la suppression du fichier S3: {str(e)}")
             return False
 
-s3_service = S3Service() 
\ No newline at end of file
+    async def delete_files(self, file_urls: Iterable[str]) -> List[str]:
+        """Supprime plusieurs fichiers par lots DeleteObjects et retourne les clés en échec"""
+        keys = list(dict.fromkeys(self.key_from_url(url) for url in file_urls))
+        batches = [keys[i:i + DELETE_BATCH_SIZE] for i in range(0, len(keys), DELETE_BATCH_SIZE)]
+
+        async def delete_batch(batch: List[str]) -> List[str]:
+            try:
+                response = await self._run(
+                    self.s3_client.delete_objects,
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+            except ClientError as e:
+                logger.error(f"Erreur lors de la suppression de {len(batch)} fichiers S3: {str(e)}")
+                return batch
+            return [error['Key'] for error in response.get('Errors', [])]
+
+        results = await asyncio.gather(*(delete_batch(batch) for batch in batches))
+        failed = [key for batch in results for key in batch]
+        if failed:
+            logger.error(f"{len(failed)} fichiers S3 n'ont pas pu être supprimés")
+        return failed
+
+s3_service = S3Service()
@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .s3 import s3_service
+
+
+class SignedUrlCache:
+    """Cache mémoire des URLs signées, par (clé, utilisateur)
+    
+    Une URL signée reste valable SIGNED_URL_EXPIRATION secondes : la réutiliser pendant
+    SIGNED_URL_CACHE_TTL évite de refaire une signature RSA ou HMAC par document à chaque
+    affichage d'un dossier, tout en garantissant une durée de validité restante suffisante.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.SIGNED_URL_CACHE_SIZE
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[str, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _ttl() -> float:
+        return min(settings.SIGNED_URL_CACHE_TTL, settings.SIGNED_URL_EXPIRATION / 2)
+
+    def get_url(self, key: str, user_id: int) -> str:
+        """Retourne une URL signée pour la clé, depuis le cache si possible"""
+        cache_key = (key, user_id)
+        now = time.monotonic()
+        entry = self._entries.get(cache_key)
+        if entry is not None and entry[1] > now:
+            self._entries.move_to_end(cache_key)
+            return entry[0]
+
+        url = s3_service.generate_signed_url(key, settings.SIGNED_URL_EXPIRATION)
+        self._entries[cache_key] = (url, now + self._ttl())
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return url
+
+    def sign_documents(self, documents: List[Dict[str, Any]], user_id: int) -> List[Dict[str, Any]]:
+        """Copie des documents dont l'URL est remplacée par une URL signée"""
+        return [
+            {**document, "url": self.get_url(document["key"], user_id)} if document.get("key") else document
+            for document in documents
+        ]
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Oublie les URLs d'une clé (ou toutes)"""
+        if key is None:
+            self._entries.clear()
+            return
+        for cache_key in [k for k in self._entries if k[0] == key]:
+            del self._entries[cache_key]
+
+
+signed_urls = SignedUrlCache()
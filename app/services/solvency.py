@@ -0,0 +1,182 @@
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models import Dossier, Vehicle
+from ..models.dossier import DossierStatus, DossierType, utcnow
+
+logger = logging.getLogger(__name__)
+
+# Dossiers encore ouverts, recalculés lorsque les taux changent
+OPEN_STATUSES = [
+    DossierStatus.EN_ATTENTE,
+    DossierStatus.EN_COURS_DE_TRAITEMENT,
+    DossierStatus.DOCUMENTS_MANQUANTS,
+]
+STABLE_CONTRACTS = {"CDI", "FONCTIONNAIRE"}
+SECONDS_PER_MONTH = 365.25 / 12 * 24 * 3600
+
+
+def monthly_payment(principal: np.ndarray, annual_rate: float, months: np.ndarray) -> np.ndarray:
+    """Mensualité d'un crédit amortissable à taux fixe"""
+    rate = annual_rate / 12
+    if rate == 0:
+        return principal / months
+    return principal * rate / (1 - (1 + rate) ** -months)
+
+
+def compute_scores(
+    income: np.ndarray,
+    current_loans: np.ndarray,
+    is_rental: np.ndarray,
+    price: np.ndarray,
+    monthly_rent: np.ndarray,
+    months: np.ndarray,
+    seniority_months: np.ndarray,
+    stable_contract: np.ndarray,
+    annual_rate: Optional[float] = None
+) -> Dict[str, np.ndarray]:
+    """Calcule mensualité, taux d'endettement et score de risque (0 à 100) d'un lot de dossiers
+
+    Le risque combine l'écart au taux d'endettement maximal, le reste à vivre, ainsi que
+    l'ancienneté et le type de contrat.
+    """
+    annual_rate = settings.FINANCING_ANNUAL_RATE if annual_rate is None else annual_rate
+    payment = np.where(
+        is_rental,
+        monthly_rent,
+        monthly_payment(price, annual_rate, months)
+    )
+    debt_to_income = (current_loans + payment) / income
+
+    # Courbe logistique centrée sur le taux d'endettement maximal
+    dti_risk = 100 / (1 + np.exp(-(debt_to_income - settings.FINANCING_MAX_DEBT_TO_INCOME) / 0.05))
+    disposable = income - current_loans - payment
+    disposable_risk = np.clip(100 * (1 - disposable / (2 * settings.FINANCING_MIN_DISPOSABLE_INCOME)), 0, 100)
+    stability_risk = np.where(stable_contract, 0, 50) + np.where(seniority_months < 12, 50, 0)
+
+    risk = 0.6 * dti_risk + 0.3 * disposable_risk + 0.1 * stability_risk
+    return {
+        "monthly_payment": np.round(payment, 2),
+        "debt_to_income": np.round(debt_to_income, 4),
+        "risk_score": np.round(np.clip(risk, 0, 100), 1),
+    }
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    """Les dates sans fuseau sont considérées en UTC"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=utcnow().tzinfo)
+    return value
+
+
+def _durations(rows: List[Any]) -> np.ndarray:
+    """Durées en mois ; une durée absente ou nulle prend la valeur par défaut (pas de division par 0)"""
+    default = settings.FINANCING_DEFAULT_DURATION_MONTHS
+    durations = [row["desired_loan_duration"] for row in rows]
+    return np.array([months if months and months > 0 else default for months in durations], dtype=np.float64)
+
+
+def _score_rows(rows: List[Any], now: datetime) -> Dict[str, np.ndarray]:
+    """Convertit des lignes (dossier + véhicule) en tableaux et les évalue"""
+    def column(name: str, default: float = 0.0) -> np.ndarray:
+        return np.array([default if row[name] is None else row[name] for row in rows], dtype=np.float64)
+
+    return compute_scores(
+        income=column("monthly_income"),
+        current_loans=column("current_loans_monthly_payments"),
+        is_rental=np.array([row["type"] == DossierType.LOCATION for row in rows]),
+        price=column("price"),
+        monthly_rent=column("monthly_rental_price"),
+        months=_durations(rows),
+        seniority_months=np.array([
+            (now - row["employment_start_date"]).total_seconds() / SECONDS_PER_MONTH
+            if row["employment_start_date"] else 0.0
+            for row in rows
+        ]),
+        stable_contract=np.array([
+            (row["employment_contract_type"] or "").strip().upper() in STABLE_CONTRACTS
+            for row in rows
+        ]),
+    )
+
+
+def score_dossier(dossier: Dossier, vehicle: Vehicle) -> None:
+    """Évalue un dossier à sa création ou à sa modification"""
+    now = utcnow()
+    row = {
+        "monthly_income": dossier.monthly_income,
+        "current_loans_monthly_payments": dossier.current_loans_monthly_payments,
+        "type": dossier.type,
+        "price": vehicle.price,
+        "monthly_rental_price": vehicle.monthly_rental_price,
+        "desired_loan_duration": dossier.desired_loan_duration,
+        "employment_start_date": _aware(dossier.employment_start_date),
+        "employment_contract_type": dossier.employment_contract_type,
+    }
+    scores = _score_rows([row], now)
+    for name, values in scores.items():
+        setattr(dossier, name, float(values[0]))
+    dossier.scored_at = now
+
+
+async def rescore_open_dossiers(
+    session_maker: Callable[[], AsyncSession] = async_session_maker
+) -> int:
+    """Recalcule le score de tous les dossiers ouverts, par lots vectorisés
+
+    Les dossiers sont lus en flux par une session et les scores écrits par une autre,
+    lot par lot : le curseur de lecture reste ouvert sans que les UPDATE passent sur sa
+    connexion, et chaque lot libère ses verrous dès son commit.
+    """
+    now = utcnow()
+    query = (
+        select(
+            Dossier.id,
+            Dossier.type,
+            Dossier.monthly_income,
+            Dossier.current_loans_monthly_payments,
+            Dossier.desired_loan_duration,
+            Dossier.employment_start_date,
+            Dossier.employment_contract_type,
+            Vehicle.price,
+            Vehicle.monthly_rental_price,
+        )
+        .join(Vehicle, Vehicle.id == Dossier.vehicle_id)
+        .where(Dossier.status.in_(OPEN_STATUSES))
+        .execution_options(yield_per=settings.FINANCING_SCORING_BATCH_SIZE)
+    )
+
+    total = 0
+    async with session_maker() as reader, session_maker() as writer:
+        result = await reader.stream(query)
+        async for partition in result.mappings().partitions():
+            rows = [
+                {**row, "employment_start_date": _aware(row["employment_start_date"])}
+                for row in partition
+            ]
+            scores = _score_rows(rows, now)
+            await writer.execute(
+                update(Dossier),
+                [
+                    {
+                        "id": row["id"],
+                        "monthly_payment": float(scores["monthly_payment"][i]),
+                        "debt_to_income": float(scores["debt_to_income"][i]),
+                        "risk_score": float(scores["risk_score"][i]),
+                        "scored_at": now,
+                    }
+                    for i, row in enumerate(rows)
+                ]
+            )
+            await writer.commit()
+            total += len(rows)
+
+    logger.info(f"{total} dossiers ouverts réévalués")
+    return total
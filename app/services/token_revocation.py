@@ -0,0 +1,80 @@
+import logging
+import time
+from typing import Dict, Optional
+
+from ..config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationList:
+    """Identifiants de tokens d'accès révoqués (jti, ou famille de connexion)
+
+    Consultée à chaque requête authentifiée, sans requête en base : une clé Redis par
+    identifiant révoqué, qui expire avec le dernier token d'accès concerné, et une copie
+    en mémoire des révocations faites par ce worker. Si Redis est injoignable, seules les
+    révocations locales sont vues, et Redis n'est réessayé qu'après
+    TOKEN_REVOCATION_REDIS_RETRY_INTERVAL secondes.
+    """
+
+    def __init__(self, redis_client=None):
+        self._redis = redis_client
+        self._redis_down_until = 0.0
+        self._local: Dict[str, float] = {}
+
+    @property
+    def redis(self):
+        if self._redis is None and settings.TOKEN_REVOCATION_REDIS_ENABLED and aioredis is not None:
+            self._redis = aioredis.from_url(
+                settings.REDIS_URL,
+                socket_connect_timeout=settings.TOKEN_REVOCATION_REDIS_TIMEOUT,
+                socket_timeout=settings.TOKEN_REVOCATION_REDIS_TIMEOUT
+            )
+        return self._redis
+
+    @staticmethod
+    def _key(token_id: str) -> str:
+        return f"revoked:{token_id}"
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"Redis indisponible pour la liste de révocation: {str(e)}")
+        self._redis_down_until = time.monotonic() + settings.TOKEN_REVOCATION_REDIS_RETRY_INTERVAL
+
+    async def revoke(self, token_id: str, ttl: int) -> None:
+        """Révoque un identifiant pendant ttl secondes (la durée de vie restante des tokens)"""
+        now = time.time()
+        self._local = {key: expires for key, expires in self._local.items() if expires > now}
+        self._local[token_id] = now + ttl
+        if not self._redis_available():
+            return
+        try:
+            await self.redis.set(self._key(token_id), 1, ex=max(1, ttl))
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def is_revoked(self, *token_ids: Optional[str]) -> bool:
+        """Vrai si l'un des identifiants est révoqué"""
+        token_ids = [token_id for token_id in token_ids if token_id]
+        if not token_ids:
+            return False
+        now = time.time()
+        if any(self._local.get(token_id, 0) > now for token_id in token_ids):
+            return True
+        if not self._redis_available():
+            return False
+        try:
+            return await self.redis.exists(*[self._key(token_id) for token_id in token_ids]) > 0
+        except Exception as e:
+            self._redis_failed(e)
+            return False
+
+
+token_revocations = TokenRevocationList()
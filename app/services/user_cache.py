@@ -0,0 +1,140 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import DateTime, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..config import settings
+from ..models.user import User
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Le hash du mot de passe ne quitte pas la base
+CACHED_COLUMNS = [column for column in User.__table__.columns if column.name != "hashed_password"]
+
+
+def user_snapshot(user: User) -> Dict[str, Any]:
+    """Colonnes de l'utilisateur, sérialisables en JSON"""
+    values = {}
+    for column in CACHED_COLUMNS:
+        value = getattr(user, column.name)
+        values[column.name] = value.isoformat() if isinstance(value, datetime) else value
+    return values
+
+
+def user_from_snapshot(values: Dict[str, Any]) -> User:
+    """Reconstruit un utilisateur détaché, comme s'il venait d'être chargé"""
+    attributes = {}
+    for column in CACHED_COLUMNS:
+        value = values.get(column.name)
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        attributes[column.name] = value
+    user = User(**attributes)
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    """Cache des utilisateurs authentifiés, par (email, version du token)
+
+    get_current_user relisait la table users à chaque requête authentifiée. Le cache
+    mémoire garde l'utilisateur USER_CACHE_TTL secondes ; le cache Redis, optionnel, le
+    partage entre les workers. La version du token fait partie de la clé : l'incrémenter
+    (désactivation, changement de rôle) rend les anciennes entrées et les anciens tokens
+    inutilisables. Les autres workers voient le changement au plus tard après USER_CACHE_TTL.
+    """
+
+    def __init__(self, redis_client=None, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.USER_CACHE_SIZE
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._redis = redis_client
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def redis(self):
+        if self._redis is None and settings.USER_CACHE_REDIS_ENABLED and aioredis is not None:
+            self._redis = aioredis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    @staticmethod
+    def _redis_key(email: str, version: int) -> str:
+        return f"user:{email}:{version}"
+
+    async def _get_snapshot(self, email: str, version: int) -> Optional[Dict[str, Any]]:
+        cache_key = (email, version)
+        now = time.monotonic()
+        entry = self._entries.get(cache_key)
+        if entry is not None and entry[1] > now:
+            self._entries.move_to_end(cache_key)
+            return entry[0]
+
+        if self.redis is None:
+            return None
+        try:
+            cached = await self.redis.get(self._redis_key(email, version))
+        except Exception as e:
+            logger.warning(f"Cache Redis des utilisateurs indisponible: {str(e)}")
+            return None
+        if cached is None:
+            return None
+        values = json.loads(cached)
+        self._remember(cache_key, values)
+        return values
+
+    def _remember(self, cache_key: Tuple[str, int], values: Dict[str, Any]) -> None:
+        self._entries[cache_key] = (values, time.monotonic() + settings.USER_CACHE_TTL)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_user(self, db: AsyncSession, email: str, version: int) -> Optional[User]:
+        """Utilisateur rattaché à la session, depuis le cache si possible
+
+        Retourne None si l'utilisateur n'existe pas ou si le token n'est plus à la bonne version.
+        """
+        values = await self._get_snapshot(email, version)
+        if values is not None:
+            # Rattaché sans requête : l'objet se comporte comme un utilisateur chargé
+            return await db.merge(user_from_snapshot(values), load=False)
+
+        user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+        if user is None or user.token_version != version:
+            return None
+
+        values = user_snapshot(user)
+        self._remember((email, version), values)
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    self._redis_key(email, version), json.dumps(values), ex=settings.USER_CACHE_REDIS_TTL
+                )
+            except Exception as e:
+                logger.warning(f"Cache Redis des utilisateurs indisponible: {str(e)}")
+        return user
+
+    async def invalidate(self, email: str, version: int) -> None:
+        """Oublie un utilisateur mis en cache pour une version de token"""
+        for cache_key in [k for k in self._entries if k[0] == email]:
+            del self._entries[cache_key]
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(self._redis_key(email, version))
+        except Exception as e:
+            logger.warning(f"Cache Redis des utilisateurs indisponible: {str(e)}")
+
+
+user_cache = UserCache()
@@ -0,0 +1,23 @@
+import logging
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Un listener reçoit la liste des ids modifiés, ou None si tout le catalogue est concerné
+VehicleListener = Callable[[Optional[List[int]]], None]
+
+_listeners: List[VehicleListener] = []
+
+def on_vehicles_changed(listener: VehicleListener) -> VehicleListener:
+    """Enregistre un cache à invalider lors des modifications de véhicules"""
+    _listeners.append(listener)
+    return listener
+
+def vehicles_changed(vehicle_ids: Optional[Iterable[int]] = None) -> None:
+    """Notifie en une fois tous les caches qu'un ensemble de véhicules a changé"""
+    ids = list(vehicle_ids) if vehicle_ids is not None else None
+    for listener in _listeners:
+        try:
+            listener(ids)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'invalidation du cache véhicules: {str(e)}")
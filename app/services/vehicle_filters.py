@@ -0,0 +1,30 @@
+from ..models.vehicle import Vehicle
+from ..schemas.vehicle import VehicleFilter
+
+
+def vehicle_filter_conditions(filter: VehicleFilter) -> list:
+    """Construit les conditions SQL correspondant aux filtres de véhicules"""
+    conditions = []
+    
+    if filter.brand:
+        conditions.append(Vehicle.brand.ilike(f"%{filter.brand}%"))
+    if filter.model:
+        conditions.append(Vehicle.model.ilike(f"%{filter.model}%"))
+    if filter.min_year:
+        conditions.append(Vehicle.year >= filter.min_year)
+    if filter.max_year:
+        conditions.append(Vehicle.year <= filter.max_year)
+    if filter.min_price:
+        conditions.append(Vehicle.price >= filter.min_price)
+    if filter.max_price:
+        conditions.append(Vehicle.price <= filter.max_price)
+    if filter.fuel_type:
+        conditions.append(Vehicle.fuel_type == filter.fuel_type)
+    if filter.transmission:
+        conditions.append(Vehicle.transmission == filter.transmission)
+    if filter.available_for_sale is not None:
+        conditions.append(Vehicle.is_available_for_sale == filter.available_for_sale)
+    if filter.available_for_rent is not None:
+        conditions.append(Vehicle.is_available_for_rent == filter.available_for_rent)
+    
+    return conditions
@@ -0,0 +1,271 @@
+import csv
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import select, func, case, text, table, column, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.vehicle import Vehicle
+from ..schemas.vehicle import (
+    VehicleCreate, VehicleFileFormat, VehicleImportError, VehicleImportReport
+)
+from .vehicle_events import vehicles_changed
+
+logger = logging.getLogger(__name__)
+
+# Colonnes alimentées par l'import (champs de VehicleCreate)
+IMPORT_COLUMNS: List[str] = list(VehicleCreate.model_fields)
+JSON_COLUMNS = ("features", "images", "technical_details")
+ENUM_COLUMNS = ("fuel_type", "transmission")
+
+STAGING_TABLE = "vehicle_import_staging"
+MAX_REPORTED_ERRORS = 1000
+INVALID_ENCODING_ERROR = "Ligne illisible : encodage UTF-8 attendu"
+
+# Une ligne du fichier source : (numéro de ligne, valeurs brutes ou message d'erreur)
+Record = Tuple[int, Any]
+
+
+def _decode_line(line: bytes, number: int) -> Optional[str]:
+    """Décode une ligne UTF-8 ; None si ses octets ne sont pas de l'UTF-8 valide"""
+    try:
+        return line.decode("utf-8-sig" if number == 1 else "utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Découpe un flux d'octets en lignes numérotées sans le charger en mémoire
+
+    Une ligne mal encodée est rendue à None : les lecteurs la signalent sans arrêter l'import.
+    """
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, _decode_line(line, number)
+    if buffer:
+        number += 1
+        yield number, _decode_line(buffer, number)
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Lit un flux CSV dont la première ligne contient les noms de colonnes"""
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    start = 0
+    async for number, line in iter_lines(chunks):
+        if line is None:
+            # L'enregistrement en cours est perdu avec la ligne illisible
+            yield (start if pending else number), INVALID_ENCODING_ERROR
+            pending = []
+            continue
+        if not pending:
+            start = number
+        pending.append(line)
+        record_text = "\n".join(pending)
+        # Un nombre impair de guillemets signifie qu'un champ continue sur la ligne suivante
+        if record_text.count('"') % 2:
+            continue
+        pending = []
+        if not record_text.strip():
+            continue
+        values = next(csv.reader([record_text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, f"{len(values)} colonnes trouvées, {len(header)} attendues"
+            continue
+        yield start, _decode_csv_values(dict(zip(header, values)))
+    if pending:
+        yield start, "Guillemet non fermé en fin de fichier"
+
+
+def _decode_csv_values(values: Dict[str, str]) -> Dict[str, Any]:
+    """Ignore les cellules vides et décode les colonnes JSON"""
+    data: Dict[str, Any] = {key: value for key, value in values.items() if value != ""}
+    for name in JSON_COLUMNS:
+        if name in data:
+            try:
+                data[name] = json.loads(data[name])
+            except json.JSONDecodeError:
+                pass  # laissé tel quel, la validation Pydantic signalera l'erreur
+    return data
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Lit un flux NDJSON (un objet JSON par ligne)"""
+    async for number, line in iter_lines(chunks):
+        if line is None:
+            yield number, INVALID_ENCODING_ERROR
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, f"JSON invalide : {str(e)}"
+            continue
+        if not isinstance(data, dict):
+            yield number, "Chaque ligne doit contenir un objet JSON"
+            continue
+        yield number, data
+
+
+def iter_records(chunks: AsyncIterator[bytes], format: VehicleFileFormat) -> AsyncIterator[Record]:
+    """Retourne le lecteur correspondant au format du fichier"""
+    if format == VehicleFileFormat.NDJSON:
+        return iter_ndjson_records(chunks)
+    return iter_csv_records(chunks)
+
+
+def _format_validation_error(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    ]
+
+
+def _staging_record(vehicle: VehicleCreate) -> tuple:
+    """Convertit un véhicule validé en ligne pour COPY"""
+    values = []
+    for name in IMPORT_COLUMNS:
+        value = getattr(vehicle, name)
+        if name in ENUM_COLUMNS:
+            # Les enums PostgreSQL stockent le nom des membres (ESSENCE, MANUELLE...)
+            value = value.name
+        elif name in JSON_COLUMNS:
+            value = orjson.dumps(value).decode()
+        values.append(value)
+    return tuple(values)
+
+
+def _build_upsert():
+    """INSERT ... SELECT depuis la table de staging avec mise à jour sur l'immatriculation"""
+    vehicles = Vehicle.__table__
+    staging = table(STAGING_TABLE, *[column(name) for name in IMPORT_COLUMNS])
+    now = func.timezone("utc", func.now())
+
+    stmt = pg_insert(vehicles).from_select(
+        [*IMPORT_COLUMNS, "created_at", "updated_at"],
+        select(*[staging.c[name] for name in IMPORT_COLUMNS], now, now)
+    )
+    update_set = {
+        name: stmt.excluded[name]
+        for name in IMPORT_COLUMNS
+        if name not in ("registration_number", "images")
+    }
+    # Les flux fournisseurs n'ont généralement pas de photos : on conserve celles déjà uploadées
+    update_set["images"] = case(
+        (func.json_array_length(stmt.excluded.images) > 0, stmt.excluded.images),
+        else_=vehicles.c.images
+    )
+    update_set["updated_at"] = stmt.excluded.updated_at
+
+    return stmt.on_conflict_do_update(
+        index_elements=["registration_number"],
+        set_=update_set
+    ).returning(literal_column("xmax = 0").label("inserted"))
+
+
+class VehicleImporter:
+    """Import en masse de véhicules par lots (validation, COPY, upsert)"""
+
+    def __init__(self, chunk_size: int = 1000):
+        self.chunk_size = chunk_size
+        self.upsert = _build_upsert()
+
+    async def run(self, db: AsyncSession, records: AsyncIterator[Record]) -> VehicleImportReport:
+        """Importe tous les enregistrements et retourne le rapport ligne par ligne"""
+        report = VehicleImportReport()
+        chunk: Dict[str, Tuple[int, VehicleCreate]] = {}
+
+        async for line, data in records:
+            report.total_rows += 1
+            if isinstance(data, str):
+                self._add_error(report, line, None, [data])
+                continue
+            try:
+                vehicle = VehicleCreate.model_validate(data)
+            except ValidationError as e:
+                self._add_error(report, line, data.get("registration_number"), _format_validation_error(e))
+                continue
+
+            # En cas de doublon dans le lot, la dernière ligne l'emporte : la précédente est signalée
+            previous = chunk.get(vehicle.registration_number)
+            if previous is not None:
+                self._add_error(
+                    report, previous[0], vehicle.registration_number,
+                    [f"Immatriculation en double, remplacée par la ligne {line}"]
+                )
+            chunk[vehicle.registration_number] = (line, vehicle)
+            if len(chunk) >= self.chunk_size:
+                await self._load_chunk(db, chunk, report)
+                chunk = {}
+
+        if chunk:
+            await self._load_chunk(db, chunk, report)
+        if report.inserted or report.updated:
+            vehicles_changed()
+
+        logger.info(
+            f"Import terminé : {report.inserted} créés, {report.updated} mis à jour, "
+            f"{report.failed} en erreur sur {report.total_rows} lignes"
+        )
+        return report
+
+    async def _load_chunk(
+        self,
+        db: AsyncSession,
+        chunk: Dict[str, Tuple[int, VehicleCreate]],
+        report: VehicleImportReport
+    ) -> None:
+        """Charge un lot via COPY dans une table temporaire puis l'upsert dans vehicles"""
+        try:
+            await db.execute(text(
+                f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS "
+                f"SELECT {', '.join(IMPORT_COLUMNS)} FROM vehicles WITH NO DATA"
+            ))
+            connection = await db.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                STAGING_TABLE,
+                records=[_staging_record(vehicle) for _, vehicle in chunk.values()],
+                columns=IMPORT_COLUMNS
+            )
+            result = await db.execute(self.upsert)
+            inserted_flags = result.scalars().all()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Erreur lors du chargement d'un lot de {len(chunk)} véhicules: {str(e)}")
+            for registration_number, (line, _) in chunk.items():
+                self._add_error(report, line, registration_number, [f"Erreur base de données : {str(e)}"])
+            return
+
+        inserted = sum(1 for flag in inserted_flags if flag)
+        report.inserted += inserted
+        report.updated += len(inserted_flags) - inserted
+
+    @staticmethod
+    def _add_error(
+        report: VehicleImportReport,
+        line: int,
+        registration_number: Optional[str],
+        errors: List[str]
+    ) -> None:
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(VehicleImportError(
+                line=line,
+                registration_number=registration_number,
+                errors=errors
+            ))
@@ -0,0 +1,75 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Sequence
+import csv
+import io
+import orjson
+from fastapi.responses import Response
+from sqlalchemy import select, Select
+
+from ..models.vehicle import Vehicle
+from ..schemas.vehicle import VehicleResponse
+
+# Colonnes sélectionnées, dans l'ordre des champs de VehicleResponse
+VEHICLE_FIELDS: List[str] = list(VehicleResponse.model_fields)
+VEHICLE_COLUMNS = [getattr(Vehicle, name) for name in VEHICLE_FIELDS]
+
+# Valeurs par défaut des champs JSON (équivalent des default_factory du schéma)
+_JSON_DEFAULTS = {
+    "features": dict,
+    "images": list,
+    "image_variants": dict,
+    "technical_details": dict,
+}
+
+def select_vehicle_rows() -> Select:
+    """Requête ne sélectionnant que les colonnes exposées par l'API"""
+    return select(*VEHICLE_COLUMNS)
+
+def vehicle_row_to_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    """Convertit un tuple de colonnes en dictionnaire prêt à être encodé"""
+    data = dict(zip(VEHICLE_FIELDS, row))
+    for field, factory in _JSON_DEFAULTS.items():
+        if data.get(field) is None:
+            data[field] = factory()
+    return data
+
+def serialize_vehicle_rows(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode une liste de véhicules en JSON sans passer par Pydantic"""
+    return orjson.dumps([vehicle_row_to_dict(row) for row in rows])
+
+def vehicle_rows_response(rows: Iterable[Sequence[Any]]) -> Response:
+    """Construit la réponse HTTP à partir des tuples de colonnes"""
+    return Response(
+        content=serialize_vehicle_rows(rows),
+        media_type="application/json"
+    )
+
+def encode_ndjson_rows(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode un lot de véhicules au format NDJSON (un objet par ligne)"""
+    return b"".join(orjson.dumps(vehicle_row_to_dict(row)) + b"\n" for row in rows)
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return value
+
+def encode_csv_header() -> bytes:
+    """Ligne d'en-tête CSV, compatible avec l'import en masse"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(VEHICLE_FIELDS)
+    return buffer.getvalue().encode()
+
+def encode_csv_rows(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode un lot de véhicules en CSV, les colonnes JSON étant sérialisées en JSON"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in vehicle_row_to_dict(row).values()])
+    return buffer.getvalue().encode()
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Mapping, Optional, Set
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.vehicle import Vehicle
+from .vehicle_events import on_vehicles_changed
+
+logger = logging.getLogger(__name__)
+
+# Caractéristiques comparées et poids associés
+NUMERIC_FEATURES = {
+    "year": 1.0,
+    "mileage": 1.0,
+    "price": 1.5,
+    "power": 1.0,
+    "doors": 0.3,
+    "seats": 0.3,
+}
+CATEGORICAL_FEATURES = {
+    "brand": 1.0,
+    "model": 1.5,
+    "fuel_type": 1.0,
+    "transmission": 0.5,
+}
+INDEX_COLUMNS = [
+    Vehicle.id,
+    *[getattr(Vehicle, name) for name in NUMERIC_FEATURES],
+    *[getattr(Vehicle, name) for name in CATEGORICAL_FEATURES],
+    Vehicle.is_available_for_sale,
+    Vehicle.is_available_for_rent,
+]
+
+
+class VehicleSimilarityIndex:
+    """Matrice des caractéristiques des véhicules, gardée en mémoire pour la recherche de similarité"""
+
+    def __init__(self, capacity: int = 1024):
+        self._numeric_weights = np.array(list(NUMERIC_FEATURES.values()))
+        self._categorical_weights = np.array(list(CATEGORICAL_FEATURES.values()))
+        self._vocabularies: List[Dict[Any, int]] = [{} for _ in CATEGORICAL_FEATURES]
+        self._allocate(capacity)
+        self._loaded_at: Optional[float] = None
+        self._dirty: Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def _allocate(self, capacity: int) -> None:
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._numeric = np.zeros((capacity, len(NUMERIC_FEATURES)), dtype=np.float64)
+        self._codes = np.zeros((capacity, len(CATEGORICAL_FEATURES)), dtype=np.int32)
+        self._available = np.zeros(capacity, dtype=bool)
+        self._positions: Dict[int, int] = {}
+        self._size = 0
+        self._scale: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, vehicle_id: int) -> bool:
+        return vehicle_id in self._positions
+
+    def _grow(self) -> None:
+        capacity = max(2 * len(self._ids), 1024)
+        self._ids = np.resize(self._ids, capacity)
+        self._numeric = np.resize(self._numeric, (capacity, self._numeric.shape[1]))
+        self._codes = np.resize(self._codes, (capacity, self._codes.shape[1]))
+        self._available = np.resize(self._available, capacity)
+
+    def _encode(self, position: int, value: Any) -> int:
+        if value is None:
+            return -1
+        vocabulary = self._vocabularies[position]
+        if value not in vocabulary:
+            vocabulary[value] = len(vocabulary)
+        return vocabulary[value]
+
+    def upsert(self, vehicle: Mapping[str, Any]) -> None:
+        """Ajoute ou met à jour la ligne d'un véhicule"""
+        vehicle_id = vehicle["id"]
+        position = self._positions.get(vehicle_id)
+        if position is None:
+            if self._size == len(self._ids):
+                self._grow()
+            position = self._size
+            self._size += 1
+            self._positions[vehicle_id] = position
+
+        self._ids[position] = vehicle_id
+        self._numeric[position] = [
+            np.nan if vehicle[name] is None else float(vehicle[name])
+            for name in NUMERIC_FEATURES
+        ]
+        self._codes[position] = [
+            self._encode(i, vehicle[name])
+            for i, name in enumerate(CATEGORICAL_FEATURES)
+        ]
+        self._available[position] = bool(
+            vehicle["is_available_for_sale"] or vehicle["is_available_for_rent"]
+        )
+        self._scale = None
+
+    def remove(self, vehicle_id: int) -> None:
+        """Retire un véhicule en déplaçant la dernière ligne à sa place"""
+        position = self._positions.pop(vehicle_id, None)
+        if position is None:
+            return
+        last = self._size - 1
+        if position != last:
+            moved_id = int(self._ids[last])
+            self._ids[position] = self._ids[last]
+            self._numeric[position] = self._numeric[last]
+            self._codes[position] = self._codes[last]
+            self._available[position] = self._available[last]
+            self._positions[moved_id] = position
+        self._size = last
+        self._scale = None
+
+    def invalidate(self, vehicle_ids: Optional[List[int]] = None) -> None:
+        """Marque des véhicules à recharger (tout l'index si vehicle_ids est None)"""
+        if vehicle_ids is None:
+            self._loaded_at = None
+            self._dirty.clear()
+        else:
+            self._dirty.update(vehicle_ids)
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < settings.SIMILARITY_INDEX_TTL
+        )
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Recharge l'index s'il est périmé, ou seulement les véhicules modifiés
+
+        Les invalidations ne touchent que le processus qui a écrit : le rechargement
+        périodique rattrape les écritures faites par les autres workers.
+        """
+        if self._is_fresh() and not self._dirty:
+            return
+        async with self._lock:
+            if not self._is_fresh():
+                self._dirty.clear()
+                loaded_at = time.monotonic()
+                result = await db.execute(select(*INDEX_COLUMNS))
+                rows = result.mappings().all()
+                self._allocate(max(len(rows), 1024))
+                for row in rows:
+                    self.upsert(row)
+                self._loaded_at = loaded_at
+                logger.info(f"Index de similarité chargé : {self._size} véhicules")
+            elif self._dirty:
+                vehicle_ids = list(self._dirty)
+                self._dirty.difference_update(vehicle_ids)
+                result = await db.execute(
+                    select(*INDEX_COLUMNS).where(Vehicle.id.in_(vehicle_ids))
+                )
+                found = set()
+                for row in result.mappings().all():
+                    self.upsert(row)
+                    found.add(row["id"])
+                for vehicle_id in set(vehicle_ids) - found:
+                    self.remove(vehicle_id)
+
+    async def ensure(self, db: AsyncSession, vehicle_id: int) -> bool:
+        """Met l'index à jour et indique s'il connaît le véhicule
+
+        Un véhicule absent a pu être créé par un autre worker : il est chargé avant de
+        conclure qu'il n'existe pas.
+        """
+        await self.refresh(db)
+        if vehicle_id not in self:
+            self.invalidate([vehicle_id])
+            await self.refresh(db)
+        return vehicle_id in self
+
+    def most_similar(self, vehicle_id: int, k: int = 5) -> List[int]:
+        """Retourne les ids des k véhicules disponibles les plus proches, du plus au moins similaire"""
+        position = self._positions[vehicle_id]
+        size = self._size
+        numeric = self._numeric[:size]
+
+        if self._scale is None:
+            with np.errstate(invalid="ignore"):
+                scale = np.nanstd(numeric, axis=0) if size else np.ones(numeric.shape[1])
+            self._scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+
+        # Distance euclidienne pondérée sur les valeurs centrées-réduites
+        diff = (numeric - numeric[position]) / self._scale
+        diff *= diff
+        np.nan_to_num(diff, copy=False)
+        distances = diff @ self._numeric_weights
+        mismatches = self._codes[:size] != self._codes[position]
+        distances += mismatches @ self._categorical_weights
+
+        candidates = self._available[:size].copy()
+        candidates[position] = False
+        distances[~candidates] = np.inf
+
+        count = min(k, int(candidates.sum()))
+        if count == 0:
+            return []
+        nearest = np.argpartition(distances, count - 1)[:count]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [int(vehicle_id) for vehicle_id in self._ids[nearest]]
+
+
+similarity_index = VehicleSimilarityIndex()
+on_vehicles_changed(similarity_index.invalidate)
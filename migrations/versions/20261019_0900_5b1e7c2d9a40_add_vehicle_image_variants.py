@@ -0,0 +1,26 @@
+"""add vehicle image variants
+
+Revision ID: 5b1e7c2d9a40
+Revises: 20240610001
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c2d9a40'
+down_revision: Union[str, None] = '20240610001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('vehicles', sa.Column('image_variants', sa.JSON(), server_default='{}', nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('vehicles', 'image_variants')
@@ -0,0 +1,37 @@
+"""add dossier queue indexes
+
+Revision ID: 8c4d2f1a6b37
+Revises: 5b1e7c2d9a40
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4d2f1a6b37'
+down_revision: Union[str, None] = '5b1e7c2d9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_dossiers_status_created_at': ['status', 'created_at', 'id'],
+    'ix_dossiers_user_id_created_at': ['user_id', 'created_at', 'id'],
+    'ix_dossiers_vehicle_id_created_at': ['vehicle_id', 'created_at', 'id'],
+    'ix_dossiers_created_at': ['created_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY évite de bloquer les écritures sur une table volumineuse
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'dossiers', columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='dossiers', postgresql_concurrently=True)
@@ -0,0 +1,40 @@
+"""add dossier claims
+
+Revision ID: 3e9a7b5c1d24
+Revises: 8c4d2f1a6b37
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9a7b5c1d24'
+down_revision: Union[str, None] = '8c4d2f1a6b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('dossiers', sa.Column('claimed_by', sa.Integer(), nullable=True))
+    op.add_column('dossiers', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('dossiers', sa.Column('claim_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_foreign_key('fk_dossiers_claimed_by_users', 'dossiers', 'users', ['claimed_by'], ['id'])
+    op.create_index(
+        'ix_dossiers_claim_expires_at',
+        'dossiers',
+        ['claim_expires_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'EN_COURS_DE_TRAITEMENT'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dossiers_claim_expires_at', table_name='dossiers')
+    op.drop_constraint('fk_dossiers_claimed_by_users', 'dossiers', type_='foreignkey')
+    op.drop_column('dossiers', 'claim_expires_at')
+    op.drop_column('dossiers', 'claimed_at')
+    op.drop_column('dossiers', 'claimed_by')
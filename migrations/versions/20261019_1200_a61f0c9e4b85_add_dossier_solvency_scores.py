@@ -0,0 +1,35 @@
+"""add dossier solvency scores
+
+Revision ID: a61f0c9e4b85
+Revises: 3e9a7b5c1d24
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a61f0c9e4b85'
+down_revision: Union[str, None] = '3e9a7b5c1d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Les dossiers existants sont évalués ensuite via POST /admin/dossiers/rescore
+    op.add_column('dossiers', sa.Column('monthly_payment', sa.Float(), nullable=True))
+    op.add_column('dossiers', sa.Column('debt_to_income', sa.Float(), nullable=True))
+    op.add_column('dossiers', sa.Column('risk_score', sa.Float(), server_default='100', nullable=False))
+    op.add_column('dossiers', sa.Column('scored_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_dossiers_status_risk_score', 'dossiers', ['status', 'risk_score', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dossiers_status_risk_score', table_name='dossiers')
+    op.drop_column('dossiers', 'scored_at')
+    op.drop_column('dossiers', 'risk_score')
+    op.drop_column('dossiers', 'debt_to_income')
+    op.drop_column('dossiers', 'monthly_payment')
@@ -0,0 +1,38 @@
+"""add rental period exclusion
+
+Revision ID: d27b94e1f6c3
+Revises: a61f0c9e4b85
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd27b94e1f6c3'
+down_revision: Union[str, None] = 'a61f0c9e4b85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # btree_gist permet d'associer l'égalité sur vehicle_id et le chevauchement des périodes
+    # dans un même index GiST. La création échoue si des locations se chevauchent déjà.
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.create_exclude_constraint(
+        'ex_rentals_vehicle_period',
+        'rentals',
+        ('vehicle_id', '='),
+        (sa.text("tsrange(start_date, end_date, '[)')"), '&&'),
+        using='gist',
+        where=sa.text("status IN ('PENDING', 'ACTIVE')")
+    )
+    op.create_index('ix_rentals_end_date', 'rentals', ['end_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rentals_end_date', table_name='rentals')
+    op.drop_constraint('ex_rentals_vehicle_period', 'rentals', type_='exclude')
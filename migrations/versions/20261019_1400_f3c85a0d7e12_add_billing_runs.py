@@ -0,0 +1,65 @@
+"""add billing runs
+
+Revision ID: f3c85a0d7e12
+Revises: d27b94e1f6c3
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c85a0d7e12'
+down_revision: Union[str, None] = 'd27b94e1f6c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('billing_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('status', sa.Enum('EN_COURS', 'TERMINEE', 'ECHOUEE', name='billingrunstatus'), nullable=False),
+        sa.Column('last_rental_id', sa.Integer(), nullable=False),
+        sa.Column('rentals_processed', sa.Integer(), nullable=False),
+        sa.Column('lines_created', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('period_start')
+    )
+    op.create_index(op.f('ix_billing_runs_id'), 'billing_runs', ['id'], unique=False)
+    op.create_table('invoice_lines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('billing_run_id', sa.Integer(), nullable=False),
+        sa.Column('rental_id', sa.Integer(), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('line_type', sa.String(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('label', sa.String(), nullable=False),
+        sa.Column('monthly_price', sa.Float(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['billing_run_id'], ['billing_runs.id'], ),
+        sa.ForeignKeyConstraint(['rental_id'], ['rentals.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('rental_id', 'period_start', 'line_type', 'item_id', name='uq_invoice_lines_item_period')
+    )
+    op.create_index(op.f('ix_invoice_lines_id'), 'invoice_lines', ['id'], unique=False)
+    op.create_index(op.f('ix_invoice_lines_billing_run_id'), 'invoice_lines', ['billing_run_id'], unique=False)
+    # Sélection des locations actives par lots d'id croissants
+    op.create_index('ix_rentals_status_id', 'rentals', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rentals_status_id', table_name='rentals')
+    op.drop_index(op.f('ix_invoice_lines_billing_run_id'), table_name='invoice_lines')
+    op.drop_index(op.f('ix_invoice_lines_id'), table_name='invoice_lines')
+    op.drop_table('invoice_lines')
+    op.drop_index(op.f('ix_billing_runs_id'), table_name='billing_runs')
+    op.drop_table('billing_runs')
+    sa.Enum(name='billingrunstatus').drop(op.get_bind(), checkfirst=True)
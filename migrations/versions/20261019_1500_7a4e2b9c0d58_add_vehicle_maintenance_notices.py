@@ -0,0 +1,28 @@
+"""add vehicle maintenance notices
+
+Revision ID: 7a4e2b9c0d58
+Revises: f3c85a0d7e12
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4e2b9c0d58'
+down_revision: Union[str, None] = 'f3c85a0d7e12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('vehicles', sa.Column('maintenance_notified_for', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_vehicles_next_maintenance_date'), 'vehicles', ['next_maintenance_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_vehicles_next_maintenance_date'), table_name='vehicles')
+    op.drop_column('vehicles', 'maintenance_notified_for')
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Script de benchmark du coût des hash de mots de passe, pour choisir PASSWORD_BCRYPT_ROUNDS
+(ou les paramètres argon2) selon le processeur et le pic de connexions attendu.
+Utilisation:
+    python -m scripts.benchmark_password_hash
+    python -m scripts.benchmark_password_hash --rounds 10 11 12 13 --peak-logins 20 --cpu-budget 0.5
+    python -m scripts.benchmark_password_hash --argon2 --time-costs 2 3 4
+
+Une vérification doit rester perceptible pour un attaquant (100 à 250 ms) sans que le pic de
+connexions n'occupe plus que la part de CPU allouée.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import time
+from typing import Dict, List
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+PASSWORD = "MotDePasse2024"
+
+
+def measure_verify(context: CryptContext, repeat: int) -> float:
+    """Retourne le temps médian d'une vérification en millisecondes"""
+    hashed = context.hash(PASSWORD)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        context.verify(PASSWORD, hashed)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def candidates(args) -> Dict[str, CryptContext]:
+    """Contextes à mesurer, par libellé de configuration"""
+    if args.argon2:
+        return {
+            f"argon2 t={time_cost} m={args.memory_cost}": CryptContext(
+                schemes=["argon2"],
+                argon2__time_cost=time_cost,
+                argon2__memory_cost=args.memory_cost,
+                argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+            )
+            for time_cost in args.time_costs
+        }
+    return {
+        f"bcrypt rounds={rounds}": CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+        for rounds in args.rounds
+    }
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Benchmark du coût des hash de mots de passe')
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 11, 12, 13, 14],
+                        help='Coûts bcrypt à mesurer')
+    parser.add_argument('--argon2', action='store_true', help='Mesurer argon2 plutôt que bcrypt')
+    parser.add_argument('--time-costs', type=int, nargs='+', default=[2, 3, 4],
+                        help='Coûts en temps argon2 à mesurer')
+    parser.add_argument('--memory-cost', type=int, default=settings.PASSWORD_ARGON2_MEMORY_COST,
+                        help='Mémoire argon2 en Kio')
+    parser.add_argument('--repeat', type=int, default=5, help='Nombre de vérifications par mesure')
+    parser.add_argument('--peak-logins', type=float, default=20.0,
+                        help='Connexions par seconde au pic')
+    parser.add_argument('--cores', type=int, default=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+                        help='Cœurs disponibles pour les hash (PASSWORD_HASH_WORKERS)')
+    parser.add_argument('--cpu-budget', type=float, default=0.5,
+                        help='Part maximale du CPU consacrée aux connexions au pic')
+    parser.add_argument('--max-ms', type=float, default=250.0,
+                        help='Durée maximale acceptable d\'une vérification')
+    args = parser.parse_args()
+
+    logger.info(
+        f"{'Configuration':>24} | {'Vérif. (ms)':>11} | {'Connexions/s max':>16} | {'CPU au pic':>10}"
+    )
+    acceptable: List[str] = []
+    for label, context in candidates(args).items():
+        verify_ms = measure_verify(context, args.repeat)
+        capacity = args.cores * 1000 / verify_ms
+        cpu_share = args.peak_logins / capacity
+        logger.info(f"{label:>24} | {verify_ms:>11.1f} | {capacity:>16.1f} | {cpu_share:>9.0%}")
+        if verify_ms <= args.max_ms and cpu_share <= args.cpu_budget:
+            acceptable.append(label)
+
+    if acceptable:
+        # Les candidats sont mesurés par coût croissant : le dernier acceptable est le plus sûr
+        logger.info(f"✅ Configuration recommandée : {acceptable[-1]}")
+    else:
+        logger.info("⚠️ Aucune configuration ne tient dans le budget : augmenter les cœurs ou le budget CPU")
+
+
+if __name__ == "__main__":
+    main()
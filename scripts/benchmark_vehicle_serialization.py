@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Script de benchmark comparant la sérialisation Pydantic de la liste des véhicules
+avec le chemin rapide (tuples de colonnes + orjson).
+Utilisation:
+    python -m scripts.benchmark_vehicle_serialization --sizes 1000 10000
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+
+from pydantic import TypeAdapter
+
+from app.models.vehicle import Vehicle, FuelType, TransmissionType
+from app.schemas.vehicle import VehicleResponse
+from app.services.vehicle_serializer import VEHICLE_FIELDS, serialize_vehicle_rows
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+BRANDS = ["Peugeot", "Renault", "Citroën", "Volkswagen", "Toyota", "BMW"]
+
+
+def build_vehicles(count: int) -> List[Vehicle]:
+    """Génère des véhicules en mémoire, tels que les renverrait l'ORM"""
+    now = datetime.utcnow()
+    vehicles = []
+    for i in range(count):
+        vehicles.append(Vehicle(
+            id=i + 1,
+            brand=random.choice(BRANDS),
+            model=f"Modèle {i % 50}",
+            year=random.randint(2010, 2024),
+            mileage=float(random.randint(0, 200000)),
+            registration_number=f"AB-{i % 1000:03d}-CD",
+            price=float(random.randint(5000, 60000)),
+            monthly_rental_price=float(random.randint(150, 900)),
+            is_available_for_sale=True,
+            is_available_for_rent=bool(i % 2),
+            fuel_type=random.choice(list(FuelType)),
+            transmission=random.choice(list(TransmissionType)),
+            engine_size=1.6,
+            power=random.randint(70, 300),
+            doors=5,
+            seats=5,
+            color="gris",
+            features={"gps": True, "climatisation": True, "radar_recul": bool(i % 3)},
+            images=[f"https://cdn.example.com/vehicles/{i}-{n}.jpg" for n in range(3)],
+            technical_details={"norme": "Euro 6", "boite": "6 rapports"},
+            last_maintenance_date=now - timedelta(days=90),
+            next_maintenance_date=now + timedelta(days=275),
+            created_at=now,
+            updated_at=now,
+        ))
+    return vehicles
+
+
+def pydantic_path(vehicles: List[Vehicle]) -> bytes:
+    """Reproduit le traitement de FastAPI avec response_model=List[VehicleResponse]"""
+    adapter = TypeAdapter(List[VehicleResponse])
+    validated = adapter.validate_python(vehicles, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_path(rows: List[Tuple]) -> bytes:
+    """Chemin rapide : tuples de colonnes encodés avec orjson"""
+    return serialize_vehicle_rows(rows)
+
+
+def measure(func: Callable, data, repeat: int) -> float:
+    """Retourne le meilleur temps d'exécution en millisecondes"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Benchmark de la sérialisation de la liste des véhicules')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='Nombres de véhicules à sérialiser')
+    parser.add_argument('--repeat', type=int, default=5, help='Nombre de répétitions par mesure')
+    args = parser.parse_args()
+
+    logger.info(f"{'Véhicules':>10} | {'Pydantic (ms)':>14} | {'orjson (ms)':>12} | {'Gain':>6}")
+    for size in args.sizes:
+        vehicles = build_vehicles(size)
+        rows = [tuple(getattr(v, field) for field in VEHICLE_FIELDS) for v in vehicles]
+
+        pydantic_ms = measure(pydantic_path, vehicles, args.repeat)
+        fast_ms = measure(fast_path, rows, args.repeat)
+        logger.info(f"{size:>10} | {pydantic_ms:>14.1f} | {fast_ms:>12.1f} | {pydantic_ms / fast_ms:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
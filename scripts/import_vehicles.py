@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Script pour importer en masse des véhicules depuis un flux fournisseur.
+Utilisation:
+    python -m scripts.import_vehicles --input ./flux/stock.csv --format csv
+    python -m scripts.import_vehicles --input ./flux/stock.ndjson --format ndjson --report rapport.json
+"""
+
+import os
+import argparse
+import asyncio
+import logging
+from typing import AsyncIterator
+
+from app.database import async_session_maker
+from app.schemas.vehicle import VehicleFileFormat
+from app.services.vehicle_import import VehicleImporter, iter_records
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1024 * 1024
+
+
+async def read_file(path: str) -> AsyncIterator[bytes]:
+    """Lit le fichier par blocs pour ne jamais le charger entièrement en mémoire"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def import_vehicles(path: str, file_format: VehicleFileFormat, chunk_size: int, report_path: str = None):
+    """Importe les véhicules du fichier et affiche le rapport"""
+    if not os.path.exists(path):
+        logger.error(f"Le fichier {path} n'existe pas.")
+        return
+
+    importer = VehicleImporter(chunk_size=chunk_size)
+    async with async_session_maker() as session:
+        report = await importer.run(session, iter_records(read_file(path), file_format))
+
+    logger.info(
+        f"✅ {report.inserted} véhicules créés, {report.updated} mis à jour, "
+        f"{report.failed} lignes en erreur sur {report.total_rows}"
+    )
+    for error in report.errors[:20]:
+        logger.warning(f"Ligne {error.line} ({error.registration_number or '?'}) : {'; '.join(error.errors)}")
+
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report.model_dump_json(indent=2))
+        logger.info(f"Rapport complet écrit dans {report_path}")
+
+
+async def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Importe des véhicules depuis un fichier CSV ou NDJSON')
+    parser.add_argument('--input', type=str, required=True, help='Fichier à importer')
+    parser.add_argument('--format', type=str, default='csv',
+                        choices=[f.value for f in VehicleFileFormat],
+                        help='Format du fichier')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Nombre de lignes par lot')
+    parser.add_argument('--report', type=str, help='Fichier JSON où écrire le rapport complet')
+
+    args = parser.parse_args()
+
+    logger.info(f"Import des véhicules depuis {args.input} au format {args.format}...")
+    await import_vehicles(args.input, VehicleFileFormat(args.format), args.chunk_size, args.report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
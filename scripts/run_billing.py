@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Script pour générer les lignes de facture mensuelles des locations actives.
+Utilisation:
+    python -m scripts.run_billing
+    python -m scripts.run_billing --period 2026-10 --batch-size 5000 --workers 8
+
+Une facturation interrompue reprend là où elle s'était arrêtée en relançant la même période.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime
+
+from app.config import settings
+from app.services.billing import run_billing
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_period(value: str) -> date:
+    """Mois au format AAAA-MM"""
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Mois invalide : {value} (format attendu AAAA-MM)")
+
+
+async def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Facture un mois de locations actives')
+    parser.add_argument('--period', type=parse_period, default=date.today().replace(day=1),
+                        help='Mois à facturer (AAAA-MM), le mois en cours par défaut')
+    parser.add_argument('--batch-size', type=int, default=settings.BILLING_BATCH_SIZE,
+                        help='Nombre de locations par lot')
+    parser.add_argument('--workers', type=int, default=settings.BILLING_WORKERS,
+                        help='Nombre de processus de calcul')
+
+    args = parser.parse_args()
+    settings.BILLING_BATCH_SIZE = args.batch_size
+    settings.BILLING_WORKERS = args.workers
+
+    run = await run_billing(args.period)
+    logger.info(
+        f"✅ {run.period_start:%m/%Y} : {run.rentals_processed} locations facturées, "
+        f"{run.lines_created} lignes créées"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
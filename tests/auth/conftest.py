@@ -0,0 +1,56 @@
+"""
+Doublures communes aux tests d'authentification.
+"""
+import time
+
+import pytest
+
+from app import security
+
+
+class FakePasswordContext:
+    """Remplace passlib : un hash vaut "<préfixe>:<mot de passe>", et ceux en "old:" sont obsolètes
+
+    delay simule la durée d'un calcul bcrypt, qui relâche le GIL comme lui.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def hash(self, password):
+        time.sleep(self.delay)
+        return f"hash:{password}"
+
+    def verify(self, password, hashed):
+        time.sleep(self.delay)
+        return hashed.split(":", 1)[1] == password
+
+    def needs_update(self, hashed):
+        return hashed.startswith("old:")
+
+
+class FakeRedis:
+    """Sous-ensemble du client Redis asynchrone utilisé par les caches, sur un dictionnaire"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    async def exists(self, *keys):
+        return sum(key in self.values for key in keys)
+
+
+@pytest.fixture
+def password_context(monkeypatch):
+    context = FakePasswordContext()
+    monkeypatch.setattr(security, "pwd_context", context)
+    return context
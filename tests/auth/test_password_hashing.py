@@ -0,0 +1,102 @@
+"""
+Tests du calcul des mots de passe hors de la boucle asyncio.
+"""
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app import security
+from app.config import settings
+from app.models import RefreshToken, User
+from app.routers import auth
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+HASH_DURATION = 0.05
+
+
+@pytest.fixture
+def hasher(monkeypatch, password_context):
+    password_context.delay = HASH_DURATION
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 4)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 16)
+    hasher = PasswordHasher()
+    monkeypatch.setattr(security, "password_hasher", hasher)
+    yield hasher
+    hasher.close()
+
+
+@pytest_asyncio.fixture
+async def session(sqlite_db):
+    database = await sqlite_db([User, RefreshToken], {User: [{
+        "id": 1, "email": "client@m-motors.fr", "hashed_password": "hash:secret", "is_active": True,
+    }]})
+    async with database.session() as session:
+        yield session
+
+
+async def max_loop_lag(task) -> float:
+    """Plus grand retard de la boucle pendant l'exécution de la tâche"""
+    lag = 0.0
+    while not task.done():
+        started = time.monotonic()
+        await asyncio.sleep(0.005)
+        lag = max(lag, time.monotonic() - started - 0.005)
+    await task
+    return lag
+
+
+@pytest.mark.asyncio
+async def test_verifications_run_in_parallel_off_the_loop(hasher):
+    checks = asyncio.gather(*[security.verify_password_async("secret", "hash:secret") for _ in range(8)])
+    started = time.monotonic()
+
+    lag = await max_loop_lag(asyncio.ensure_future(checks))
+
+    assert checks.result() == [True] * 8
+    # 8 calculs sur 4 threads : deux vagues, et la boucle n'est jamais bloquée
+    assert time.monotonic() - started < 4 * HASH_DURATION
+    assert lag < HASH_DURATION / 2
+    stats = hasher.stats()
+    assert stats["completed"] == 8 and stats["in_flight"] == 0
+    assert stats["max_queue_wait_ms"] >= HASH_DURATION * 1000 * 0.8
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_the_limit_are_rejected(hasher, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 5)
+
+    results = await asyncio.gather(
+        *[security.get_password_hash_async("secret") for _ in range(8)], return_exceptions=True
+    )
+
+    assert sum(isinstance(r, PasswordHasherBusy) for r in results) == 3
+    assert hasher.stats()["rejected"] == 3
+
+
+@pytest.mark.asyncio
+async def test_login_verifies_in_pool(hasher, session):
+    form = OAuth2PasswordRequestForm(username="client@m-motors.fr", password="secret")
+    token = await auth.login(form_data=form, db=session)
+    assert token["token_type"] == "bearer"
+
+    form = OAuth2PasswordRequestForm(username="client@m-motors.fr", password="erreur")
+    with pytest.raises(HTTPException) as error:
+        await auth.login(form_data=form, db=session)
+    assert error.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_saturated_login_answers_503(hasher, session, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+
+    form = OAuth2PasswordRequestForm(username="client@m-motors.fr", password="secret")
+    with pytest.raises(HTTPException) as error:
+        await auth.login(form_data=form, db=session)
+
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "1"
+
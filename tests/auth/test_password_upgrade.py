@@ -0,0 +1,83 @@
+"""
+Tests du coût de hash configurable et de la mise à jour des hash à la connexion.
+"""
+import asyncio
+
+import bcrypt
+import pytest
+import pytest_asyncio
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+
+from app import security
+from app.config import settings
+from app.models import RefreshToken, User
+from app.routers import auth
+from app.services.user_cache import UserCache
+
+# Hash bcrypt de coût 4, et le même annoncé avec un coût de 12
+HASH_COST_4 = bcrypt.hashpw(b"secret", bcrypt.gensalt(4)).decode()
+HASH_COST_12 = HASH_COST_4.replace("$04$", "$12$", 1)
+
+
+def test_bcrypt_cost_is_configurable(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_BCRYPT_ROUNDS", 12)
+    context = security.build_password_context("bcrypt")
+
+    assert context.to_dict()["bcrypt__default_rounds"] == 12
+    assert context.needs_update(HASH_COST_4)
+    assert not context.needs_update(HASH_COST_12)
+
+
+def test_argon2_replaces_bcrypt_hashes():
+    context = security.build_password_context("argon2")
+
+    assert context.to_dict()["schemes"] == ["argon2", "bcrypt"]
+    assert context.needs_update(HASH_COST_12)
+
+
+@pytest_asyncio.fixture
+async def session(monkeypatch, sqlite_db, password_context):
+    # Le calcul du nouveau hash prend du temps, comme bcrypt
+    password_context.delay = 0.05
+    monkeypatch.setattr(security, "user_cache", UserCache())
+    database = await sqlite_db([User, RefreshToken], {User: [
+        {"id": 1, "email": "ancien@m-motors.fr", "hashed_password": "old:secret", "is_active": True},
+        {"id": 2, "email": "recent@m-motors.fr", "hashed_password": "hash:secret", "is_active": True},
+    ]})
+    monkeypatch.setattr(security, "async_session_maker", database.session_maker)
+    async with database.session() as session:
+        yield session
+
+
+async def stored_hash(session, user_id):
+    session.expire_all()
+    return (await session.execute(select(User.hashed_password).where(User.id == user_id))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_outdated_hash_is_upgraded_after_login(session):
+    form = OAuth2PasswordRequestForm(username="ancien@m-motors.fr", password="secret")
+
+    assert await auth.login(form_data=form, db=session)
+    # La réponse n'attend pas le nouveau hash
+    assert await stored_hash(session, 1) == "old:secret"
+    await asyncio.gather(*security._rehash_tasks)
+
+    assert await stored_hash(session, 1) == "hash:secret"
+
+
+@pytest.mark.asyncio
+async def test_current_hash_is_left_alone(session):
+    form = OAuth2PasswordRequestForm(username="recent@m-motors.fr", password="secret")
+
+    assert await auth.login(form_data=form, db=session)
+
+    assert not security._rehash_tasks
+
+
+@pytest.mark.asyncio
+async def test_rehash_does_not_overwrite_a_new_password(session):
+    await security.rehash_password(1, "secret", "old:autre")
+
+    assert await stored_hash(session, 1) == "old:secret"
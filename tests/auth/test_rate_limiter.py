@@ -0,0 +1,157 @@
+"""
+Tests de la limitation de débit par seaux à jetons.
+"""
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import security
+from app.config import settings
+from app.database import get_db
+from app.routers import auth
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import RateLimiter, parse_limit
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_REDIS_ENABLED", False)
+    monkeypatch.setattr(settings, "RATE_LIMITS", {
+        "login:ip": "10/minute",
+        "login:account": "3/minute",
+    })
+
+
+@pytest.fixture
+def clock(monkeypatch, limits):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter_module.time, "time", clock)
+    return clock
+
+
+def test_parse_limit():
+    assert parse_limit("5/minute") == (5, 5 / 60)
+    assert parse_limit("30 / hour") == (30, 30 / 3600)
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_over_time(clock):
+    limiter = RateLimiter()
+
+    assert [await limiter.hit("login", account="lea") for _ in range(3)] == [0, 0, 0]
+    assert await limiter.hit("login", account="lea") == pytest.approx(20)
+
+    clock.now += 20
+    assert await limiter.hit("login", account="lea") == 0
+    # Une clé sans limite configurée n'est pas limitée
+    assert await limiter.hit("guest_chat", session="abc") == 0
+
+
+@pytest.mark.asyncio
+async def test_limits_apply_per_key(clock):
+    limiter = RateLimiter()
+
+    for i in range(10):
+        await limiter.hit("login", ip="1.2.3.4", account=f"client{i}")
+
+    assert await limiter.hit("login", ip="1.2.3.4", account="autre") > 0
+    assert await limiter.hit("login", ip="5.6.7.8", account="autre") == 0
+
+
+@pytest.mark.asyncio
+async def test_throttled_ip_does_not_drain_the_account(clock):
+    """Les essais refusés sur l'IP ne consomment pas les jetons du compte visé"""
+    limiter = RateLimiter()
+    for i in range(10):
+        await limiter.hit("login", ip="1.2.3.4", account=f"client{i}")
+
+    for _ in range(20):
+        assert await limiter.hit("login", ip="1.2.3.4", account="victime") > 0
+
+    assert [await limiter.hit("login", ip="5.6.7.8", account="victime") for _ in range(3)] == [0, 0, 0]
+
+
+@pytest.fixture
+def redis_server():
+    """Serveur Redis simulé qui exécute réellement les scripts Lua"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeServer()
+
+
+def redis_client(server):
+    from fakeredis.aioredis import FakeRedis
+
+    return FakeRedis(server=server)
+
+
+@pytest.mark.asyncio
+async def test_redis_buckets_are_shared_between_workers(limits, redis_server):
+    workers = [RateLimiter(redis_client=redis_client(redis_server)) for _ in range(2)]
+
+    results = [await workers[i % 2].hit("login", account="lea") for i in range(4)]
+
+    assert results[:3] == [0, 0, 0]
+    # 3 requêtes par minute : un jeton revient en 20 secondes
+    assert results[3] == pytest.approx(20, abs=0.5)
+    # Le script date le seau avec l'heure du serveur Redis
+    bucket = await redis_client(redis_server).hgetall("ratelimit:login:account:lea")
+    assert abs(float(bucket[b"ts"]) - time.time()) < 5
+    assert float(bucket[b"tokens"]) < 1
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_memory_when_redis_is_down(clock, redis_server):
+    redis_server.connected = False
+    limiter = RateLimiter(redis_client=redis_client(redis_server))
+
+    assert [await limiter.hit("login", account="lea") for _ in range(2)] == [0, 0]
+    redis_server.connected = True
+    results = [await limiter.hit("login", account="lea") for _ in range(2)]
+
+    assert results[0] == 0 and results[1] > 0
+    # Redis n'est pas réessayé à chaque requête : les seaux sont restés en mémoire
+    assert await redis_client(redis_server).keys() == []
+
+
+class FakeSession:
+    def __init__(self):
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+
+        class Result:
+            def scalar_one_or_none(self):
+                return None
+        return Result()
+
+
+def test_login_is_rejected_before_any_query(clock, monkeypatch):
+    monkeypatch.setattr(security, "rate_limiter", RateLimiter())
+    session = FakeSession()
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.dependency_overrides[get_db] = lambda: session
+    client = TestClient(app)
+
+    statuses = [
+        client.post("/auth/login", data={"username": "Lea@m-motors.fr", "password": "x"}).status_code
+        for _ in range(3)
+    ]
+    response = client.post("/auth/login", data={"username": "lea@m-motors.fr", "password": "x"})
+
+    assert statuses == [401] * 3
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "20"
+    assert session.queries == 3
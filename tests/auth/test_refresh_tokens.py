@@ -0,0 +1,116 @@
+"""
+Tests des jetons de renouvellement et de la liste de révocation.
+"""
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
+from sqlalchemy import select, update
+
+from app import security
+from app.config import settings
+from app.models import RefreshToken, User
+from app.routers import auth
+from app.schemas import RefreshRequest
+from app.services import refresh_tokens
+from app.services.token_revocation import TokenRevocationList
+from app.services.user_cache import UserCache
+
+from .conftest import FakeRedis
+
+
+@pytest_asyncio.fixture
+async def db(monkeypatch, sqlite_db, password_context):
+    monkeypatch.setattr(security, "user_cache", UserCache())
+    revocations = TokenRevocationList(redis_client=FakeRedis())
+    for module in (security, auth, refresh_tokens):
+        monkeypatch.setattr(module, "token_revocations", revocations)
+
+    database = await sqlite_db([User, RefreshToken], {User: [{
+        "id": 1, "email": "client@m-motors.fr", "hashed_password": "hash:secret", "is_active": True,
+    }]})
+    async with database.session() as session:
+        yield session, database.queries, revocations
+
+
+async def login(session):
+    form = OAuth2PasswordRequestForm(username="client@m-motors.fr", password="secret")
+    return await auth.login(form_data=form, db=session)
+
+
+async def refresh(session, refresh_token):
+    return await auth.refresh(RefreshRequest(refresh_token=refresh_token), db=session)
+
+
+async def assert_rejected(coroutine):
+    with pytest.raises(HTTPException) as error:
+        await coroutine
+    assert error.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_tokens(db):
+    session, _, _ = db
+    tokens = await login(session)
+
+    renewed = await refresh(session, tokens["refresh_token"])
+
+    assert renewed["refresh_token"] != tokens["refresh_token"]
+    user = await security.get_current_user(renewed["access_token"], session)
+    assert user.email == "client@m-motors.fr"
+    stored = (await session.execute(select(RefreshToken).order_by(RefreshToken.id))).scalars().all()
+    # Seule l'empreinte est conservée, et le jeton présenté est consommé
+    assert tokens["refresh_token"] not in {token.token_hash for token in stored}
+    assert [token.revoked_at is not None for token in stored] == [True, False]
+    assert len({token.family_id for token in stored}) == 1
+
+
+@pytest.mark.asyncio
+async def test_reused_refresh_token_revokes_the_session(db):
+    session, queries, _ = db
+    tokens = await login(session)
+    renewed = await refresh(session, tokens["refresh_token"])
+
+    await assert_rejected(refresh(session, tokens["refresh_token"]))
+
+    await assert_rejected(refresh(session, renewed["refresh_token"]))
+    queries.clear()
+    await assert_rejected(security.get_current_user(renewed["access_token"], session))
+    # Rejeté par la liste de révocation, sans requête en base
+    assert queries == []
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_immediately(db):
+    session, _, revocations = db
+    tokens = await login(session)
+    other_login = await login(session)
+    user = await security.get_current_user(tokens["access_token"], session)
+
+    await auth.logout(token=tokens["access_token"], db=session, current_user=user)
+
+    await assert_rejected(security.get_current_user(tokens["access_token"], session))
+    await assert_rejected(refresh(session, tokens["refresh_token"]))
+    # Les autres connexions de l'utilisateur restent valables
+    assert await security.get_current_user(other_login["access_token"], session)
+    # Les autres workers voient la révocation via Redis
+    other_worker = TokenRevocationList(redis_client=revocations.redis)
+    payload = jwt.decode(tokens["access_token"], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    assert await other_worker.is_revoked(payload["jti"], payload["sid"])
+
+
+@pytest.mark.asyncio
+async def test_expired_or_outdated_refresh_token_is_rejected(db):
+    session, _, _ = db
+    tokens = await login(session)
+    await session.execute(update(RefreshToken).values(expires_at=refresh_tokens.utcnow() - timedelta(seconds=1)))
+    await session.commit()
+    await assert_rejected(refresh(session, tokens["refresh_token"]))
+
+    tokens = await login(session)
+    await session.execute(update(User).values(token_version=User.token_version + 1))
+    await session.commit()
+    await assert_rejected(refresh(session, tokens["refresh_token"]))
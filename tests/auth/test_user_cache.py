@@ -0,0 +1,94 @@
+"""
+Tests du cache de l'utilisateur authentifié.
+"""
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app import security
+from app.models import User
+from app.routers import admin
+from app.schemas import UserAdminUpdate
+from app.services.user_cache import UserCache
+
+from .conftest import FakeRedis
+
+
+@pytest_asyncio.fixture
+async def db(sqlite_db):
+    database = await sqlite_db([User], {User: [
+        {"id": 1, "email": "admin@m-motors.fr", "first_name": "Paul", "is_admin": True, "is_active": True},
+        {"id": 2, "email": "client@m-motors.fr", "first_name": "Léa", "is_admin": False, "is_active": True},
+    ]})
+    async with database.session() as session:
+        yield session, database.queries
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = UserCache(redis_client=FakeRedis())
+    monkeypatch.setattr(security, "user_cache", cache)
+    monkeypatch.setattr(admin, "user_cache", cache)
+    return cache
+
+
+def token(email, version=0):
+    return security.create_access_token({"sub": email, "ver": version})
+
+
+@pytest.mark.asyncio
+async def test_user_is_read_once_per_ttl(db, cache):
+    session, queries = db
+
+    for _ in range(5):
+        user = await security.get_current_user(token("client@m-motors.fr"), session)
+
+    assert len(queries) == 1
+    assert user.id == 2 and user.first_name == "Léa" and not user.is_admin
+    assert user in session
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_is_shared_between_workers(db, cache):
+    session, queries = db
+    await cache.get_user(session, "client@m-motors.fr", 0)
+    other_worker = UserCache(redis_client=cache.redis)
+
+    user = await other_worker.get_user(session, "client@m-motors.fr", 0)
+
+    assert len(queries) == 1
+    assert user.email == "client@m-motors.fr"
+    assert all("hashed_password" not in value for value in cache.redis.values.values())
+
+
+@pytest.mark.asyncio
+async def test_deactivation_revokes_cached_tokens(db, cache):
+    session, _ = db
+    admin_user = await security.get_current_user(token("admin@m-motors.fr"), session)
+    old_token = token("client@m-motors.fr")
+    await security.get_current_user(old_token, session)
+
+    updated = await admin.update_user(
+        2, UserAdminUpdate(is_active=False), db=session, current_user=admin_user
+    )
+
+    assert updated.token_version == 1 and cache.redis.values.keys() == {"user:admin@m-motors.fr:0"}
+    with pytest.raises(HTTPException) as error:
+        await security.get_current_user(old_token, session)
+    assert error.value.status_code == 401
+
+    user = await security.get_current_user(token("client@m-motors.fr", 1), session)
+    with pytest.raises(HTTPException):
+        await security.get_current_active_user(user)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_user_keeps_its_tokens(db, cache):
+    session, _ = db
+    admin_user = await security.get_current_user(token("admin@m-motors.fr"), session)
+
+    updated = await admin.update_user(
+        2, UserAdminUpdate(is_active=True, is_admin=False), db=session, current_user=admin_user
+    )
+
+    assert updated.token_version == 0
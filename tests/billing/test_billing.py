@@ -0,0 +1,131 @@
+"""
+Tests de la facturation mensuelle des locations, sur une base SQLite en mémoire.
+"""
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models import (
+    BillingRun, Dossier, InvoiceLine, Rental, RentalService, User, Vehicle, dossier_rental_services
+)
+from app.models.billing import BillingRunStatus
+from app.models.dossier import DossierStatus, DossierType
+from app.models.rental import RentalStatus
+from app.schemas import ServiceStatus, ServiceType
+from app.services import billing
+from app.services.billing import compute_invoice_lines, run_billing
+
+RENTAL_COUNT = 40
+OCTOBER = (date(2026, 10, 1), date(2026, 11, 1))
+
+
+@pytest_asyncio.fixture
+async def session_maker(monkeypatch, sqlite_db):
+    monkeypatch.setattr(settings, "BILLING_BATCH_SIZE", 7)
+    monkeypatch.setattr(settings, "BILLING_WORKERS", 2)
+    now = datetime(2026, 1, 1)
+    database = await sqlite_db(
+        [User, Vehicle, Rental, Dossier, RentalService, dossier_rental_services, BillingRun, InvoiceLine],
+        {
+            User: [{"id": 1, "email": "client@m-motors.fr"}],
+            Vehicle: [{
+                "id": i, "brand": "Renault", "model": "Clio", "registration_number": f"BB-{i:03d}-BB",
+                "price": 14000.0, "monthly_rental_price": 310.0, "engine_size": 1.0,
+                "features": {}, "images": [], "technical_details": {},
+            } for i in range(1, RENTAL_COUNT + 1)],
+            Rental: [{
+                "id": i, "user_id": 1, "vehicle_id": i,
+                # La location 1 commence au milieu du mois, la dernière est annulée
+                "start_date": datetime(2026, 10, 16) if i == 1 else datetime(2026, 1, 1),
+                "end_date": datetime(2027, 1, 1),
+                "status": RentalStatus.CANCELLED if i == RENTAL_COUNT else RentalStatus.ACTIVE,
+            } for i in range(1, RENTAL_COUNT + 1)],
+            RentalService: [{
+                "id": 1, "type": ServiceType.ASSURANCE, "name": "Assurance", "description": "Tous risques",
+                "price_per_month": 40.0, "duration_months": 12, "terms_and_conditions": "CG",
+                "status": ServiceStatus.ACTIF, "created_at": now, "updated_at": now,
+            }],
+            Dossier: [{
+                "id": 1, "user_id": 1, "vehicle_id": 2, "type": DossierType.LOCATION, "status": DossierStatus.ACCEPTE,
+                "monthly_income": 3000.0, "employment_contract_type": "CDI", "employer_name": "ACME",
+                "employment_start_date": now, "documents": [], "created_at": now, "updated_at": now,
+            }],
+            dossier_rental_services: [
+                {"dossier_id": 1, "service_id": 1, "monthly_price": 40.0, "start_date": now,
+                 "end_date": datetime(2027, 1, 1)}
+            ],
+        },
+    )
+    return database.session_maker
+
+
+async def invoice_lines(session_maker):
+    async with session_maker() as db:
+        return (await db.execute(select(InvoiceLine).order_by(InvoiceLine.rental_id, InvoiceLine.line_type))).scalars().all()
+
+
+def test_lines_are_prorated_over_the_month():
+    rentals = [
+        (1, date(2026, 10, 16), date(2027, 1, 1), 1, "Clio", 310.0, []),
+        (2, date(2026, 1, 1), None, 2, "Clio", 310.0, [(1, "Assurance", 40.0, date(2026, 1, 1), date(2026, 10, 11))]),
+        (3, date(2026, 11, 1), date(2027, 1, 1), 3, "Clio", 310.0, []),
+    ]
+
+    lines = compute_invoice_lines(rentals, *OCTOBER)
+
+    assert [(l["rental_id"], l["line_type"], l["amount"]) for l in lines] == [
+        (1, "VEHICULE", 160.0),
+        (2, "VEHICULE", 310.0),
+        (2, "SERVICE", 12.9),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_bills_active_rentals_once(session_maker):
+    run = await run_billing(date(2026, 10, 20), session_maker)
+
+    assert run.status == BillingRunStatus.TERMINEE
+    assert run.period_start == OCTOBER[0]
+    assert run.rentals_processed == RENTAL_COUNT - 1
+    lines = await invoice_lines(session_maker)
+    assert len(lines) == run.lines_created == RENTAL_COUNT
+    assert sum(line.amount for line in lines) == 160.0 + 38 * 310.0 + 40.0
+
+    again = await run_billing(date(2026, 10, 1), session_maker)
+    assert again.id == run.id
+    assert len(await invoice_lines(session_maker)) == RENTAL_COUNT
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_resumes_from_checkpoint(session_maker, monkeypatch):
+    """Une facturation interrompue reprend après le dernier lot enregistré, sans doublon"""
+    insert_lines = billing._insert_lines
+    calls = []
+
+    async def failing_insert(db, run_id, lines):
+        calls.append(len(lines))
+        if len(calls) == 3:
+            raise RuntimeError("connexion perdue")
+        return await insert_lines(db, run_id, lines)
+
+    monkeypatch.setattr(billing, "_insert_lines", failing_insert)
+    with pytest.raises(RuntimeError):
+        await run_billing(OCTOBER[0], session_maker)
+
+    async with session_maker() as db:
+        run = (await db.execute(select(BillingRun))).scalar_one()
+        assert run.status == BillingRunStatus.ECHOUEE
+        assert run.last_rental_id == 14
+        assert run.error == "connexion perdue"
+
+    monkeypatch.setattr(billing, "_insert_lines", insert_lines)
+    run = await run_billing(OCTOBER[0], session_maker)
+
+    assert run.status == BillingRunStatus.TERMINEE
+    assert run.rentals_processed == RENTAL_COUNT - 1
+    async with session_maker() as db:
+        count = (await db.execute(select(func.count()).select_from(InvoiceLine))).scalar()
+    assert count == RENTAL_COUNT
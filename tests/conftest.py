@@ -0,0 +1,59 @@
+"""
+Configuration commune des tests : types PostgreSQL traduits pour SQLite
+et fabrique de bases SQLite en mémoire.
+"""
+import pytest_asyncio
+from sqlalchemy import event, insert
+from sqlalchemy.dialects.postgresql import ExcludeConstraint, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+
+
+@compiles(JSONB, "sqlite")
+def compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(ExcludeConstraint, "sqlite")
+def compile_exclude_sqlite(constraint, compiler, **kw):
+    # Contrainte d'exclusion GiST sans équivalent SQLite : ignorée
+    return None
+
+
+class SQLiteDatabase:
+    """Base SQLite en mémoire, avec le relevé des requêtes émises après le peuplement"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self.queries = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: self.queries.append(args[2]))
+
+    def session(self) -> AsyncSession:
+        return self.session_maker()
+
+
+@pytest_asyncio.fixture
+async def sqlite_db():
+    """
+    Fabrique de bases SQLite : sqlite_db(tables, rows) crée les tables (modèles ou tables)
+    puis insère les lignes, données par modèle dans l'ordre des clés étrangères.
+    """
+    engines = []
+
+    async def create(tables, rows=None) -> SQLiteDatabase:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        engines.append(engine)
+        tables = [getattr(table, "__table__", table) for table in tables]
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=tables))
+            for model, values in (rows or {}).items():
+                await conn.execute(insert(model), values)
+        return SQLiteDatabase(engine)
+
+    yield create
+    for engine in engines:
+        await engine.dispose()
@@ -0,0 +1,61 @@
+"""
+Base SQLite en mémoire peuplée de dossiers, pour les tests des listes de dossiers.
+"""
+from datetime import datetime, timedelta
+
+import pytest_asyncio
+
+from app.models import (
+    User, Vehicle, Dossier, RentalOption, RentalService, EmailOutbox,
+    dossier_rental_options, dossier_rental_services
+)
+from app.models.dossier import DossierStatus, DossierType
+from app.schemas import ServiceStatus, ServiceType
+
+DOSSIER_COUNT = 500
+
+
+@pytest_asyncio.fixture
+async def db(sqlite_db):
+    now = datetime(2024, 1, 1)
+    database = await sqlite_db(
+        [User, Vehicle, Dossier, RentalOption, RentalService,
+         dossier_rental_options, dossier_rental_services, EmailOutbox],
+        {
+            User: [{"id": 1, "email": "admin@m-motors.fr", "is_admin": True}],
+            RentalOption: [
+                {"id": 1, "name": "GPS", "monthly_price": 10.0},
+                {"id": 2, "name": "Siège bébé", "monthly_price": 5.0},
+            ],
+            RentalService: [{
+                "id": 1, "type": ServiceType.ASSURANCE, "name": "Assurance", "description": "Tous risques",
+                "price_per_month": 40.0, "duration_months": 12, "terms_and_conditions": "CG",
+                "status": ServiceStatus.ACTIF, "created_at": now, "updated_at": now,
+            }],
+            Vehicle: [{
+                "id": i, "brand": "Peugeot", "model": "308", "registration_number": f"AA-{i:03d}-AA",
+                "price": 15000.0 + i * 10, "monthly_rental_price": 300.0, "engine_size": 1.2,
+                "features": {}, "images": [], "technical_details": {},
+            } for i in range(1, DOSSIER_COUNT + 1)],
+            Dossier: [{
+                "id": i, "user_id": 1, "vehicle_id": i, "type": DossierType.LOCATION,
+                "status": DossierStatus.EN_ATTENTE if i % 2 else DossierStatus.EN_COURS_DE_TRAITEMENT,
+                "monthly_income": 1500.0 + (i * 37) % 40 * 100, "employment_contract_type": "CDI",
+                "employer_name": "ACME", "employment_start_date": now, "documents": [], "updated_at": now,
+                # Dates volontairement non monotones, avec des ex aequo
+                "created_at": now + timedelta(minutes=(i * 7) % 13),
+            } for i in range(1, DOSSIER_COUNT + 1)],
+            dossier_rental_options: [
+                {"dossier_id": i, "rental_option_id": option_id}
+                for i in range(1, DOSSIER_COUNT + 1) for option_id in (1, 2)
+            ],
+            dossier_rental_services: [
+                {"dossier_id": i, "service_id": 1, "monthly_price": 40.0, "start_date": now, "end_date": now}
+                for i in range(1, DOSSIER_COUNT + 1)
+            ],
+        },
+    )
+    async with database.session() as session:
+        admin_user = await session.get(User, 1)
+        database.queries.clear()
+        yield session, admin_user, database.queries
@@ -0,0 +1,182 @@
+"""
+Tests de la réservation des dossiers par les agents du back-office.
+"""
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql
+
+from app.models import Dossier, User
+from app.models.dossier import DossierStatus, utcnow
+from app.routers import admin
+from app.services.dossier_queue import claim_dossiers, extend_claim, release_dossier, requeue_dossier
+
+from .conftest import DOSSIER_COUNT
+
+
+async def statuses(session, ids):
+    result = await session.execute(
+        select(Dossier.id, Dossier.status, Dossier.claimed_by).where(Dossier.id.in_(ids))
+    )
+    return {row.id: (row.status, row.claimed_by) for row in result}
+
+
+@pytest.mark.asyncio
+async def test_agents_claim_disjoint_batches_oldest_first(db):
+    """Deux agents reçoivent des dossiers différents, pris parmi les plus anciens en attente"""
+    session, _, _ = db
+
+    first = await claim_dossiers(session, agent_id=1, limit=10)
+    second = await claim_dossiers(session, agent_id=2, limit=10)
+
+    assert len(first) == len(second) == 10
+    assert not set(first) & set(second)
+    claimed = await statuses(session, first + second)
+    assert all(status == DossierStatus.EN_COURS_DE_TRAITEMENT for status, _ in claimed.values())
+    assert {claimed[i][1] for i in first} == {1}
+
+    # Les dossiers déjà en cours sans réservation ne sont jamais repris
+    assert all(i % 2 == 1 for i in first + second)
+    result = await session.execute(
+        select(Dossier.created_at).where(Dossier.status == DossierStatus.EN_ATTENTE).order_by(Dossier.created_at).limit(1)
+    )
+    oldest_remaining = result.scalar_one()
+    result = await session.execute(select(Dossier.created_at).where(Dossier.id.in_(first)))
+    assert all(created_at <= oldest_remaining for created_at in result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_expired_claims_are_reclaimed_first(db):
+    """Une réservation expirée est reprise par l'agent suivant"""
+    session, _, _ = db
+    abandoned = await claim_dossiers(session, agent_id=1, limit=2)
+    await session.execute(
+        update(Dossier).where(Dossier.id == abandoned[0]).values(claim_expires_at=utcnow() - timedelta(minutes=1))
+    )
+    await session.commit()
+
+    reclaimed = await claim_dossiers(session, agent_id=2, limit=2)
+
+    assert reclaimed[0] == abandoned[0]
+    assert abandoned[1] not in reclaimed
+    assert (await statuses(session, [abandoned[0]]))[abandoned[0]][1] == 2
+
+
+@pytest.mark.asyncio
+async def test_only_owner_can_extend_or_release(db):
+    """Seul l'agent qui détient la réservation peut la prolonger ou la rendre"""
+    session, _, _ = db
+    [dossier_id] = await claim_dossiers(session, agent_id=1, limit=1)
+
+    assert await extend_claim(session, dossier_id, agent_id=2) is None
+    assert await extend_claim(session, dossier_id, agent_id=1) is not None
+    assert await release_dossier(session, dossier_id, agent_id=2) is False
+    assert await release_dossier(session, dossier_id, agent_id=1) is True
+
+    assert (await statuses(session, [dossier_id]))[dossier_id] == (DossierStatus.EN_ATTENTE, None)
+
+
+class RecordingSession:
+    """Session qui conserve les requêtes sans les exécuter"""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+        class Result:
+            def scalars(self):
+                return iter([])
+        return Result()
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_claim_skips_rows_locked_by_other_agents():
+    """SQLite ignore les verrous : on vérifie la requête PostgreSQL des réservations concurrentes"""
+    session = RecordingSession()
+
+    await claim_dossiers(session, agent_id=1, limit=5)
+
+    for statement in session.statements:
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE dossiers SET status=")
+        assert "LIMIT %(param_1)s FOR UPDATE SKIP LOCKED)" in sql
+        assert sql.endswith("RETURNING dossiers.id")
+
+
+async def set_status(session, dossier_id, user):
+    return await admin.update_dossier_status(
+        dossier_id, new_status=DossierStatus.ACCEPTE, admin_comments=None, db=session, current_user=user
+    )
+
+
+@pytest.mark.asyncio
+async def test_status_change_requires_a_valid_claim(db):
+    """Seul l'agent qui détient une réservation encore valable peut changer le statut"""
+    session, admin_user, _ = db
+    other_agent = User(id=2, email="agent@m-motors.fr", is_admin=True)
+    [dossier_id] = await claim_dossiers(session, agent_id=admin_user.id, limit=1)
+    unclaimed = dossier_id + 2
+
+    for dossier, user in ((dossier_id, other_agent), (unclaimed, admin_user)):
+        with pytest.raises(HTTPException) as error:
+            await set_status(session, dossier, user)
+        assert error.value.status_code == 409
+
+    await session.execute(
+        update(Dossier).where(Dossier.id == dossier_id).values(claim_expires_at=utcnow() - timedelta(seconds=1))
+    )
+    await session.commit()
+    with pytest.raises(HTTPException) as error:
+        await set_status(session, dossier_id, admin_user)
+    assert error.value.status_code == 409
+
+    await extend_claim(session, dossier_id, agent_id=admin_user.id)
+    assert (await set_status(session, dossier_id, admin_user)).status == DossierStatus.ACCEPTE
+
+
+async def request_documents(session, dossier_id, user):
+    return await admin.request_additional_documents(
+        dossier_id, document_types=["RIB"], message="Merci", db=session, current_user=user
+    )
+
+
+@pytest.mark.asyncio
+async def test_document_request_requires_a_claim_and_ends_it(db):
+    """La demande de documents vérifie la réservation comme un changement de statut, puis la libère"""
+    session, admin_user, _ = db
+    other_agent = User(id=2, email="agent@m-motors.fr", is_admin=True)
+    [dossier_id] = await claim_dossiers(session, agent_id=admin_user.id, limit=1)
+
+    for dossier, user in ((dossier_id, other_agent), (dossier_id + 2, admin_user)):
+        with pytest.raises(HTTPException) as error:
+            await request_documents(session, dossier, user)
+        assert error.value.status_code == 409
+
+    await request_documents(session, dossier_id, admin_user)
+
+    dossier = await session.get(Dossier, dossier_id)
+    assert dossier.status == DossierStatus.DOCUMENTS_MANQUANTS
+    assert (dossier.claimed_by, dossier.claimed_at, dossier.claim_expires_at) == (None, None, None)
+
+
+@pytest.mark.asyncio
+async def test_dossier_missing_documents_can_be_accepted_once_completed(db):
+    """Les documents reçus remettent le dossier dans la file, où un agent le reprend et l'accepte"""
+    session, admin_user, _ = db
+    [dossier_id] = await claim_dossiers(session, agent_id=admin_user.id, limit=1)
+    await request_documents(session, dossier_id, admin_user)
+    assert dossier_id not in await claim_dossiers(session, agent_id=admin_user.id, limit=DOSSIER_COUNT)
+
+    assert await requeue_dossier(session, dossier_id) is True
+    await session.commit()
+    assert await requeue_dossier(session, dossier_id) is False
+
+    assert dossier_id in await claim_dossiers(session, agent_id=admin_user.id, limit=DOSSIER_COUNT)
+    assert (await set_status(session, dossier_id, admin_user)).status == DossierStatus.ACCEPTE
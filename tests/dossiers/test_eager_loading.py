@@ -0,0 +1,31 @@
+"""
+Tests du chargement des options et services avec les listes de dossiers.
+"""
+import pytest
+from fastapi import Response
+
+from app.routers import admin, dossiers
+from app.schemas import DossierFilter, DossierPagination
+
+from .conftest import DOSSIER_COUNT
+
+PAGE = DossierPagination(limit=DOSSIER_COUNT)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("endpoint, expected", [
+    (lambda db, user: dossiers.list_dossiers(response=Response(), filter=DossierFilter(), page=PAGE, db=db, current_user=user), DOSSIER_COUNT),
+    (lambda db, user: dossiers.list_my_dossiers(response=Response(), status=None, page=PAGE, db=db, current_user=user), DOSSIER_COUNT),
+    (lambda db, user: admin.list_pending_dossiers(response=Response(), page=PAGE, db=db, current_user=user), DOSSIER_COUNT // 2),
+    (lambda db, user: admin.list_in_progress_dossiers(response=Response(), page=PAGE, db=db, current_user=user), DOSSIER_COUNT // 2),
+], ids=["list_dossiers", "list_my_dossiers", "list_pending_dossiers", "list_in_progress_dossiers"])
+async def test_listing_uses_constant_number_of_queries(db, endpoint, expected):
+    """Les options et services de 500 dossiers sont chargés en 3 requêtes au plus"""
+    session, admin_user, queries = db
+
+    responses = await endpoint(session, admin_user)
+
+    assert len(responses) == expected
+    assert all(len(r.rental_options) == 2 and len(r.rental_services) == 1 for r in responses)
+    assert responses[0].rental_services[0].name == "Assurance"
+    assert len(queries) <= 3
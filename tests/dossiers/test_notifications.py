@@ -0,0 +1,128 @@
+"""
+Tests de la file d'emails envoyés lors des changements de statut des dossiers.
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.models import EmailOutbox
+from app.models.dossier import DossierStatus
+from app.models.email_outbox import EmailStatus
+from app.routers import admin, dossiers
+from app.schemas import DossierUpdate
+from app.services import email_outbox as outbox
+from app.services.dossier_queue import claim_dossiers
+from app.services.email_outbox import EmailOutboxWorker, enqueue_email, retry_delay
+
+
+class FakeMailer:
+    def __init__(self):
+        self.messages = []
+        self.fail = False
+
+    async def send_many(self, messages):
+        self.messages.extend(messages)
+        return [not self.fail] * len(messages)
+
+
+@pytest.fixture
+def mailer(monkeypatch):
+    mailer = FakeMailer()
+    monkeypatch.setattr(outbox, "mailer", mailer)
+    return mailer
+
+
+async def outbox_rows(session):
+    result = await session.execute(select(EmailOutbox).order_by(EmailOutbox.id))
+    return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_status_change_enqueues_email(db, mailer):
+    """Le changement de statut écrit l'email sans l'envoyer"""
+    session, admin_user, _ = db
+    accepted, incomplete = await claim_dossiers(session, agent_id=admin_user.id, limit=2)
+
+    await admin.update_dossier_status(
+        accepted, new_status=DossierStatus.ACCEPTE, admin_comments="Bonne route !", db=session, current_user=admin_user
+    )
+    await admin.request_additional_documents(
+        incomplete, document_types=["RIB"], message="Merci", db=session, current_user=admin_user
+    )
+
+    emails = await outbox_rows(session)
+    assert [e.recipient for e in emails] == ["admin@m-motors.fr"] * 2
+    assert "accepté" in emails[0].body and "Bonne route !" in emails[0].body
+    assert "RIB" in emails[1].body
+    assert all(e.status == EmailStatus.EN_ATTENTE for e in emails)
+    assert mailer.messages == []
+
+
+@pytest.mark.asyncio
+async def test_dossier_update_never_changes_the_status_silently(db, mailer):
+    """Le PATCH d'un dossier ignore le statut : seul l'endpoint admin le change et prévient le client"""
+    session, admin_user, _ = db
+
+    response = await dossiers.update_dossier(
+        1, DossierUpdate(status=DossierStatus.ACCEPTE, comments="Vu"), db=session, current_user=admin_user
+    )
+
+    assert response.status == DossierStatus.EN_ATTENTE
+    assert response.comments == "Vu"
+    assert await outbox_rows(session) == []
+
+
+@pytest.mark.asyncio
+async def test_email_is_dropped_with_its_transaction(db):
+    session, _, _ = db
+
+    enqueue_email(session, "client@m-motors.fr", "Sujet", "Corps")
+    await session.rollback()
+
+    assert await outbox_rows(session) == []
+
+
+@pytest.mark.asyncio
+async def test_worker_sends_in_batches(db, mailer, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 10)
+    session, _, _ = db
+    for i in range(25):
+        enqueue_email(session, f"client{i}@m-motors.fr", "Sujet", "Corps")
+    await session.commit()
+    worker = EmailOutboxWorker()
+
+    assert [await worker.drain_batch(session) for _ in range(4)] == [10, 10, 5, 0]
+
+    assert len(mailer.messages) == 25
+    emails = await outbox_rows(session)
+    assert all(e.status == EmailStatus.ENVOYE and e.sent_at for e in emails)
+
+
+@pytest.mark.asyncio
+async def test_failed_email_is_retried_with_backoff(db, mailer, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 3)
+    session, _, _ = db
+    enqueue_email(session, "client@m-motors.fr", "Sujet", "Corps")
+    await session.commit()
+    worker = EmailOutboxWorker()
+    mailer.fail = True
+
+    assert await worker.drain_batch(session) == 1
+    email = (await outbox_rows(session))[0]
+    assert email.status == EmailStatus.EN_ATTENTE and email.attempts == 1
+    # La tentative suivante attend la fin du délai
+    assert await worker.drain_batch(session) == 0
+
+    for _ in range(2):
+        await session.execute(update(EmailOutbox).values(next_attempt_at=email.created_at))
+        await session.commit()
+        assert await worker.drain_batch(session) == 1
+    await session.refresh(email)
+    assert email.status == EmailStatus.ECHOUE and email.attempts == 3
+
+
+def test_retry_delay_doubles_up_to_the_cap():
+    assert [retry_delay(n).total_seconds() for n in (1, 2, 3)] == [30, 60, 120]
+    assert retry_delay(20) == timedelta(seconds=settings.EMAIL_OUTBOX_MAX_RETRY_DELAY)
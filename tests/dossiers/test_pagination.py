@@ -0,0 +1,102 @@
+"""
+Tests de la pagination par curseur des listes de dossiers.
+"""
+import pytest
+from fastapi import HTTPException, Response
+
+from app.routers import admin
+from app.schemas import DossierPagination, DossierSort
+from app.schemas.dossier import DEFAULT_PAGE_SIZE
+
+from .conftest import DOSSIER_COUNT
+
+
+async def walk_pending(db, user, **page):
+    """Parcourt toutes les pages de la file d'attente en suivant le curseur"""
+    seen, cursor, pages = [], None, 0
+    while True:
+        response = Response()
+        dossiers = await admin.list_pending_dossiers(
+            response=response,
+            page=DossierPagination(cursor=cursor, **page),
+            db=db,
+            current_user=user
+        )
+        seen.extend(dossiers)
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return seen, pages
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", [DossierSort.OLDEST, DossierSort.NEWEST])
+async def test_pages_cover_queue_once_in_order(db, sort):
+    """Les pages successives couvrent toute la file, sans doublon, dans l'ordre demandé"""
+    session, admin_user, _ = db
+
+    dossiers, pages = await walk_pending(session, admin_user, limit=60, sort=sort)
+
+    keys = [(d.created_at, d.id) for d in dossiers]
+    assert len(keys) == DOSSIER_COUNT // 2
+    assert len(set(keys)) == len(keys)
+    assert keys == sorted(keys, reverse=sort == DossierSort.NEWEST)
+    assert pages == 5
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_cursor(db):
+    """Une page incomplète ne renvoie pas de curseur"""
+    session, admin_user, _ = db
+    response = Response()
+
+    dossiers = await admin.list_pending_dossiers(
+        response=response, page=DossierPagination(limit=DOSSIER_COUNT), db=session, current_user=admin_user
+    )
+
+    assert len(dossiers) == DOSSIER_COUNT // 2
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_unpaginated_request_returns_whole_list(db):
+    """Sans cursor ni limit, les clients existants reçoivent toujours toute la liste"""
+    session, admin_user, _ = db
+    response = Response()
+
+    dossiers = await admin.list_pending_dossiers(
+        response=response, page=DossierPagination(), db=session, current_user=admin_user
+    )
+
+    assert len(dossiers) == DOSSIER_COUNT // 2
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_cursor_alone_uses_default_page_size(db):
+    """Un curseur sans limit renvoie des pages de taille par défaut"""
+    session, admin_user, _ = db
+    first_page = Response()
+    await admin.list_pending_dossiers(
+        response=first_page, page=DossierPagination(limit=1), db=session, current_user=admin_user
+    )
+
+    dossiers = await admin.list_pending_dossiers(
+        response=Response(), page=DossierPagination(cursor=first_page.headers["X-Next-Cursor"]),
+        db=session, current_user=admin_user
+    )
+
+    assert len(dossiers) == DEFAULT_PAGE_SIZE
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(db):
+    """Un curseur illisible produit une erreur 400"""
+    session, admin_user, _ = db
+
+    with pytest.raises(HTTPException) as exc:
+        await admin.list_pending_dossiers(
+            response=Response(), page=DossierPagination(cursor="pas-un-curseur"), db=session, current_user=admin_user
+        )
+
+    assert exc.value.status_code == 400
@@ -0,0 +1,141 @@
+"""
+Tests du moteur de devis et de son catalogue de prix en mémoire.
+"""
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+
+from app.models import RentalOption, Vehicle
+from app.routers import quotes
+from app.schemas import QuoteBasket, QuoteLineType
+from app.services.quotes import PriceCatalog, add_months, prorate
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    catalog = PriceCatalog()
+    monkeypatch.setattr(quotes, "price_catalog", catalog)
+    return catalog
+
+
+async def make_rentable(session, vehicle_id=1):
+    await session.execute(update(Vehicle).where(Vehicle.id == vehicle_id).values(is_available_for_rent=True))
+    await session.commit()
+
+
+def test_add_months_clamps_to_month_end():
+    assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+    assert add_months(date(2024, 11, 15), 3) == date(2025, 2, 15)
+
+
+def test_prorate_counts_covered_days():
+    """Un prix mensuel est dû au prorata des jours couverts dans l'échéance"""
+    period = (date(2024, 4, 1), date(2024, 5, 1))
+
+    assert prorate(300.0, date(2024, 1, 1), date(2025, 1, 1), *period) == 300.0
+    assert prorate(300.0, date(2024, 4, 16), date(2025, 1, 1), *period) == 150.0
+    assert prorate(300.0, date(2024, 5, 1), date(2025, 1, 1), *period) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_basket_quote(db, catalog):
+    """Véhicule, options et service sont totalisés sur la durée demandée"""
+    session, _, _ = db
+    await make_rentable(session)
+    basket = QuoteBasket(vehicle_id=1, option_ids=[1, 2], service_ids=[1], duration_months=24, start_date=date(2024, 3, 1))
+
+    quote = await quotes.quote_basket(basket, db=session)
+
+    assert [line.type for line in quote.lines] == [
+        QuoteLineType.VEHICULE, QuoteLineType.OPTION, QuoteLineType.OPTION, QuoteLineType.SERVICE
+    ]
+    assert quote.monthly_total == 355.0
+    assert len(quote.schedule) == 24
+    # L'assurance ne court que sur ses 12 mois d'engagement
+    assert quote.schedule[11].amount == 355.0
+    assert quote.schedule[12].amount == 315.0
+    assert quote.total == 12 * 355.0 + 12 * 315.0
+
+
+@pytest.mark.asyncio
+async def test_basket_quote_uses_cache(db, catalog):
+    """Une fois le catalogue chargé, les devis ne font plus aucune requête"""
+    session, _, queries = db
+    await make_rentable(session)
+    basket = QuoteBasket(vehicle_id=1, option_ids=[1])
+    await quotes.quote_basket(basket, db=session)
+    queries.clear()
+
+    for _ in range(100):
+        await quotes.quote_basket(basket, db=session)
+
+    assert queries == []
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reloads_prices(db, catalog):
+    """Les modifications du catalogue sont prises en compte après invalidation"""
+    session, _, _ = db
+    await make_rentable(session)
+    basket = QuoteBasket(vehicle_id=1, option_ids=[1], duration_months=12)
+    assert (await quotes.quote_basket(basket, db=session)).monthly_total == 310.0
+
+    await session.execute(update(RentalOption).where(RentalOption.id == 1).values(monthly_price=20.0))
+    await session.execute(update(Vehicle).where(Vehicle.id == 1).values(monthly_rental_price=350.0))
+    await session.commit()
+    assert (await quotes.quote_basket(basket, db=session)).monthly_total == 310.0
+
+    catalog.invalidate_vehicles([1])
+    assert (await quotes.quote_basket(basket, db=session)).monthly_total == 360.0
+
+    catalog.invalidate()
+    assert (await quotes.quote_basket(basket, db=session)).monthly_total == 370.0
+
+
+@pytest.mark.asyncio
+async def test_basket_rejects_unknown_items(db, catalog):
+    session, _, _ = db
+
+    with pytest.raises(HTTPException) as exc:
+        await quotes.quote_basket(QuoteBasket(vehicle_id=2), db=session)
+    assert exc.value.status_code == 404
+
+    await make_rentable(session, 2)
+    catalog.invalidate_vehicles([2])
+    with pytest.raises(HTTPException) as exc:
+        await quotes.quote_basket(QuoteBasket(vehicle_id=2, option_ids=[99]), db=session)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_dossier_quote(db, catalog):
+    """Le devis d'un dossier reprend ses options et le prix figé de ses services"""
+    session, admin_user, _ = db
+
+    quote = await quotes.quote_dossier(1, db=session, current_user=admin_user)
+
+    assert quote.vehicle_id == 1
+    assert quote.start_date == date(2024, 1, 1)
+    assert quote.duration_months == 36
+    assert [line.item_id for line in quote.lines if line.type == QuoteLineType.OPTION] == [1, 2]
+    assert quote.monthly_total == 355.0
+    # Le service de la base de test se termine le jour de sa souscription
+    assert quote.schedule[0].amount == 315.0
+
+
+@pytest.mark.asyncio
+async def test_dossier_quote_requires_its_vehicle(db, catalog):
+    """Un dossier dont le véhicule a été supprimé n'a pas de devis à 0 €"""
+    session, admin_user, _ = db
+    await session.execute(delete(Vehicle).where(Vehicle.id == 1))
+    await session.commit()
+
+    with pytest.raises(HTTPException) as error:
+        await quotes.quote_dossier(1, db=session, current_user=admin_user)
+    assert error.value.status_code == 409
+
+    with pytest.raises(HTTPException) as error:
+        await quotes.quote_dossier(10_000, db=session, current_user=admin_user)
+    assert error.value.status_code == 404
@@ -0,0 +1,120 @@
+"""
+Tests du calcul de solvabilité des dossiers.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from fastapi import Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+
+from app.models import Dossier, Vehicle
+from app.models.dossier import DossierType
+from app.routers import admin
+from app.schemas import DossierPagination, DossierSort
+from app.services.solvency import compute_scores, monthly_payment, rescore_open_dossiers, score_dossier
+
+from .conftest import DOSSIER_COUNT
+
+
+def scores(**overrides):
+    values = {
+        "income": np.array([3000.0]),
+        "current_loans": np.array([0.0]),
+        "is_rental": np.array([False]),
+        "price": np.array([20000.0]),
+        "monthly_rent": np.array([350.0]),
+        "months": np.array([48.0]),
+        "seniority_months": np.array([36.0]),
+        "stable_contract": np.array([True]),
+        "annual_rate": 0.06,
+    }
+    values.update(overrides)
+    return {name: float(value[0]) for name, value in compute_scores(**values).items()}
+
+
+def test_monthly_payment_matches_annuity_formula():
+    """La mensualité suit la formule d'un crédit amortissable, y compris à taux nul"""
+    assert monthly_payment(np.array([20000.0]), 0.06, np.array([48.0]))[0] == pytest.approx(469.70, abs=0.01)
+    assert monthly_payment(np.array([12000.0]), 0.0, np.array([24.0]))[0] == 500.0
+
+
+def test_risk_grows_with_debt_and_instability():
+    """Plus d'endettement ou un emploi récent et précaire augmentent le risque"""
+    base = scores()
+    indebted = scores(current_loans=np.array([900.0]))
+    unstable = scores(stable_contract=np.array([False]), seniority_months=np.array([3.0]))
+
+    assert base["debt_to_income"] == pytest.approx(469.70 / 3000, abs=1e-4)
+    assert indebted["risk_score"] > base["risk_score"]
+    assert unstable["risk_score"] > base["risk_score"]
+    assert 0 <= base["risk_score"] <= 100
+
+
+def test_rental_uses_monthly_rent():
+    """Pour une location, la mensualité est le loyer du véhicule"""
+    assert scores(is_rental=np.array([True]))["monthly_payment"] == 350.0
+
+
+def test_score_dossier_at_creation():
+    """Un nouveau dossier est évalué avec le prix du véhicule"""
+    dossier = Dossier(
+        type=DossierType.ACHAT, monthly_income=2500.0, current_loans_monthly_payments=200.0,
+        employment_contract_type="cdi", employer_name="ACME",
+        employment_start_date=datetime.now(timezone.utc) - timedelta(days=800),
+    )
+
+    score_dossier(dossier, Vehicle(price=18000.0, monthly_rental_price=320.0))
+
+    assert dossier.monthly_payment > 0
+    assert dossier.debt_to_income == pytest.approx((200.0 + dossier.monthly_payment) / 2500.0, abs=1e-4)
+    assert dossier.risk_score is not None and dossier.scored_at is not None
+
+
+@pytest.mark.parametrize("annual_rate", [0.0, 0.05])
+def test_zero_duration_uses_default_duration(annual_rate, monkeypatch):
+    """Une durée nulle en base ne produit pas de mensualité infinie"""
+    monkeypatch.setattr(settings, "FINANCING_ANNUAL_RATE", annual_rate)
+    dossiers = [
+        Dossier(
+            type=DossierType.ACHAT, monthly_income=2500.0, current_loans_monthly_payments=0.0,
+            desired_loan_duration=months, employment_contract_type="CDI",
+            employment_start_date=datetime.now(timezone.utc) - timedelta(days=800),
+        )
+        for months in (0, settings.FINANCING_DEFAULT_DURATION_MONTHS)
+    ]
+
+    for dossier in dossiers:
+        score_dossier(dossier, Vehicle(price=18000.0, monthly_rental_price=320.0))
+
+    assert math.isfinite(dossiers[0].monthly_payment)
+    assert dossiers[0].monthly_payment == dossiers[1].monthly_payment
+
+
+@pytest.mark.asyncio
+async def test_rescore_updates_open_dossiers_and_sorts_queue(db):
+    """Le recalcul évalue tous les dossiers ouverts ; la file se trie alors par risque"""
+    session, admin_user, _ = db
+    session_maker = async_sessionmaker(session.bind, expire_on_commit=False)
+
+    assert await rescore_open_dossiers(session_maker) == DOSSIER_COUNT
+    unscored = await session.scalar(select(func.count()).where(Dossier.scored_at.is_(None)))
+    assert unscored == 0
+
+    response = Response()
+    page = await admin.list_pending_dossiers(
+        response=response, page=DossierPagination(limit=100, sort=DossierSort.LOWEST_RISK),
+        db=session, current_user=admin_user
+    )
+    next_page = await admin.list_pending_dossiers(
+        response=Response(),
+        page=DossierPagination(limit=100, sort=DossierSort.LOWEST_RISK, cursor=response.headers["X-Next-Cursor"]),
+        db=session, current_user=admin_user
+    )
+    keys = [(d.risk_score, d.id) for d in page + next_page]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 200
@@ -0,0 +1,165 @@
+"""
+Tests de l'ajout de documents aux dossiers : concaténation JSONB et envoi groupé.
+"""
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from moto import mock_aws
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.routers import dossiers
+from app.services.s3 import S3Service
+
+PART_SIZE = 5 * 1024 * 1024
+
+
+class RecordingSession:
+    """Session qui conserve les requêtes au lieu de les exécuter"""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+        class Result:
+            def scalar_one_or_none(self):
+                return None
+        return Result()
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = RecordingSession()
+
+    async def reload_dossier(db, dossier_id):
+        return dossier_id
+
+    async def get_dossier(dossier_id, db, current_user):
+        return dossier_id
+
+    monkeypatch.setattr(dossiers, "reload_dossier", reload_dossier)
+    monkeypatch.setattr(dossiers, "_get_dossier_or_404", get_dossier)
+    monkeypatch.setattr(dossiers, "dossier_response", lambda dossier, user: dossier)
+    return session
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    with mock_aws():
+        service = S3Service()
+        service.s3_client.create_bucket(
+            Bucket=settings.S3_BUCKET_NAME,
+            CreateBucketConfiguration={"LocationConstraint": settings.AWS_REGION}
+        )
+        monkeypatch.setattr(dossiers, "s3_service", service)
+        yield service
+
+
+def upload(name, content=b"%PDF-1.7"):
+    return UploadFile(io.BytesIO(content), filename=name)
+
+
+def stored_keys(s3):
+    return [o["Key"] for o in s3.s3_client.list_objects_v2(Bucket=settings.S3_BUCKET_NAME).get("Contents", [])]
+
+
+@pytest.mark.asyncio
+async def test_append_is_a_single_server_side_update(session):
+    """Les documents sont concaténés par PostgreSQL, sans relire la liste existante"""
+    document = dossiers._new_document("documents/dossiers/7/a.pdf", "a.pdf", "identite", "application/pdf", 8)
+
+    await dossiers.append_documents(session, 7, [document])
+
+    append, requeue = (str(s.compile(dialect=postgresql.dialect())) for s in session.statements)
+    assert append.startswith("UPDATE dossiers SET documents=(coalesce(dossiers.documents")
+    assert "||" in append
+    assert "SELECT" not in append
+    # Un dossier qui attendait ces documents revient dans la file
+    assert requeue.startswith("UPDATE dossiers SET status=")
+    assert "WHERE dossiers.id = %(id_1)s AND dossiers.status = %(status_1)s" in requeue
+
+
+@pytest.mark.asyncio
+async def test_single_upload_appends_the_document(session, s3):
+    await dossiers.add_document(7, document_type="identite", file=upload("identite.pdf"), db=session, current_user=None)
+
+    assert len(session.statements) == 2
+    assert len(stored_keys(s3)) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_appends_all_documents_at_once(session, s3):
+    files = [upload("identite.pdf"), upload("bulletin.pdf")]
+
+    await dossiers.add_documents(7, files=files, document_types=["identite", "revenus"], db=session, current_user=None)
+
+    assert len(session.statements) == 2
+    params = session.statements[0].compile(dialect=postgresql.dialect()).params
+    documents = next(value for value in params.values() if isinstance(value, list) and value)
+    assert [d["type"] for d in documents] == ["identite", "revenus"]
+    assert all(d["id"] == d["key"].rsplit("/", 1)[-1] for d in documents)
+    assert sorted(stored_keys(s3)) == sorted(d["key"] for d in documents)
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_shares_the_part_concurrency(session, s3, monkeypatch):
+    """Les parties de tous les fichiers du lot partagent S3_MULTIPART_CONCURRENCY places"""
+    monkeypatch.setattr(settings, "S3_MULTIPART_PART_SIZE", PART_SIZE)
+    monkeypatch.setattr(settings, "S3_MULTIPART_CONCURRENCY", 2)
+    upload_part = s3.upload_part
+    in_flight, peak = 0, 0
+
+    async def tracked_upload_part(*args):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        try:
+            return await upload_part(*args)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(s3, "upload_part", tracked_upload_part)
+    files = [upload(f"releve-{i}.pdf", os.urandom(PART_SIZE + 1)) for i in range(3)]
+
+    await dossiers.add_documents(7, files=files, document_types=["revenus"] * 3, db=session, current_user=None)
+
+    assert peak == 2
+    assert len(stored_keys(s3)) == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_failure_adds_nothing(session, s3, monkeypatch):
+    """Si un fichier échoue, les autres sont supprimés du stockage et le dossier est inchangé"""
+    upload_stream = s3.upload_stream
+
+    async def failing_upload(chunks, key, content_type, metadata=None, semaphore=None):
+        if key.endswith(".png"):
+            raise HTTPException(status_code=400, detail="Format refusé")
+        return await upload_stream(chunks, key, content_type, metadata, semaphore)
+
+    monkeypatch.setattr(s3, "upload_stream", failing_upload)
+
+    with pytest.raises(HTTPException):
+        await dossiers.add_documents(
+            7, files=[upload("identite.pdf"), upload("photo.png")],
+            document_types=["identite", "photo"], db=session, current_user=None
+        )
+
+    assert session.statements == []
+    assert stored_keys(s3) == []
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_requires_one_type_per_file(session):
+    with pytest.raises(HTTPException) as exc:
+        await dossiers.add_documents(7, files=[upload("a.pdf")], document_types=[], db=session, current_user=None)
+    assert exc.value.status_code == 400
@@ -0,0 +1,55 @@
+"""
+Tests pour la génération des déclinaisons d'images.
+"""
+import io
+
+from PIL import Image
+
+from app.services.image_pipeline import render_derivatives, derivative_key, variant_urls
+
+
+def make_image(width, height, mode="RGB", color="red"):
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_render_derivatives_resizes_without_upscaling():
+    """Les largeurs supérieures à l'original sont ramenées à la taille de l'original"""
+    derivatives = render_derivatives(make_image(800, 400), [320, 640, 1280], ["webp"], 80)
+
+    assert [(width, fmt) for width, fmt, _ in derivatives] == [(320, "webp"), (640, "webp"), (800, "webp")]
+    with Image.open(io.BytesIO(derivatives[0][2])) as image:
+        assert image.format == "WEBP"
+        assert image.size == (320, 160)
+
+
+def test_render_derivatives_keeps_transparency():
+    """Les images avec canal alpha restent encodables"""
+    derivatives = render_derivatives(make_image(100, 100, mode="RGBA", color=(255, 0, 0, 128)), [50], ["webp"], 80)
+
+    with Image.open(io.BytesIO(derivatives[0][2])) as image:
+        assert image.mode == "RGBA"
+
+
+def test_derivative_key_sits_next_to_original():
+    """Les déclinaisons sont stockées à côté de l'original"""
+    assert derivative_key("vehicles/abc.jpg", 640, "webp") == "vehicles/abc_640w.webp"
+    assert derivative_key("vehicles/12/abc.photo.png", 320, "avif") == "vehicles/12/abc.photo_320w.avif"
+
+
+def test_variant_urls_lists_every_derivative():
+    """Toutes les URLs des srcset sont retrouvées pour la suppression"""
+    variants = {
+        "https://cdn/vehicles/1/a.jpg": {
+            "webp": "https://cdn/vehicles/1/a_320w.webp 320w, https://cdn/vehicles/1/a_640w.webp 640w",
+            "avif": "https://cdn/vehicles/1/a_320w.avif 320w",
+        }
+    }
+
+    assert sorted(variant_urls(variants)) == [
+        "https://cdn/vehicles/1/a_320w.avif",
+        "https://cdn/vehicles/1/a_320w.webp",
+        "https://cdn/vehicles/1/a_640w.webp",
+    ]
+    assert variant_urls(None) == []
@@ -0,0 +1,152 @@
+"""
+Tests pour l'upload multipart des documents, contre un stockage simulé (moto).
+"""
+import io
+import os
+import pytest
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError
+from botocore.retries.standard import ExponentialBackoff
+from moto import mock_aws
+
+from app.config import settings
+from app.services.s3 import S3Service
+
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setattr(settings, "S3_MULTIPART_PART_SIZE", PART_SIZE)
+    with mock_aws():
+        service = S3Service()
+        service.s3_client.create_bucket(
+            Bucket=settings.S3_BUCKET_NAME,
+            CreateBucketConfiguration={"LocationConstraint": settings.AWS_REGION}
+        )
+        yield service
+
+
+async def chunks(content, size=1024 * 1024):
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+@pytest.mark.asyncio
+async def test_small_file_is_sent_in_one_request(s3):
+    """Un fichier plus petit qu'une partie n'utilise pas le multipart"""
+    size = await s3.upload_stream(chunks(b"%PDF-1.7 court"), "documents/petit.pdf", "application/pdf")
+
+    assert size == 14
+    assert await s3.download_bytes("documents/petit.pdf") == b"%PDF-1.7 court"
+
+
+@pytest.mark.asyncio
+async def test_large_file_is_sent_in_parts(s3):
+    """Un gros fichier est découpé en parties puis réassemblé à l'identique"""
+    content = os.urandom(2 * PART_SIZE + 123)
+
+    size = await s3.upload_stream(chunks(content), "documents/scan.pdf", "application/pdf")
+
+    assert size == len(content)
+    assert await s3.download_bytes("documents/scan.pdf") == content
+    metadata = await s3.get_object_metadata("documents/scan.pdf")
+    assert metadata["ETag"].endswith('-3"')
+    assert metadata["ContentType"] == "application/pdf"
+
+
+class RawResponse(io.BytesIO):
+    def stream(self, **kwargs):
+        yield self.getvalue()
+
+
+def fail_upload_part(s3, code, status_code, times, monkeypatch):
+    """Répond une erreur S3 aux `times` premiers envois de partie, avant le mécanisme de retry"""
+    calls = []
+
+    def before_send(request, **kwargs):
+        calls.append(request.url)
+        if len(calls) <= times:
+            body = f"<Error><Code>{code}</Code><Message>{code}</Message></Error>".encode()
+            return AWSResponse(request.url, status_code, {}, RawResponse(body))
+        return None
+
+    # Pas d'attente entre les tentatives
+    monkeypatch.setattr(ExponentialBackoff, "delay_amount", lambda self, context: 0)
+    s3.s3_client.meta.events.register_first("before-send.s3.UploadPart", before_send)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_failed_part_is_retried_by_the_client(s3, monkeypatch):
+    """Une partie en échec transitoire est renvoyée par botocore, sans recommencer le fichier"""
+    calls = fail_upload_part(s3, "InternalError", 500, times=1, monkeypatch=monkeypatch)
+    content = os.urandom(PART_SIZE + 10)
+
+    await s3.upload_stream(chunks(content), "documents/retry.pdf", "application/pdf")
+
+    # Deux parties, dont une envoyée deux fois
+    assert len(calls) == 3
+    assert await s3.download_bytes("documents/retry.pdf") == content
+
+
+@pytest.mark.asyncio
+async def test_attempts_per_part_are_bounded(s3, monkeypatch):
+    """Une partie ne part jamais plus de S3_MAX_ATTEMPTS fois"""
+    calls = fail_upload_part(s3, "InternalError", 500, times=100, monkeypatch=monkeypatch)
+    key = "documents/ko.pdf"
+    upload_id = await s3.create_multipart_upload(key, "application/pdf")
+
+    with pytest.raises(ClientError):
+        await s3.upload_part(key, upload_id, 1, b"partie")
+
+    assert len(calls) == settings.S3_MAX_ATTEMPTS
+
+
+@pytest.mark.asyncio
+async def test_permanent_errors_are_not_retried(s3, monkeypatch):
+    """Un refus d'accès ne peut pas réussir : la partie n'est envoyée qu'une fois"""
+    calls = fail_upload_part(s3, "AccessDenied", 403, times=100, monkeypatch=monkeypatch)
+    key = "documents/interdit.pdf"
+    upload_id = await s3.create_multipart_upload(key, "application/pdf")
+
+    with pytest.raises(ClientError) as error:
+        await s3.upload_part(key, upload_id, 1, b"partie")
+
+    assert error.value.response["Error"]["Code"] == "AccessDenied"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_is_aborted_when_a_part_keeps_failing(s3, monkeypatch):
+    """Après épuisement des tentatives, l'upload est abandonné côté S3"""
+    def failing_upload_part(**kwargs):
+        raise ClientError({"Error": {"Code": "InternalError"}}, "UploadPart")
+
+    monkeypatch.setattr(s3.s3_client, "upload_part", failing_upload_part)
+
+    with pytest.raises(ClientError):
+        await s3.upload_stream(chunks(os.urandom(PART_SIZE + 10)), "documents/ko.pdf", "application/pdf")
+
+    uploads = s3.s3_client.list_multipart_uploads(Bucket=settings.S3_BUCKET_NAME)
+    assert not uploads.get("Uploads")
+    assert await s3.get_object_metadata("documents/ko.pdf") is None
+
+
+@pytest.mark.asyncio
+async def test_client_upload_can_resume_from_received_parts(s3):
+    """Le client retrouve les parties déjà reçues et ne renvoie que les manquantes"""
+    content = os.urandom(PART_SIZE + 42)
+    key = "documents/dossiers/1/reprise.pdf"
+    upload_id = await s3.create_multipart_upload(key, "application/pdf", {"filename": "reprise.pdf"})
+
+    await s3.upload_part(key, upload_id, 1, content[:PART_SIZE])
+    received = await s3.list_parts(key, upload_id)
+    assert [p["PartNumber"] for p in received] == [1]
+
+    await s3.upload_part(key, upload_id, 2, content[PART_SIZE:])
+    await s3.complete_multipart_upload(key, upload_id)
+
+    assert await s3.download_bytes(key) == content
+    metadata = await s3.get_object_metadata(key)
+    assert metadata["Metadata"] == {"filename": "reprise.pdf"}
@@ -0,0 +1,102 @@
+"""
+Tests pour le service S3, contre un stockage simulé (moto).
+"""
+import io
+import pytest
+import requests
+from moto import mock_aws
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.services.s3 import S3Service
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        service = S3Service()
+        service.s3_client.create_bucket(
+            Bucket=settings.S3_BUCKET_NAME,
+            CreateBucketConfiguration={"LocationConstraint": settings.AWS_REGION}
+        )
+        yield service
+
+
+@pytest.mark.asyncio
+async def test_upload_file_runs_in_thread_pool(s3):
+    """L'upload serveur dépose l'objet et retourne son URL"""
+    file = UploadFile(
+        file=io.BytesIO(b"\x89PNG fake"),
+        filename="photo.png",
+        headers=Headers({"content-type": "image/png"})
+    )
+
+    url = await s3.upload_file(file, prefix="vehicles/")
+
+    key = url.split("/", 3)[-1]
+    assert key.startswith("vehicles/") and key.endswith(".png")
+    metadata = await s3.get_object_metadata(key)
+    assert metadata["ContentType"] == "image/png"
+
+
+@pytest.mark.asyncio
+async def test_missing_object_has_no_metadata(s3):
+    """Un objet absent retourne None au lieu de lever une erreur"""
+    assert await s3.get_object_metadata("vehicles/absent.jpg") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method", ["post", "put"])
+async def test_presigned_upload_is_usable(s3, method):
+    """Le navigateur peut uploader directement avec l'URL présignée"""
+    presigned = s3.create_presigned_upload("vehicles/1/photo.jpg", "image/jpeg", method=method)
+
+    if method == "put":
+        response = requests.put(presigned["url"], data=b"jpeg", headers={"Content-Type": "image/jpeg"})
+    else:
+        response = requests.post(presigned["url"], data=presigned["fields"], files={"file": b"jpeg"})
+
+    assert response.status_code in (200, 204)
+    metadata = await s3.get_object_metadata("vehicles/1/photo.jpg")
+    assert metadata["ContentType"] == "image/jpeg"
+
+
+def test_client_is_shared_and_configured(s3):
+    """Le client est créé une fois, avec pool de connexions et retries adaptatifs"""
+    assert s3.s3_client is s3.s3_client
+    config = s3.s3_client.meta.config
+    assert config.max_pool_connections >= settings.S3_UPLOAD_WORKERS
+    assert config.retries["mode"] == settings.S3_RETRY_MODE
+    assert config.retries["total_max_attempts"] == settings.S3_MAX_ATTEMPTS
+
+
+@pytest.mark.asyncio
+async def test_delete_file_is_async(s3):
+    """La suppression unitaire s'exécute réellement et accepte une URL"""
+    url = await s3.upload_bytes(b"jpeg", "vehicles/1/a.jpg", "image/jpeg")
+
+    assert await s3.delete_file(url) is True
+    assert await s3.get_object_metadata("vehicles/1/a.jpg") is None
+
+
+@pytest.mark.asyncio
+async def test_delete_files_uses_batched_calls(s3, monkeypatch):
+    """Les fichiers sont supprimés par lots DeleteObjects de 1000 clés au plus"""
+    monkeypatch.setattr("app.services.s3.DELETE_BATCH_SIZE", 2)
+    urls = [await s3.upload_bytes(b"img", f"vehicles/1/{i}.jpg", "image/jpeg") for i in range(3)]
+    delete_objects = s3.s3_client.delete_objects
+    calls = []
+
+    def counting_delete_objects(**kwargs):
+        calls.append(len(kwargs["Delete"]["Objects"]))
+        return delete_objects(**kwargs)
+
+    monkeypatch.setattr(s3.s3_client, "delete_objects", counting_delete_objects)
+
+    failed = await s3.delete_files(urls + [urls[0], s3.get_url("vehicles/1/absent.jpg")])
+
+    assert failed == []
+    assert sorted(calls) == [2, 2]
+    for i in range(3):
+        assert await s3.get_object_metadata(f"vehicles/1/{i}.jpg") is None
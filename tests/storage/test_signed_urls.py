@@ -0,0 +1,111 @@
+"""
+Tests pour les URLs signées des documents privés.
+"""
+import base64
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from moto import mock_aws
+from pydantic import SecretStr
+
+from app.config import settings
+from app.services.s3 import S3Service
+from app.services.signed_urls import SignedUrlCache
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    with mock_aws():
+        service = S3Service()
+        service.s3_client.create_bucket(
+            Bucket=settings.S3_BUCKET_NAME,
+            CreateBucketConfiguration={"LocationConstraint": settings.AWS_REGION}
+        )
+        monkeypatch.setattr("app.services.signed_urls.s3_service", service)
+        yield service
+
+
+@pytest.mark.asyncio
+async def test_presigned_url_gives_temporary_access(s3):
+    """Sans CloudFront, l'URL présignée S3 permet de lire l'objet privé"""
+    await s3.upload_bytes(b"%PDF", "documents/dossiers/1/a.pdf", "application/pdf")
+
+    url = s3.generate_signed_url("documents/dossiers/1/a.pdf", expires_in=60)
+
+    assert "X-Amz-Signature" in url
+    assert requests.get(url).content == b"%PDF"
+
+
+def test_cloudfront_url_is_signed_with_key_pair(s3, monkeypatch):
+    """Avec une paire de clés CloudFront, l'URL porte une signature vérifiable"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+    monkeypatch.setattr(settings, "CLOUDFRONT_DOMAIN", "cdn.m-motors.fr")
+    monkeypatch.setattr(settings, "CLOUDFRONT_KEY_PAIR_ID", "K2JCJMDEHXQW5F")
+    monkeypatch.setattr(settings, "CLOUDFRONT_PRIVATE_KEY", SecretStr(pem.replace("\n", "\\n")))
+
+    url = s3.generate_signed_url("documents/dossiers/1/a.pdf", expires_in=60)
+
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    assert parts.netloc == "cdn.m-motors.fr"
+    assert query["Key-Pair-Id"] == ["K2JCJMDEHXQW5F"]
+    policy = (
+        '{"Statement":[{"Resource":"https://cdn.m-motors.fr/documents/dossiers/1/a.pdf",'
+        f'"Condition":{{"DateLessThan":{{"AWS:EpochTime":{query["Expires"][0]}}}}}}}]}}'
+    )
+    signature = base64.b64decode(
+        query["Signature"][0].replace("-", "+").replace("_", "=").replace("~", "/")
+    )
+    private_key.public_key().verify(signature, policy.encode(), padding.PKCS1v15(), hashes.SHA1())
+
+
+def test_signatures_are_cached_per_key_and_user(s3, monkeypatch):
+    """Une signature est réutilisée pour le même utilisateur jusqu'à l'expiration du cache"""
+    calls = []
+    monkeypatch.setattr(s3, "generate_signed_url", lambda key, expires_in: calls.append(key) or f"{key}?sig={len(calls)}")
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.signed_urls.time.monotonic", lambda: clock[0])
+    cache = SignedUrlCache()
+
+    first = cache.get_url("documents/a.pdf", user_id=1)
+    assert cache.get_url("documents/a.pdf", user_id=1) == first
+    assert cache.get_url("documents/a.pdf", user_id=2) != first
+    assert len(calls) == 2
+
+    clock[0] += settings.SIGNED_URL_CACHE_TTL + 1
+    assert cache.get_url("documents/a.pdf", user_id=1) != first
+    assert len(calls) == 3
+
+
+def test_cache_is_bounded(s3, monkeypatch):
+    """Les entrées les plus anciennes sont évincées au-delà de la taille maximale"""
+    monkeypatch.setattr(s3, "generate_signed_url", lambda key, expires_in: key)
+    cache = SignedUrlCache(max_entries=2)
+
+    for name in ("a", "b", "c"):
+        cache.get_url(name, user_id=1)
+
+    assert len(cache) == 2
+
+
+def test_sign_documents_does_not_mutate_input(s3, monkeypatch):
+    """Les documents d'origine restent intacts ; seuls ceux stockés sur S3 sont signés"""
+    monkeypatch.setattr(s3, "generate_signed_url", lambda key, expires_in: f"https://signed/{key}")
+    documents = [
+        {"name": "cni.pdf", "url": "https://bucket/documents/cni.pdf", "key": "documents/cni.pdf"},
+        {"name": "ancien.pdf", "url": "https://example.com/ancien.pdf"},
+    ]
+
+    signed = SignedUrlCache().sign_documents(documents, user_id=1)
+
+    assert signed[0]["url"] == "https://signed/documents/cni.pdf"
+    assert signed[1]["url"] == "https://example.com/ancien.pdf"
+    assert documents[0]["url"] == "https://bucket/documents/cni.pdf"
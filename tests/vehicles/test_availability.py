@@ -0,0 +1,149 @@
+"""
+Tests du calendrier de disponibilité des véhicules à la location.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.dialects import postgresql
+
+from app.models import Rental, User, Vehicle
+from app.models.rental import RentalStatus
+from app.services import availability
+from app.services.availability import (
+    AvailabilityIndex, VehicleCalendar, is_vehicle_free, naive_utc, select_free_vehicles
+)
+
+DAY = timedelta(days=1)
+NOW = datetime(2030, 1, 1)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    """Session renvoyant des locations fixes, en comptant les requêtes"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return FakeResult(self.rows)
+
+
+def test_calendar_matches_linear_scan():
+    """La recherche dichotomique donne le même résultat qu'un parcours de toutes les locations"""
+    rng = random.Random(42)
+    calendar, bookings, day = VehicleCalendar(), [], 0
+    for _ in range(200):
+        day += rng.randint(0, 5)
+        length = rng.randint(1, 10)
+        bookings.append((NOW + day * DAY, NOW + (day + length) * DAY))
+        day += length
+    for start, end in rng.sample(bookings, len(bookings)):
+        calendar.add(start, end)
+
+    for _ in range(1000):
+        start = NOW + rng.randint(-5, day + 5) * DAY
+        end = start + rng.randint(1, 15) * DAY
+        expected = all(b_end <= start or b_start >= end for b_start, b_end in bookings)
+        assert calendar.is_free(start, end) == expected
+
+
+def test_calendar_periods_are_half_open():
+    """Une location peut commencer le jour où la précédente se termine"""
+    calendar = VehicleCalendar()
+    calendar.add(NOW, NOW + 3 * DAY)
+
+    assert calendar.is_free(NOW + 3 * DAY, NOW + 5 * DAY)
+    assert calendar.is_free(NOW - 2 * DAY, NOW)
+    assert not calendar.is_free(NOW + 2 * DAY, NOW + 4 * DAY)
+
+
+def test_naive_utc():
+    paris = timezone(timedelta(hours=1))
+    assert naive_utc(datetime(2030, 1, 1, 10, tzinfo=paris)) == datetime(2030, 1, 1, 9)
+    assert naive_utc(NOW) == NOW
+
+
+def test_free_vehicles_query_uses_range_overlap():
+    """La recherche porte sur les périodes tsrange, servies par l'index GiST"""
+    sql = str(select_free_vehicles(NOW, NOW + DAY).compile(dialect=postgresql.dialect()))
+
+    assert "NOT (EXISTS" in sql
+    assert "tsrange(rentals.start_date, rentals.end_date, %(tsrange_1)s) && tsrange(" in sql
+
+
+@pytest.mark.asyncio
+async def test_index_answers_from_memory():
+    future = naive_utc(datetime.now(timezone.utc)) + 10 * DAY
+    session = FakeSession([(1, future, future + 5 * DAY)])
+    index = AvailabilityIndex()
+
+    await index.refresh(session)
+    await index.refresh(session)
+
+    assert session.queries == 1
+    assert index.covers(future)
+    assert not index.is_free(1, future + DAY, future + 2 * DAY)
+    assert index.is_free(1, future + 5 * DAY, future + 6 * DAY)
+    assert index.is_free(2, future, future + DAY)
+    assert not index.covers(future - 30 * DAY)
+
+    session.rows = [(1, future + 20 * DAY, future + 25 * DAY)]
+    index.invalidate([1])
+    await index.refresh(session)
+    assert session.queries == 2
+    assert index.is_free(1, future + DAY, future + 2 * DAY)
+
+
+@pytest_asyncio.fixture
+async def rentals_db(monkeypatch, sqlite_db):
+    monkeypatch.setattr(availability, "availability_index", AvailabilityIndex())
+    today = naive_utc(datetime.now(timezone.utc))
+    database = await sqlite_db([User, Vehicle, Rental], {
+        User: [{"id": 1, "email": "client@m-motors.fr"}],
+        Vehicle: [{
+            "id": i, "brand": "Renault", "model": "Clio", "registration_number": f"EE-{i:03d}-EE",
+            "monthly_rental_price": 300.0, "engine_size": 1.0, "is_available_for_rent": True,
+            "features": {}, "images": [], "technical_details": {},
+        } for i in (1, 2)],
+        # Location du véhicule 1 commencée sans date de fin
+        Rental: [{
+            "id": 1, "user_id": 1, "vehicle_id": 1, "start_date": today - 10 * DAY, "end_date": None,
+            "status": RentalStatus.ACTIVE,
+        }],
+    })
+    async with database.session() as session:
+        yield session, today
+
+
+@pytest.mark.asyncio
+async def test_open_ended_rental_blocks_the_vehicle(rentals_db):
+    session, today = rentals_db
+
+    assert not await is_vehicle_free(session, 1, today + 365 * DAY, today + 366 * DAY)
+    assert await is_vehicle_free(session, 2, today + 365 * DAY, today + 366 * DAY)
+
+
+@pytest.mark.asyncio
+async def test_rental_writes_reload_the_vehicle(rentals_db):
+    session, today = rentals_db
+    start, end = today + 5 * DAY, today + 8 * DAY
+    assert await is_vehicle_free(session, 2, start, end)
+
+    session.add(Rental(user_id=1, vehicle_id=2, start_date=start, end_date=end, status=RentalStatus.PENDING))
+    await session.flush()
+    # Rien n'est visible des autres sessions avant le commit
+    assert not availability.availability_index._dirty
+    await session.commit()
+
+    assert not await is_vehicle_free(session, 2, start, end)
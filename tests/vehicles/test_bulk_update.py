@@ -0,0 +1,84 @@
+"""
+Tests de la mise à jour en masse des véhicules.
+"""
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.models import User, Vehicle
+from app.routers import admin
+from app.schemas import VehicleBulkUpdate
+
+
+@pytest_asyncio.fixture
+async def db(sqlite_db):
+    database = await sqlite_db([User, Vehicle], {
+        User: [{"id": 1, "email": "admin@m-motors.fr", "is_admin": True, "is_active": True}],
+        Vehicle: [{
+            "id": i, "brand": "Renault" if i <= 3 else "Peugeot", "model": "Clio", "registration_number": f"DD-{i:03d}-DD",
+            "price": price, "monthly_rental_price": 300.0, "engine_size": 1.0, "is_available_for_rent": True,
+            "features": {}, "images": [], "technical_details": {},
+        } for i, price in enumerate([10000.0, 400.0, 12000.0, 15000.0], start=1)],
+    })
+    async with database.session() as session:
+        yield session, await session.get(User, 1)
+
+
+async def bulk_update(db, **payload):
+    session, admin_user = db
+    return await admin.bulk_update_vehicles(VehicleBulkUpdate(**payload), db=session, current_user=admin_user)
+
+
+async def prices(db):
+    session, _ = db
+    session.expire_all()
+    result = await session.execute(select(Vehicle.id, Vehicle.price, Vehicle.monthly_rental_price).order_by(Vehicle.id))
+    return {vehicle_id: (price, monthly) for vehicle_id, price, monthly in result.all()}
+
+
+@pytest.mark.asyncio
+async def test_percentage_adjustment_on_filtered_vehicles(db):
+    result = await bulk_update(db, filter={"brand": "renault"}, price_adjustments=[
+        {"field": "monthly_rental_price", "mode": "percentage", "value": -10},
+    ])
+
+    assert result["vehicle_ids"] == [1, 2, 3] and result["skipped"] == 0
+    assert {vehicle_id: monthly for vehicle_id, (_, monthly) in (await prices(db)).items()} == {
+        1: 270.0, 2: 270.0, 3: 270.0, 4: 300.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_absolute_adjustment_skips_non_positive_prices(db):
+    result = await bulk_update(db, all=True, is_available_for_rent=False, price_adjustments=[
+        {"mode": "absolute", "value": -500},
+    ])
+
+    # Le véhicule 2 passerait à -100 € : il n'est pas modifié du tout, et il est signalé
+    assert result == {"updated": 3, "vehicle_ids": [1, 3, 4], "skipped": 1, "skipped_vehicle_ids": [2]}
+    assert {vehicle_id: price for vehicle_id, (price, _) in (await prices(db)).items()} == {
+        1: 9500.0, 2: 400.0, 3: 11500.0, 4: 14500.0,
+    }
+
+
+@pytest.mark.parametrize("payload", [
+    {"is_available_for_rent": False},
+    {"filter": {}, "is_available_for_rent": False},
+    {"vehicle_ids": [], "is_available_for_rent": False},
+    {"all": True, "vehicle_ids": [1], "is_available_for_rent": False},
+])
+def test_selection_must_be_explicit(payload):
+    with pytest.raises(ValidationError):
+        VehicleBulkUpdate(**payload)
+
+
+@pytest.mark.asyncio
+async def test_filter_without_effective_criteria_is_rejected(db):
+    with pytest.raises(HTTPException) as error:
+        await bulk_update(db, filter={"min_price": 0}, is_available_for_rent=False)
+
+    assert error.value.status_code == 400
+    session, _ = db
+    assert all((await session.execute(select(Vehicle.is_available_for_rent))).scalars())
@@ -0,0 +1,171 @@
+"""
+Tests pour la lecture et la validation des imports de véhicules.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.schemas.vehicle import VehicleFileFormat
+from app.services.vehicle_import import (
+    VehicleImporter, iter_records, _staging_record, IMPORT_COLUMNS, STAGING_TABLE
+)
+
+CSV_HEADER = (
+    "brand,model,year,mileage,registration_number,price,monthly_rental_price,"
+    "fuel_type,transmission,engine_size,power,doors,seats,color,features\n"
+)
+CSV_ROW = 'Peugeot,308,2021,25000,AB-123-CD,18990,329,essence,manuelle,1.2,130,5,5,bleu,"{""gps"": true}"\n'
+
+
+async def stream(data: bytes, size: int = 7):
+    """Simule un corps de requête reçu par petits morceaux"""
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+@pytest.mark.asyncio
+async def test_csv_records_are_decoded():
+    """Les lignes CSV sont reconstituées et les colonnes JSON décodées"""
+    records = await collect(iter_records(stream((CSV_HEADER + CSV_ROW).encode()), VehicleFileFormat.CSV))
+
+    assert len(records) == 1
+    line, data = records[0]
+    assert line == 2
+    assert data["registration_number"] == "AB-123-CD"
+    assert data["features"] == {"gps": True}
+
+
+@pytest.mark.asyncio
+async def test_csv_multiline_field_and_column_mismatch():
+    """Un champ entre guillemets peut contenir un retour à la ligne"""
+    data = CSV_HEADER + CSV_ROW.replace("bleu", '"bleu\nnuit"') + "Renault,Clio\n"
+    records = await collect(iter_records(stream(data.encode()), VehicleFileFormat.CSV))
+
+    assert records[0][1]["color"] == "bleu\nnuit"
+    assert records[1][0] == 4
+    assert isinstance(records[1][1], str)
+
+
+@pytest.mark.asyncio
+async def test_invalid_rows_are_reported_and_valid_rows_loaded():
+    """Les lignes invalides figurent dans le rapport, les autres sont chargées"""
+    data = (
+        b'{"brand": "Peugeot", "model": "208", "year": 2022, "mileage": 1000, '
+        b'"registration_number": "AB-123-CD", "price": 15000, "monthly_rental_price": 250, '
+        b'"fuel_type": "essence", "transmission": "manuelle", "engine_size": 1.2, '
+        b'"power": 100, "doors": 5, "seats": 5, "color": "rouge"}\n'
+        b'{"brand": "Renault", "registration_number": "XX"}\n'
+        b'pas du json\n'
+    )
+    importer = VehicleImporter(chunk_size=10)
+
+    with patch.object(importer, "_load_chunk", new=AsyncMock()) as load_chunk:
+        report = await importer.run(AsyncMock(), iter_records(stream(data), VehicleFileFormat.NDJSON))
+
+    assert report.total_rows == 3
+    assert report.failed == 2
+    assert [error.line for error in report.errors] == [2, 3]
+    assert report.errors[0].registration_number == "XX"
+    chunk = load_chunk.await_args.args[1]
+    assert list(chunk) == ["AB-123-CD"]
+
+    record = dict(zip(IMPORT_COLUMNS, _staging_record(chunk["AB-123-CD"][1])))
+    assert record["fuel_type"] == "ESSENCE"
+    assert record["features"] == "{}"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format", [VehicleFileFormat.NDJSON, VehicleFileFormat.CSV])
+async def test_invalid_utf8_line_is_reported(format):
+    """Une ligne mal encodée est signalée sans interrompre la lecture du fichier"""
+    if format == VehicleFileFormat.CSV:
+        data = CSV_HEADER.encode() + b"\xff\xfe\n" + CSV_ROW.encode()
+    else:
+        data = b'{"brand": "\xff\xfe"}\n' + ndjson_vehicle("AB-123-CD")
+    importer = VehicleImporter(chunk_size=10)
+
+    with patch.object(importer, "_load_chunk", new=AsyncMock()) as load_chunk:
+        report = await importer.run(AsyncMock(), iter_records(stream(data), format))
+
+    assert report.failed == 1
+    assert report.errors[0].line == (2 if format == VehicleFileFormat.CSV else 1)
+    assert "UTF-8" in report.errors[0].errors[0]
+    assert list(load_chunk.await_args.args[1]) == ["AB-123-CD"]
+
+
+def ndjson_vehicle(registration_number: str, model: str = "208") -> bytes:
+    return (
+        f'{{"brand": "Peugeot", "model": "{model}", "year": 2022, "mileage": 1000, '
+        f'"registration_number": "{registration_number}", "price": 15000, "monthly_rental_price": 250, '
+        f'"fuel_type": "essence", "transmission": "manuelle", "engine_size": 1.2, '
+        f'"power": 100, "doors": 5, "seats": 5, "color": "rouge"}}\n'
+    ).encode()
+
+
+@pytest.mark.asyncio
+async def test_duplicates_within_a_chunk_are_reported():
+    """Une immatriculation répétée dans le lot garde la dernière ligne et signale les autres"""
+    data = ndjson_vehicle("AB-123-CD") + ndjson_vehicle("EF-456-GH") + ndjson_vehicle("AB-123-CD", model="308")
+    importer = VehicleImporter(chunk_size=10)
+
+    async def load_chunk(db, chunk, report):
+        report.inserted += len(chunk)
+
+    with patch.object(importer, "_load_chunk", side_effect=load_chunk) as mocked:
+        report = await importer.run(AsyncMock(), iter_records(stream(data), VehicleFileFormat.NDJSON))
+
+    chunk = mocked.await_args.args[1]
+    assert chunk["AB-123-CD"][0] == 3 and chunk["AB-123-CD"][1].model == "308"
+    assert [(error.line, error.registration_number) for error in report.errors] == [(1, "AB-123-CD")]
+    assert report.total_rows == report.inserted + report.updated + report.failed == 3
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+@pytest.mark.asyncio
+async def test_chunk_is_copied_to_staging_then_upserted():
+    """Un lot passe par COPY dans la table temporaire puis un seul INSERT ... ON CONFLICT"""
+    statements = []
+    copy = AsyncMock()
+
+    async def execute(statement):
+        statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        # xmax = 0 pour les lignes créées, différent de 0 pour celles mises à jour
+        return FakeResult([True, False, True])
+
+    raw_connection = MagicMock()
+    raw_connection.driver_connection.copy_records_to_table = copy
+    connection = MagicMock(get_raw_connection=AsyncMock(return_value=raw_connection))
+    db = AsyncMock(execute=execute, connection=AsyncMock(return_value=connection))
+    data = ndjson_vehicle("AB-123-CD") + ndjson_vehicle("EF-456-GH") + ndjson_vehicle("IJ-789-KL")
+
+    report = await VehicleImporter().run(db, iter_records(stream(data), VehicleFileFormat.NDJSON))
+
+    create, upsert = statements
+    assert create.startswith(f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS SELECT brand, model")
+    assert create.endswith("FROM vehicles WITH NO DATA")
+    assert copy.await_args.args == (STAGING_TABLE,)
+    assert copy.await_args.kwargs["columns"] == IMPORT_COLUMNS
+    assert [row[IMPORT_COLUMNS.index("registration_number")] for row in copy.await_args.kwargs["records"]] == [
+        "AB-123-CD", "EF-456-GH", "IJ-789-KL"
+    ]
+    assert upsert.startswith("INSERT INTO vehicles (brand, model")
+    assert f"FROM {STAGING_TABLE} ON CONFLICT (registration_number) DO UPDATE SET" in upsert
+    assert "registration_number = excluded.registration_number" not in upsert
+    assert upsert.endswith("RETURNING xmax = 0 AS inserted")
+    db.commit.assert_awaited_once()
+    assert (report.inserted, report.updated, report.failed) == (2, 1, 0)
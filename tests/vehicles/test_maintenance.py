@@ -0,0 +1,167 @@
+"""
+Tests de la planification des entretiens et de l'envoi groupé des emails.
+"""
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+
+from app.config import settings
+from app.models import User, Vehicle
+from app.services import maintenance
+from app.services.mailer import SMTPMailer, build_message
+from app.services.maintenance import MaintenanceScheduler
+
+NOW = datetime(2030, 3, 1, 8, 0)
+FLEET_SIZE = 300
+
+
+class FakeMailer:
+    def __init__(self):
+        self.messages = []
+        self.fail = False
+
+    async def send_many(self, messages):
+        if self.fail:
+            return [False] * len(messages)
+        self.messages.extend(messages)
+        return [True] * len(messages)
+
+
+@pytest_asyncio.fixture
+async def db(monkeypatch, sqlite_db):
+    monkeypatch.setattr(settings, "MAINTENANCE_DIGEST_SIZE", 10)
+    monkeypatch.setattr(settings, "MAINTENANCE_RECIPIENTS", [])
+
+    async def try_lock(db):
+        return True
+    monkeypatch.setattr(maintenance, "_try_lock", try_lock)
+
+    database = await sqlite_db([User, Vehicle], {
+        User: [
+            {"id": 1, "email": "atelier@m-motors.fr", "is_admin": True, "is_active": True},
+            {"id": 2, "email": "client@m-motors.fr", "is_admin": False, "is_active": True},
+        ],
+        # Un véhicule sur dix a un entretien dans 7 jours, un sur dix dans 16 jours,
+        # les autres bien plus tard
+        Vehicle: [{
+            "id": i, "brand": "Citroën", "model": "C3", "registration_number": f"CC-{i:03d}-CC",
+            "monthly_rental_price": 290.0, "engine_size": 1.2, "features": {}, "images": [], "technical_details": {},
+            "next_maintenance_date": NOW + timedelta(days={0: 7, 1: 16}.get(i % 10, 60 + i % 30)),
+        } for i in range(1, FLEET_SIZE + 1)],
+    })
+    async with database.session() as session:
+        yield session, database.queries
+
+
+@pytest.fixture
+def mailer(monkeypatch):
+    mailer = FakeMailer()
+    monkeypatch.setattr(maintenance, "mailer", mailer)
+    return mailer
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_due_vehicles_are_notified_once_in_digests(db, mailer):
+    session, _ = db
+    scheduler = MaintenanceScheduler(clock=Clock())
+
+    assert await scheduler.tick(session) == 30
+    assert len(mailer.messages) == 3
+    assert mailer.messages[0]["To"] == "atelier@m-motors.fr"
+    assert "CC-010-CC" in mailer.messages[0].get_content()
+
+    assert await scheduler.tick(session) == 0
+    assert len(mailer.messages) == 3
+
+
+@pytest.mark.asyncio
+async def test_scan_is_incremental(db, mailer):
+    """Les passages suivants ne lisent que les dates entrées dans la fenêtre"""
+    session, queries = db
+    clock = Clock()
+    scheduler = MaintenanceScheduler(clock=clock)
+    await scheduler.tick(session)
+    queries.clear()
+
+    clock.now += timedelta(days=3)
+    notified = await scheduler.tick(session)
+
+    select_sql = next(q for q in queries if q.startswith("SELECT vehicles.id"))
+    assert "vehicles.next_maintenance_date > ?" in select_sql
+    assert notified == 30
+    assert "CC-001-CC" in mailer.messages[-3].get_content()
+
+
+@pytest.mark.asyncio
+async def test_changed_vehicle_is_rechecked(db, mailer):
+    """Un véhicule dont l'entretien est avancé est signalé sans attendre le passage complet"""
+    session, _ = db
+    scheduler = MaintenanceScheduler(clock=Clock())
+    await scheduler.tick(session)
+
+    await session.execute(update(Vehicle).where(Vehicle.id == 5).values(next_maintenance_date=NOW + timedelta(days=1)))
+    await session.commit()
+    scheduler.vehicles_changed([5])
+
+    assert await scheduler.tick(session) == 1
+    assert "CC-005-CC" in mailer.messages[-1].get_content()
+
+
+@pytest.mark.asyncio
+async def test_failed_sends_are_retried(db, mailer):
+    session, _ = db
+    scheduler = MaintenanceScheduler(clock=Clock())
+    mailer.fail = True
+
+    assert await scheduler.tick(session) == 0
+
+    mailer.fail = False
+    assert await scheduler.tick(session) == 30
+
+
+class FakeSMTP:
+    """Serveur SMTP simulé qui ferme les connexions après deux emails"""
+    connections = 0
+
+    def __init__(self, host, port, timeout):
+        FakeSMTP.connections += 1
+        self.sent = 0
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, message):
+        if self.sent == 2:
+            raise smtplib.SMTPServerDisconnected("fermée")
+        self.sent += 1
+
+    def quit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_mailer_reuses_and_reopens_connections(monkeypatch):
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(settings, "SMTP_POOL_SIZE", 1)
+    FakeSMTP.connections = 0
+    mailer = SMTPMailer()
+    messages = [build_message(["a@m-motors.fr"], f"Sujet {i}", "Corps") for i in range(6)]
+
+    assert await mailer.send_many(messages) == [True] * 6
+    # Une connexion par paire d'emails, au lieu d'une par email
+    assert FakeSMTP.connections == 3
+    mailer.close()
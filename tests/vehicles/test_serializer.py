@@ -0,0 +1,94 @@
+"""
+Tests pour la sérialisation rapide des véhicules.
+"""
+import json
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.models.vehicle import FuelType, TransmissionType
+from app.schemas.vehicle import VehicleResponse, VehicleCreate, VehicleFileFormat
+from app.services.vehicle_import import iter_records
+from app.services.vehicle_serializer import (
+    VEHICLE_FIELDS, vehicle_row_to_dict, serialize_vehicle_rows,
+    encode_ndjson_rows, encode_csv_header, encode_csv_rows
+)
+
+
+def make_row(**overrides):
+    values = {
+        "id": 1,
+        "brand": "Peugeot",
+        "model": "308",
+        "year": 2021,
+        "mileage": 25000.0,
+        "registration_number": "AB-123-CD",
+        "price": 18990.0,
+        "monthly_rental_price": 329.0,
+        "is_available_for_sale": True,
+        "is_available_for_rent": False,
+        "fuel_type": FuelType.ESSENCE,
+        "transmission": TransmissionType.MANUELLE,
+        "engine_size": 1.2,
+        "power": 130,
+        "doors": 5,
+        "seats": 5,
+        "color": "bleu",
+        "features": {"gps": True},
+        "images": ["https://cdn.example.com/vehicles/1.jpg"],
+        "image_variants": {"https://cdn.example.com/vehicles/1.jpg": {"webp": "https://cdn.example.com/vehicles/1_320w.webp 320w"}},
+        "technical_details": {"norme": "Euro 6"},
+        "last_maintenance_date": None,
+        "next_maintenance_date": datetime(2025, 6, 1, 9, 30),
+        "created_at": datetime(2024, 1, 15, 10, 0, 0, 123456),
+        "updated_at": datetime(2024, 1, 16, 11, 0),
+    }
+    values.update(overrides)
+    return tuple(values[field] for field in VEHICLE_FIELDS)
+
+
+def test_fast_path_matches_pydantic_output():
+    """Le chemin rapide produit le même JSON que response_model"""
+    rows = [make_row(), make_row(id=2, registration_number="EF-456-GH", fuel_type=FuelType.ELECTRIQUE)]
+
+    adapter = TypeAdapter(List[VehicleResponse])
+    expected = adapter.dump_python(
+        adapter.validate_python([vehicle_row_to_dict(row) for row in rows]),
+        mode="json"
+    )
+
+    assert json.loads(serialize_vehicle_rows(rows)) == expected
+
+
+def test_null_json_fields_use_schema_defaults():
+    """Les colonnes JSON nulles sont remplacées par les valeurs par défaut"""
+    data = vehicle_row_to_dict(make_row(features=None, images=None, image_variants=None, technical_details=None))
+
+    assert data["features"] == {}
+    assert data["images"] == []
+    assert data["image_variants"] == {}
+    assert data["technical_details"] == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("file_format", list(VehicleFileFormat))
+async def test_export_can_be_reimported(file_format):
+    """Un export CSV ou NDJSON est relu à l'identique par l'import en masse"""
+    rows = [make_row(), make_row(id=2, registration_number="EF-456-GH", color="gris\nclair")]
+    if file_format == VehicleFileFormat.CSV:
+        content = encode_csv_header() + encode_csv_rows(rows)
+    else:
+        content = encode_ndjson_rows(rows)
+
+    async def stream():
+        yield content
+
+    records = [data async for _, data in iter_records(stream(), file_format)]
+    vehicles = [VehicleCreate.model_validate(data) for data in records]
+
+    assert [v.registration_number for v in vehicles] == ["AB-123-CD", "EF-456-GH"]
+    assert vehicles[1].color == "gris\nclair"
+    assert vehicles[0].features == {"gps": True}
+    assert vehicles[0].fuel_type.value == "essence"
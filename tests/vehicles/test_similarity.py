@@ -0,0 +1,137 @@
+"""
+Tests pour l'index de similarité des véhicules.
+"""
+import random
+import time
+
+import pytest
+from sqlalchemy import insert, update
+
+from app.config import settings
+from app.models.vehicle import FuelType, TransmissionType, Vehicle
+from app.services import vehicle_similarity
+from app.services.vehicle_similarity import VehicleSimilarityIndex
+
+
+def vehicle(vehicle_id, **overrides):
+    values = {
+        "id": vehicle_id,
+        "brand": "Peugeot",
+        "model": "308",
+        "year": 2020,
+        "mileage": 40000.0,
+        "price": 17000.0,
+        "power": 130,
+        "doors": 5,
+        "seats": 5,
+        "fuel_type": FuelType.ESSENCE,
+        "transmission": TransmissionType.MANUELLE,
+        "is_available_for_sale": True,
+        "is_available_for_rent": False,
+    }
+    values.update(overrides)
+    return values
+
+
+def build_index(vehicles):
+    index = VehicleSimilarityIndex(capacity=2)
+    for v in vehicles:
+        index.upsert(v)
+    return index
+
+
+def test_most_similar_orders_by_distance():
+    """Les véhicules les plus proches sont retournés en premier"""
+    index = build_index([
+        vehicle(1),
+        vehicle(2, power=135),
+        vehicle(3, brand="BMW", model="X5", price=60000.0, power=300, fuel_type=FuelType.DIESEL),
+        vehicle(4, model="208", price=14000.0, power=100),
+    ])
+
+    assert index.most_similar(1, k=3) == [2, 4, 3]
+    assert index.most_similar(1, k=1) == [2]
+
+
+def test_unavailable_vehicles_are_excluded():
+    """Seuls les véhicules disponibles à la vente ou à la location sont proposés"""
+    index = build_index([
+        vehicle(1),
+        vehicle(2, is_available_for_sale=False),
+        vehicle(3, is_available_for_sale=False, is_available_for_rent=True, price=25000.0),
+    ])
+
+    assert index.most_similar(1, k=5) == [3]
+
+
+def test_incremental_updates_and_removal():
+    """Les écritures mettent à jour l'index sans reconstruction"""
+    index = build_index([vehicle(1), vehicle(2), vehicle(3, price=30000.0, mileage=None)])
+
+    index.upsert(vehicle(2, brand="Renault", model="Clio", price=9000.0))
+    assert index.most_similar(1, k=2) == [3, 2]
+
+    index.remove(3)
+    assert 3 not in index
+    assert len(index) == 2
+    assert index.most_similar(1, k=2) == [2]
+
+
+def test_query_on_50k_vehicles_is_fast():
+    """Une requête sur 50 000 véhicules reste de l'ordre de la milliseconde"""
+    rng = random.Random(42)
+    index = VehicleSimilarityIndex()
+    for i in range(50000):
+        index.upsert(vehicle(
+            i,
+            brand=rng.choice(["Peugeot", "Renault", "BMW", "Toyota"]),
+            model=f"M{rng.randint(0, 200)}",
+            year=rng.randint(2005, 2024),
+            mileage=float(rng.randint(0, 250000)),
+            price=float(rng.randint(3000, 80000)),
+            power=rng.randint(60, 400),
+        ))
+    index.most_similar(0, k=10)
+
+    start = time.perf_counter()
+    for _ in range(20):
+        assert len(index.most_similar(rng.randrange(50000), k=10)) == 10
+    elapsed_ms = (time.perf_counter() - start) * 1000 / 20
+
+    assert elapsed_ms < 50
+
+
+def vehicle_row(vehicle_id, **overrides):
+    return {
+        "id": vehicle_id, "brand": "Peugeot", "model": "308", "registration_number": f"AA-{vehicle_id:03d}-AA",
+        "price": 17000.0, "monthly_rental_price": 300.0, "power": 130, "engine_size": 1.2,
+        "is_available_for_sale": True,
+        "features": {}, "images": [], "technical_details": {}, **overrides,
+    }
+
+
+@pytest.mark.asyncio
+async def test_writes_from_other_workers_are_picked_up(sqlite_db, monkeypatch):
+    """Un véhicule créé ailleurs est chargé à la demande, les autres au rechargement périodique"""
+    database = await sqlite_db([Vehicle], {Vehicle: [vehicle_row(1), vehicle_row(2), vehicle_row(3, power=300)]})
+    index = VehicleSimilarityIndex()
+    now = time.monotonic()
+    monkeypatch.setattr(vehicle_similarity.time, "monotonic", lambda: now)
+    async with database.session() as session:
+        await index.refresh(session)
+        assert index.most_similar(1, k=1) == [2]
+
+        # Écritures d'un autre worker : aucune invalidation n'atteint cet index
+        await session.execute(insert(Vehicle), [vehicle_row(4, power=135)])
+        await session.execute(update(Vehicle).where(Vehicle.id == 2).values(power=400))
+        await session.commit()
+
+        assert await index.ensure(session, 4)
+        assert not await index.ensure(session, 5)
+        # Le véhicule 2 modifié ailleurs reste périmé jusqu'au rechargement
+        assert index.most_similar(1, k=2) == [2, 4]
+
+        now += settings.SIMILARITY_INDEX_TTL
+        await index.refresh(session)
+        assert index.most_similar(1, k=1) == [4]
+        assert index.most_similar(2, k=1) == [3]